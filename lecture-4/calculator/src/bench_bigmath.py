@@ -0,0 +1,54 @@
+"""階乗と、その表示にかかる時間を測るベンチマーク
+
+    python bench_bigmath.py 1000 20000 100000
+
+これまでの for ループ・math.factorial・bigmath.factorial（1回目と2回目）を比べ、
+全桁の str() と bigmath.format_int（指数表記）の時間も表示する。
+"""
+import math
+import sys
+import time
+
+import bigmath
+
+# for ループはこれより大きいと時間がかかりすぎるので測らない
+LOOP_LIMIT = 30000
+
+
+def loop_factorial(n):
+    """これまでの x! ボタンの計算"""
+    fact = 1
+    for i in range(1, n + 1):
+        fact *= i
+    return fact
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 20000, 100000]
+    # 全桁の str() と比べるため、4300桁の上限を外す
+    sys.set_int_max_str_digits(0)
+
+    print(f"{'n':>8}{'ループ':>10}{'math':>10}{'1回目':>10}{'2回目':>10}{'str()':>10}{'指数表記':>10}  (ms)")
+    for n in sizes:
+        loop_ms = timed(loop_factorial, n)[1] if n <= LOOP_LIMIT else None
+        expected, math_ms = timed(math.factorial, n)
+        value, first_ms = timed(bigmath.factorial, n)
+        _, memo_ms = timed(bigmath.factorial, n)
+        if value != expected:
+            print(f"NG: {n}! が math.factorial と一致しない")
+            return 1
+        _, str_ms = timed(str, value)
+        text, format_ms = timed(bigmath.format_int, value, 12)
+        loop = f"{loop_ms:10.1f}" if loop_ms is not None else f"{'-':>10}"
+        print(f"{n:>8}{loop}{math_ms:10.1f}{first_ms:10.1f}{memo_ms:10.3f}{str_ms:10.1f}{format_ms:10.3f}  {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
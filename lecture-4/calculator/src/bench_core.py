@@ -0,0 +1,111 @@
+"""電卓の本体(calc_core.py)を画面なしで動かす、確認とベンチマーク
+
+    python bench_core.py                       # 決まったキー列の結果を確かめてから、乱数のキー列で速さを測る
+    python bench_core.py --sessions 1000000    # 100万回分を再生する
+    python bench_core.py --write keys.txt      # 乱数のキー列をファイルに書き出す（calc_core.py のバッチ用）
+
+1回分 = AC から始まるキー列（数・演算子・=・関数キーなど 5〜30 個）。
+"""
+import argparse
+import random
+import sys
+import time
+
+from calc_core import CalcCore, run_batch
+from history_view import HistoryRow
+
+# (キー列, 期待する表示, モード)
+CASES = [
+    ("0 . 1 + 0 . 2 =", "0.3", "decimal"),
+    ("2 + 3 * 4 =", "14", "decimal"),
+    ("1 / 0 =", "Error", "decimal"),
+    ("1 / 3 = * 3 =", "1", "decimal"),
+    ("1 / 3 =", "1/3", "fraction"),
+    ("5 +/- * 2 = + 1 =", "-9", "decimal"),
+    ("5 0 %", "0.5", "decimal"),
+    ("3 * - 2 =", "-6", "decimal"),
+    ("3 + * 2 =", "6", "decimal"),
+    ("7 - =", "7", "decimal"),
+    ("9 √ x² 10ˣ log", "9", "decimal"),
+    ("5 x!", "120", "decimal"),
+    ("2 0 x!", "2.43290200818E+18", "decimal"),
+    ("2 . 5 x!", "Error", "decimal"),
+    ("1 / 0 = 5", "0", "decimal"),
+    ("0 . 1 + 0 . 2 =", "0.3", "float"),
+    # 結果の続きを長く重ねても、式は伸びずに丸めのない値から続ける
+    ("1 / 3 =" + " + 1 =" * 3000 + " * 3 =", "9001", "fraction"),
+    # 長すぎる式は Error
+    ("1 " * 1001 + "=", "Error", "decimal"),
+]
+
+DIGIT_KEYS = list("0123456789")
+OPERATOR_KEYS = list("+-*/")
+OTHER_KEYS = ["%", "+/-", "x²", "√", "log", "="]
+
+
+def make_session(rng):
+    """電卓で打ちそうなキー列を1回分作る"""
+    keys = ["AC"]
+    for _ in range(rng.randint(1, 5)):
+        keys += rng.choices(DIGIT_KEYS, k=rng.randint(1, 4))
+        if rng.random() < 0.2:
+            keys += ["."] + rng.choices(DIGIT_KEYS, k=rng.randint(1, 2))
+        keys.append(rng.choice(OTHER_KEYS) if rng.random() < 0.1 else rng.choice(OPERATOR_KEYS))
+    keys.append("=")
+    return keys
+
+
+def check():
+    """CASES の結果が期待どおりか確かめる。外れた件数を返す"""
+    failed = 0
+    for keys, want, mode in CASES:
+        got = CalcCore(mode).feed(keys.split())
+        if got != want:
+            print(f"NG: [{mode}] {keys} -> {got}（期待 {want}）")
+            failed += 1
+    # バッチでも同じ結果になるか
+    for (keys, want, mode), got in zip(CASES, run_batch([c[0] for c in CASES])):
+        if mode == "decimal" and got != want:
+            print(f"NG: バッチ {keys} -> {got}（期待 {want}）")
+            failed += 1
+    # 履歴の行を使い回したとき、同じ式でも結果（モード違い）は書き換わるか
+    row = HistoryRow(on_select=lambda expression: None)
+    row.set_data("1/3", "0.333333333333")
+    row.set_data("1/3", "1/3")
+    if row.result_text.value != "= 1/3":
+        print(f"NG: 履歴の行 1/3 -> {row.result_text.value}（期待 = 1/3）")
+        failed += 1
+    print(f"確認: {len(CASES)}件中 {len(CASES) - failed}件 OK")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="電卓の本体を画面なしで動かす")
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--write", help="キー列を書き出すファイル（書き出すだけで計測はしない）")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    if args.write:
+        with open(args.write, "w", encoding="utf-8") as f:
+            for _ in range(args.sessions):
+                f.write(" ".join(make_session(rng)) + "\n")
+        print(f"{args.sessions}回分を {args.write} に書き出しました")
+        return 0
+
+    if check():
+        return 1
+
+    lines = [" ".join(make_session(rng)) for _ in range(args.sessions)]
+    keys = sum(line.count(" ") + 1 for line in lines)
+    start = time.perf_counter()
+    errors = sum(1 for display in run_batch(lines) if display == "Error")
+    elapsed = time.perf_counter() - start
+    print(f"{args.sessions}回分 / {keys}キー  {elapsed:.2f}秒  "
+          f"{args.sessions / elapsed:.0f} 回/秒  {keys / elapsed:.0f} キー/秒  (Error {errors}件)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""計算式エンジン(expr.py)の速さを測るベンチマーク
+
+    python bench_expr.py --count 100000
+
+電卓で打ちそうな式を distinct 種類作り、合計 count 回計算する（同じ式はコンパイル済みのものを使う）。
+モードごとに 1秒あたりの計算回数を表示し、コンパイルなし(キャッシュなし)の速さとも比べる。
+"""
+import argparse
+import random
+import sys
+import time
+
+import expr
+
+
+def make_expressions(distinct, seed=0):
+    """'12.5*(3-0.25)/7' のような式を作る"""
+    rng = random.Random(seed)
+    exprs = []
+    for _ in range(distinct):
+        terms = [f"{rng.randint(1, 999)}" if rng.random() < 0.6 else f"{rng.randint(0, 99)}.{rng.randint(1, 99)}"
+                 for _ in range(rng.randint(2, 6))]
+        text = terms[0]
+        for term in terms[1:]:
+            op = rng.choice("+-*/")
+            text += op + (f"({term}+1)" if rng.random() < 0.2 else term)
+        exprs.append(text)
+    return exprs
+
+
+def run(name, func, exprs, count):
+    """exprs を順に繰り返して count 回 func を呼び、1秒あたりの回数を返す"""
+    start = time.perf_counter()
+    for i in range(count):
+        func(exprs[i % len(exprs)])
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:<28} {count}回 {elapsed * 1000:8.1f} ms  {rate:10.0f} 回/秒")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="計算式エンジンの速さを測る")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=500, help="式の種類（コンパイルのキャッシュ 1024 件より少なくする）")
+    parser.add_argument("--target", type=float, default=100_000, help="decimal モードで目標とする 回/秒")
+    args = parser.parse_args()
+
+    exprs = make_expressions(args.distinct)
+    print(f"式 {args.distinct}種類 (例: {exprs[0]})")
+
+    # 1回目でコンパイルしておく
+    for mode in expr.MODES:
+        for text in exprs:
+            expr.evaluate(text, mode)
+
+    rates = {mode: run(f"evaluate ({mode})", lambda t, m=mode: expr.evaluate(t, m), exprs, args.count)
+             for mode in expr.MODES}
+    run("evaluate+表示 (decimal)", lambda t: expr.format_value(expr.evaluate(t)), exprs, args.count)
+    run("コンパイルなし (decimal)", lambda t: expr.compile_expr.__wrapped__(t)(), exprs, args.count // 10)
+    print(f"キャッシュ: {expr.compile_expr.cache_info()}")
+
+    if rates["decimal"] < args.target:
+        print(f"NG: decimal モードが {args.target:.0f} 回/秒に届かない")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""電卓の大きな整数の計算（階乗）と、桁数の多い数の表示
+
+階乗は二分割で掛け合わせ（途中でキャンセルできる）、計算した結果は少しだけ覚えておく。
+表示は上位のビットだけから指数表記を作るので、何十万桁の数でも全桁を文字列にしない。
+（Python 3.11 以降は 4300桁を超える int の str() がエラーになる）
+"""
+import math
+import threading
+from collections import OrderedDict
+from decimal import MAX_EMAX, MIN_EMIN, Context, Decimal
+
+# これ以下の階乗は math.factorial でその場で計算する（数ms以内に終わる）
+SMALL_FACTORIAL = 5000
+# これより大きい階乗は計算しない（10^6! は約557万桁）
+MAX_FACTORIAL = 1_000_000
+# 二分割の葉で math.prod にまとめて掛ける個数
+LEAF_SIZE = 1024
+# 覚えておく階乗の個数
+MEMO_SIZE = 16
+# 指数表記を作るときに使う上位のビット数
+TOP_BITS = 256
+
+
+class Cancelled(Exception):
+    """裏で計算している途中で、新しい入力によって不要になった"""
+
+
+_memo = OrderedDict()  # n -> n!
+_memo_lock = threading.Lock()
+
+
+def _remember(n, value):
+    with _memo_lock:
+        _memo[n] = value
+        _memo.move_to_end(n)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def _nearest(n):
+    """覚えている階乗のうち n 以下で最大のもの (m, m!)。なければ (1, 1)"""
+    with _memo_lock:
+        best = max((m for m in _memo if m <= n), default=None)
+        if best is None:
+            return 1, 1
+        _memo.move_to_end(best)
+        return best, _memo[best]
+
+
+def _product(lo, hi, is_stale):
+    """lo から hi-1 までの積（半分ずつに分けて、桁数の近いもの同士を掛ける）"""
+    if hi - lo <= LEAF_SIZE:
+        return math.prod(range(lo, hi))
+    if is_stale():
+        raise Cancelled()
+    mid = (lo + hi) // 2
+    return _product(lo, mid, is_stale) * _product(mid, hi, is_stale)
+
+
+def factorial(n, is_stale=lambda: False):
+    """n! を返す。覚えている m! (m <= n) があれば、その続きだけを掛ける
+
+    大きな n の計算中に is_stale() が True になったら Cancelled を送出する。
+    """
+    if n < 0 or n > MAX_FACTORIAL:
+        raise ValueError(f"階乗は 0 から {MAX_FACTORIAL} までです: {n}")
+    m, value = _nearest(n)
+    if m == n:
+        return value
+    if n <= SMALL_FACTORIAL:
+        value = math.factorial(n)
+    else:
+        value *= _product(m + 1, n + 1, is_stale)
+    _remember(n, value)
+    return value
+
+
+def to_decimal(n, prec):
+    """整数を有効 prec 桁の Decimal にする（大きな数も全桁を変換しない）"""
+    bits = n.bit_length()
+    if bits <= TOP_BITS:
+        return Context(prec=prec).plus(Decimal(n))
+    # 上位 TOP_BITS ビット × 2^shift として計算する（切り捨ての誤差は 2^-TOP_BITS 未満）
+    shift = bits - TOP_BITS
+    ctx = Context(prec=prec + 5, Emax=MAX_EMAX, Emin=MIN_EMIN)
+    value = ctx.multiply(Decimal(n >> shift), ctx.power(Decimal(2), shift))
+    return Context(prec=prec, Emax=MAX_EMAX, Emin=MIN_EMIN).plus(value)
+
+
+def format_int(n, digits):
+    """digits 桁以内ならそのまま、それより長ければ '1.23E+456573' のような指数表記にする"""
+    if n.bit_length() <= 64 and abs(n) < 10 ** digits:
+        return str(n)
+    value = to_decimal(n, digits)
+    if value.adjusted() < digits:
+        return str(n)
+    return format(value.normalize(Context(prec=digits, Emax=MAX_EMAX, Emin=MIN_EMIN)), "E")
+
+
+class BackgroundCalc:
+    """重い計算を裏のスレッドで1つだけ行う（新しく始めるか cancel() すると前の計算の結果は捨てる）"""
+
+    def __init__(self):
+        self.generation = 0
+        self.running = None  # 実行中の計算の generation（なければ None）
+        self.lock = threading.Lock()
+
+    @property
+    def busy(self):
+        return self.running is not None
+
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            self.running = None
+
+    def submit(self, func, on_result, on_error):
+        """func(is_stale) を裏で実行し、最新のものだけ on_result / on_error に渡す"""
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            self.running = generation
+
+        def is_stale():
+            return self.generation != generation
+
+        def run():
+            try:
+                result = func(is_stale)
+            except Cancelled:
+                return
+            except Exception as ex:
+                result, error = None, ex
+            else:
+                error = None
+            # cancel() と入れ違いにならないよう、ロックを持ったまま渡す
+            with self.lock:
+                if is_stale():
+                    return
+                self.running = None
+                if error is None:
+                    on_result(result)
+                else:
+                    on_error(error)
+
+        threading.Thread(target=run, daemon=True).start()
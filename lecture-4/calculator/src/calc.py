@@ -1,4 +1,6 @@
 import flet as ft
+#計算の状態とキーごとの処理は calc_core.py にあり、ここでは表示だけを行う
+from calc_core import CalcCore
 #クラスを継承することでボタンごとの色設定ができるようになる
 
 
@@ -33,7 +35,7 @@ class ExtraActionButton(CalcButton):
 class CalculatorApp(ft.Container):
     def __init__(self):
         super().__init__()
-        self.reset()
+        self.core = CalcCore()
 
         self.result = ft.Text(value="0", color=ft.Colors.WHITE, size=20)
         self.width = 350
@@ -89,79 +91,13 @@ class CalculatorApp(ft.Container):
     def button_clicked(self, e):
         data = e.control.data
         print(f"Butron clicked with data = {data}")
-        if self.result.value == "Error" or data == "AC":
-                self.result.value = "0"
-                self.reset()
-
-        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
-                if self.result.value == "0" or self.new_operand == True:
-                    self.result.value = data
-                    self.new_operand = False
-                else:
-                    self.result.value = self.result.value + data
-
-        elif data in ("+", "-", "*", "/"):
-                self.result.value = self.calculate(
-                    self.operand1, float(self.result.value), self.operator
-                )
-                self.operator = data
-                if self.result.value == "Error":
-                    self.operand1 = "0"
-                else:
-                    self.operand1 = float(self.result.value)
-                self.new_operand = True
-
-        elif data in ("="):
-                self.result.value = self.calculate(
-                    self.operand1, float(self.result.value), self.operator
-                )
-                self.reset()
-
-        elif data in ("%"):
-                self.result.value = float(self.result.value) / 100
-                self.reset()
-
-        elif data in ("+/-"):
-                if float(self.result.value) > 0:
-                    self.result.value = "-" + str(self.result.value)
-
-                elif float(self.result.value) < 0:
-                    self.result.value = str(
-                        self.format_number(abs(float(self.result.value)))
-                    )
-
+        self.result.value = self.core.press(data)
         self.update()
 
-    def format_number(self, num):
-        if num % 1 == 0:
-            return int(num)
-        else:
-            return num
-
-    def calculate(self, operand1, operand2, operator):
-
-        if operator == "+":
-            return self.format_number(operand1 + operand2)
-
-        elif operator == "-":
-            return self.format_number(operand1 - operand2)
-
-        elif operator == "*":
-            return self.format_number(operand1 * operand2)
-
-        elif operator == "/":
-            if operand2 == 0:
-                return "Error"
-            else:
-                return self.format_number(operand1 / operand2)
-
-    def reset(self):
-        self.operator = "+"
-        self.operand1 = 0
-        self.new_operand = True
-
 def main(page: ft.Page):
     page.title = "Simple Calculator"
     calc = CalculatorApp()
     page.add(calc)
-ft.app(main)
\ No newline at end of file
+
+if __name__ == "__main__":
+    ft.app(main)
@@ -0,0 +1,273 @@
+"""画面に依存しない電卓の本体（ボタンを押したときの状態の移り変わり）
+
+    core = CalcCore()
+    core.feed(["7", "+", "3", "="])     # '10'
+
+    python calc_core.py sessions.txt               # 1行 = 1回分のキー（空白区切り）。行ごとの表示を出力する
+    python calc_core.py - --mode fraction < keys   # 標準入力から読む
+    python calc_core.py sessions.txt --stats       # 処理した行数と速さを標準エラーに出す
+
+Flet の CalculatorApp はこのクラスにキーを渡して、display を表示するだけにする。
+"""
+import argparse
+import sys
+import time
+from collections import OrderedDict
+
+from bigmath import MAX_FACTORIAL, SMALL_FACTORIAL, factorial
+from expr import ANS, DEFAULT_MODE, MODES, evaluate, format_value, split_last_number, to_text
+
+DIGITS = frozenset("0123456789.")
+OPERATORS = frozenset("+-*/")
+# 関数のキーと、式全体にかける計算
+FUNCTION_TEMPLATES = {"x²": "({})^2", "√": "sqrt({})", "10ˣ": "10^({})", "log": "log({})"}
+# バッチ用に、キーボードで打ちやすい書き方も受け付ける
+KEY_ALIASES = {"x^2": "x²", "sqrt": "√", "10^x": "10ˣ", "!": "x!", "fact": "x!", "C": "AC", "neg": "+/-"}
+# 裏で計算している間の表示（どのキーを押しても中止する）
+BUSY_TEXT = "計算中...（ボタンで中止）"
+ERROR_TEXT = "Error"
+# 計算結果を覚えておく式の数（同じ式はもう一度計算しない）
+MEMO_SIZE = 4096
+
+
+class CalcCore:
+    """電卓の状態（入力中の式・表示・直前の式）と、キーごとの処理
+
+    background に bigmath.BackgroundCalc を渡すと、大きな階乗は裏で計算して
+    終わったときに on_update() を呼ぶ。渡さなければその場で計算する（バッチ用）。
+    history に history.HistoryStore を渡すと、= や関数キーの結果を追記していく。
+    """
+
+    def __init__(self, mode=DEFAULT_MODE, background=None, on_update=None, history=None):
+        if mode not in MODES:
+            raise ValueError(f"モードは {MODES} のどれかにしてください: {mode}")
+        self.mode = mode
+        self.background = background
+        self.on_update = on_update
+        self.history = history
+        self.memo = OrderedDict()  # (モード, 式, ans) -> (表示, 値)
+        self.display = "0"
+        self.last_expression = ""
+        self.clear_result()
+        self.reset()
+
+    def feed(self, keys):
+        """キーを順に押して、最後の表示を返す"""
+        for key in keys:
+            self.press(key)
+        return self.display
+
+    def press(self, key):
+        """キーを1つ押して、表示を返す"""
+        key = KEY_ALIASES.get(key, key)
+        if self.display in (ERROR_TEXT, BUSY_TEXT) or key == "AC":
+            #裏で計算中なら、その結果は捨てる
+            if self.background is not None:
+                self.background.cancel()
+            self.display = "0"
+            self.last_expression = ""
+            self.clear_result()
+            self.reset()
+        elif key in DIGITS:
+            if self.new_operand:
+                self.expression = ""
+                self.new_operand = False
+            self.expression += key
+            self.show(self.expression)
+        elif key in OPERATORS:
+            self.press_operator(key)
+        elif key == "=":
+            #式エンジンで優先順位どおりに計算する（末尾の演算子は無視する）
+            self.finish(self.current_expression().rstrip("+-*/"))
+        elif key == "%":
+            #末尾の数を100で割る
+            head, number = split_last_number(self.current_expression(exact=False))
+            if number:
+                number = self.continue_from(self.calculate(number + "/100")[0])
+            self.edit(head + number)
+        elif key == "+/-":
+            #末尾の数の前の - を付け外しする（"3*5" -> "3*-5"）
+            head, number = split_last_number(self.current_expression(exact=False))
+            if head.endswith("-") and (head == "-" or head[-2] in "+-*/("):
+                head = head[:-1]
+            else:
+                head = head + "-"
+            self.edit(head + number)
+        elif key == "x!":
+            self.press_factorial()
+        elif key in FUNCTION_TEMPLATES:
+            #式全体の値に関数をかけて計算する（x² なら "(式)^2"）
+            self.finish(FUNCTION_TEMPLATES[key].format(self.current_expression()))
+        else:
+            raise ValueError(f"知らないキーです: {key}")
+        return self.display
+
+    def press_operator(self, key):
+        self.expression = self.current_expression()
+        self.new_operand = False
+        #演算子が続いたら後の方に置き換える（* と / の後の - は負の数として続ける）
+        if key == "-" and self.expression[-1] in "*/":
+            self.expression += key
+        else:
+            self.expression = self.expression.rstrip("+-*/") + key
+        self.show(self.expression)
+
+    def press_factorial(self):
+        #式全体の値の階乗。小さい数はその場で、大きい数は（background があれば）裏で計算する
+        expression = "fact(" + self.current_expression() + ")"
+        try:
+            n = int(evaluate(self.current_expression(), self.mode, self.last_value))
+        except (ValueError, ArithmeticError, RecursionError):
+            n = -1
+        if self.background is None or n <= SMALL_FACTORIAL or n > MAX_FACTORIAL:
+            self.finish(expression)
+            return
+        self.last_expression = ""
+        self.display = BUSY_TEXT
+        self.reset()
+        self.background.submit(
+            lambda is_stale: factorial(n, is_stale),
+            on_result=lambda value: self.finish_background(expression),
+            on_error=lambda ex: self.finish_background(expression),
+        )
+
+    def finish_background(self, expression):
+        #裏で計算した階乗は覚えてあるので、式として計算し直しても待たない（範囲外などは Error）
+        #計算中にキーが押されると中止されるので、ans（last_value）は頼んだときのまま
+        self.finish(expression)
+        if self.on_update is not None:
+            self.on_update()
+
+    def toggle_mode(self):
+        """小数(decimal)と分数(fraction)を切り替え、表示中の結果も計算し直す"""
+        self.set_mode("fraction" if self.mode == "decimal" else "decimal")
+
+    def set_mode(self, mode):
+        self.mode = mode
+        if self.new_operand and self.last_expression and self.display != ERROR_TEXT:
+            self.set_result(self.last_expression, self.last_ans)
+
+    def finish(self, expression):
+        # 式を計算して結果を表示し、次の入力は結果の続きか新しい式にする
+        ans = self.last_value
+        self.set_result(expression, ans)
+        self.reset()
+        if self.history is not None and self.display != ERROR_TEXT:
+            #履歴には ans を値に置き換えて、それだけで計算できる式を残す
+            if ans is not None and ANS in expression:
+                expression = expression.replace(ANS, to_text(ans))
+            self.history.append(self.mode, expression, self.display)
+
+    def recall(self, expression):
+        """履歴の式をもう一度計算して表示する（続けて演算子を押せばその続きから書ける）"""
+        if self.background is not None:
+            self.background.cancel()
+        self.set_result(expression, None)
+        self.reset()
+        return self.display
+
+    def set_result(self, expression, ans):
+        #結果は表示の文字列と、丸めていない値（次の式の ans）の両方を持っておく
+        self.last_expression = expression
+        self.last_ans = ans
+        self.display, self.last_value = self.calculate(expression, ans)
+        self.ans_text = self.continue_from(self.display)
+
+    def clear_result(self):
+        self.last_value = None  # 直前の結果の値（Error や未計算なら None）
+        self.last_ans = None    # last_expression を計算したときの ans
+        self.ans_text = "0"     # 画面で ans の代わりに見せる文字列
+
+    def edit(self, expression):
+        self.expression = expression
+        self.new_operand = False
+        self.show(expression or "0")
+
+    def show(self, expression):
+        #入力中の式を表示する（ans は直前の結果の表示に置き換える）
+        self.display = expression.replace(ANS, self.ans_text) if ANS in expression else expression
+
+    def current_expression(self, exact=True):
+        #計算結果が表示されているときは、その結果の続きから式を書く
+        if self.new_operand:
+            #丸めていない直前の値(ans)から続ければ、表示の丸めで精度が落ちず、式も長くならない
+            if exact and self.last_value is not None:
+                return ANS
+            return self.continue_from(self.display)
+        return self.expression or "0"
+
+    def continue_from(self, value):
+        #分数や負の数は、続けて書く演算子と結びつかないように括弧でくくる
+        if value.replace(".", "", 1).isdigit():
+            return value
+        return "(" + value + ")"
+
+    def calculate(self, expression, ans=None):
+        #(表示, 値) を返す。0での割り算や式の書き間違い・長すぎる式は Error（値は None）にする
+        #一度計算した式は覚えておいた結果を返す
+        key = (self.mode, expression, ans if ANS in expression else None)
+        result = self.memo.get(key)
+        if result is not None:
+            self.memo.move_to_end(key)
+            return result
+        try:
+            value = evaluate(expression, self.mode, ans)
+            result = (format_value(value), value)
+        except (ValueError, ArithmeticError, RecursionError):
+            result = (ERROR_TEXT, None)
+        self.memo[key] = result
+        if len(self.memo) > MEMO_SIZE:
+            self.memo.popitem(last=False)
+        return result
+
+    def reset(self):
+        #入力中の式を空にして、次の入力から新しい式を始める
+        self.expression = ""
+        self.new_operand = True
+
+
+def run_batch(lines, mode=DEFAULT_MODE):
+    """1行 = 1回分のキー列を順に処理して、行ごとの最後の表示を返す（1行ずつ読むので大きなファイルも扱える）
+
+    知らないキーのある行は 'Error' にする。
+    """
+    core = CalcCore(mode)
+    for line in lines:
+        keys = line.split()
+        if not keys:
+            continue
+        core.press("AC")
+        try:
+            yield core.feed(keys)
+        except ValueError:
+            yield ERROR_TEXT
+
+
+def main():
+    parser = argparse.ArgumentParser(description="キー列のファイルを電卓で計算する")
+    parser.add_argument("files", nargs="*", default=["-"], help="キー列のファイル（- は標準入力）")
+    parser.add_argument("--mode", choices=MODES, default=DEFAULT_MODE)
+    parser.add_argument("--stats", action="store_true", help="行数と速さを標準エラーに出す")
+    parser.add_argument("--quiet", action="store_true", help="結果を出力しない（速さだけ測る）")
+    args = parser.parse_args()
+
+    sessions = 0
+    start = time.perf_counter()
+    out = sys.stdout
+    for name in args.files:
+        f = sys.stdin if name == "-" else open(name, encoding="utf-8")
+        try:
+            for display in run_batch(f, args.mode):
+                sessions += 1
+                if not args.quiet:
+                    out.write(display + "\n")
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    elapsed = time.perf_counter() - start
+    if args.stats:
+        print(f"{sessions}行 {elapsed:.2f}秒 ({sessions / elapsed if elapsed else 0:.0f} 行/秒)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""電卓の計算式エンジン（字句解析 → 操車場アルゴリズムで逆ポーランド記法 → 関数の木にコンパイル）
+
+    evaluate("0.1+0.2")                 # Decimal('0.3')
+    evaluate("1/3*3", mode="fraction")  # Fraction(1, 1)
+    evaluate("2^10-sqrt(16)")           # Decimal('1020')
+    evaluate("ans*3", ans=Fraction(1, 3), mode="fraction")  # Fraction(1, 1)
+
+演算子の優先順位は 括弧 > 関数 > ^(右結合) > 単項の - > * / > + - 。
+コンパイルした式は (式, モード) ごとにキャッシュするので、同じ式の再計算は命令の列を順に実行するだけになる。
+ans は直前の計算結果（evaluate に渡した値）で、結果の続きを式の文字列を伸ばさずに書ける。
+"""
+import math
+import operator
+import re
+from decimal import MAX_EMAX, MIN_EMIN, Context, Decimal, InvalidOperation
+from fractions import Fraction
+from functools import lru_cache
+
+from bigmath import factorial, format_int, to_decimal
+
+# 計算のモード（decimal: 10進の任意精度 / fraction: 分数で厳密に / float: これまでと同じ2進の浮動小数点）
+MODES = ("decimal", "fraction", "float")
+DEFAULT_MODE = "decimal"
+# decimal モードの有効桁数と、画面に出す桁数
+PRECISION = 34
+DISPLAY_DIGITS = 12
+
+# 階乗のような桁数の多い数も扱えるように、指数の範囲は最大にしておく
+CONTEXT = Context(prec=PRECISION, Emax=MAX_EMAX, Emin=MIN_EMIN)
+# fraction モードで作る整数の大きさの上限（ビット数。10^6! と同じくらい）
+MAX_FRACTION_BITS = 20_000_000
+# 式の長さの上限（文字数）
+MAX_LENGTH = 1000
+# 直前の計算結果を表す名前
+ANS = "ans"
+# 履歴などで ans の値を分数のまま書き出す大きさの上限（分子と分母のビット数の合計）
+MAX_TEXT_BITS = 256
+
+# 数値・演算子・括弧・関数名（×÷ や ** も受け付ける）
+TOKEN_RE = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)|(\*\*|[-+*/^()×÷])|([a-z]+))")
+ALIASES = {"×": "*", "÷": "/", "**": "^"}
+
+# 二項演算子: (優先順位, 右結合か)
+BINARY = {"+": (1, False), "-": (1, False), "*": (2, False), "/": (2, False), "^": (4, True)}
+# 単項の - と + は ^ より弱い（-2^2 = -4）
+UNARY = {"neg": 3, "pos": 3}
+FUNCTION = 5
+
+
+class ExpressionError(ValueError):
+    """式の書き方の誤り（括弧の対応がない、演算子が続く など）"""
+
+
+def tokenize(text):
+    """式を ('num', '1.5') / ('op', '+') / ('name', 'sqrt') の並びにする"""
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"式が長すぎます（{MAX_LENGTH}文字まで）")
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if m is None:
+            raise ExpressionError(f"読めない文字があります: {text[pos:].strip()[:10]!r}")
+        number, op, name = m.groups()
+        if number is not None:
+            tokens.append(("num", number))
+        elif op is not None:
+            tokens.append(("op", ALIASES.get(op, op)))
+        else:
+            tokens.append(("name", name))
+        pos = m.end()
+    return tokens
+
+
+def to_rpn(tokens):
+    """操車場アルゴリズムで逆ポーランド記法にする（単項演算子と関数呼び出しも扱う）"""
+    output = []
+    stack = []  # (種類, 名前)
+    expect_operand = True  # 次に来るのが数値（か単項演算子・関数・開き括弧）か
+    need_paren = False  # 関数名の直後か
+
+    def pop_while(prec, right):
+        # 自分より強い（左結合なら同じ強さも）演算子を出力に移す
+        while stack and stack[-1][0] != "(":
+            kind, name = stack[-1]
+            top = BINARY[name][0] if kind == "binary" else UNARY[name] if kind == "unary" else FUNCTION
+            if top > prec or (top == prec and not right):
+                output.append(stack.pop())
+            else:
+                break
+
+    for kind, value in tokens:
+        if need_paren and value != "(":
+            raise ExpressionError(f"関数 {stack[-1][1]} の後には括弧が必要です")
+        need_paren = kind == "name"
+        if kind == "num":
+            if not expect_operand:
+                raise ExpressionError(f"数の前に演算子がありません: {value}")
+            output.append(("num", value))
+            expect_operand = False
+        elif kind == "name" and value == ANS:
+            if not expect_operand:
+                raise ExpressionError(f"{ANS} の前に演算子がありません")
+            need_paren = False
+            output.append(("ans", value))
+            expect_operand = False
+        elif kind == "name":
+            if not expect_operand:
+                raise ExpressionError(f"関数の前に演算子がありません: {value}")
+            stack.append(("function", value))
+        elif value == "(":
+            if not expect_operand:
+                raise ExpressionError("括弧の前に演算子がありません")
+            stack.append(("(", value))
+        elif value == ")":
+            if expect_operand:
+                raise ExpressionError("括弧の中が空か、演算子で終わっています")
+            while stack and stack[-1][0] != "(":
+                output.append(stack.pop())
+            if not stack:
+                raise ExpressionError("閉じ括弧が多すぎます")
+            stack.pop()
+            if stack and stack[-1][0] == "function":
+                output.append(stack.pop())
+        elif expect_operand:
+            if value not in ("-", "+"):
+                raise ExpressionError(f"演算子 {value} の前に数がありません")
+            # 単項演算子は右から結びつくので、ここでは何も出力に移さない
+            stack.append(("unary", "neg" if value == "-" else "pos"))
+        else:
+            prec, right = BINARY[value]
+            pop_while(prec, right)
+            stack.append(("binary", value))
+            expect_operand = True
+
+    if expect_operand:
+        raise ExpressionError("式が演算子で終わっています" if tokens else "式が空です")
+    while stack:
+        kind, name = stack.pop()
+        if kind == "(":
+            raise ExpressionError("閉じ括弧が足りません")
+        output.append((kind, name))
+    return output
+
+
+# --- モードごとの数と演算 ---
+def _check_positive(x):
+    if x <= 0:
+        raise InvalidOperation("log の引数は正の数にしてください")
+    return x
+
+
+def _fraction_power(a, b):
+    # 指数が整数なら分数のまま厳密に、そうでなければ decimal で近似する
+    if b.denominator == 1:
+        # 10^1000000000 のように、分数のままでは終わらない大きさになるものは計算しない
+        size = max(abs(a.numerator), a.denominator).bit_length() * abs(b.numerator)
+        if size > MAX_FRACTION_BITS:
+            raise OverflowError("分数で計算するには大きすぎます")
+        return a ** b.numerator
+    return Fraction(CONTEXT.power(_to_decimal(a), _to_decimal(b)))
+
+
+def _to_decimal(x):
+    # 分子・分母が大きくても全桁は変換しない
+    return CONTEXT.divide(to_decimal(x.numerator, PRECISION + 5), to_decimal(x.denominator, PRECISION + 5))
+
+
+def _to_count(x):
+    """階乗に渡せる 0 以上の整数にする"""
+    if x < 0 or x != int(x):
+        raise ValueError(f"階乗は 0 以上の整数だけです: {x}")
+    return int(x)
+
+
+def _float_power(a, b):
+    result = a ** b
+    if isinstance(result, complex):
+        raise ValueError("負の数の非整数乗は計算できません")
+    return result
+
+
+NUMBERS = {"decimal": Decimal, "fraction": Fraction, "float": float}
+OPERATORS = {
+    "decimal": {"+": CONTEXT.add, "-": CONTEXT.subtract, "*": CONTEXT.multiply, "/": CONTEXT.divide,
+                "^": CONTEXT.power, "neg": CONTEXT.minus, "pos": CONTEXT.plus},
+    "fraction": {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+                 "^": _fraction_power, "neg": operator.neg, "pos": operator.pos},
+    "float": {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv,
+              "^": _float_power, "neg": operator.neg, "pos": operator.pos},
+}
+FUNCTIONS = {
+    "decimal": {"sqrt": CONTEXT.sqrt, "log": lambda x: CONTEXT.log10(_check_positive(x)),
+                "fact": lambda x: to_decimal(factorial(_to_count(x)), PRECISION)},
+    "fraction": {"sqrt": lambda x: Fraction(CONTEXT.sqrt(_to_decimal(x))),
+                 "log": lambda x: Fraction(CONTEXT.log10(_to_decimal(_check_positive(x)))),
+                 "fact": lambda x: Fraction(factorial(_to_count(x)))},
+    "float": {"sqrt": math.sqrt, "log": math.log10, "fact": lambda x: float(factorial(_to_count(x)))},
+}
+
+
+def convert(value, mode):
+    """Decimal / Fraction / float の値を mode の数にする（ans を別のモードで使うとき）"""
+    if mode == "decimal":
+        if isinstance(value, Fraction):
+            return _to_decimal(value)
+        return CONTEXT.plus(Decimal(value))
+    if mode == "fraction":
+        return value if isinstance(value, Fraction) else Fraction(value)
+    return float(value)
+
+
+# 命令の種類（引数の数。ANS_ARITY は ans を積む）
+ANS_ARITY = -1
+
+
+@lru_cache(maxsize=1024)
+def compile_expr(text, mode=DEFAULT_MODE):
+    """式を、ans を受け取る関数にする（呼ぶたびに計算する）。同じ (式, モード) はキャッシュから返す
+
+    逆ポーランド記法の命令の列をスタックで順に実行するので、式が深く入れ子になっても再帰しない。
+    """
+    if mode not in MODES:
+        raise ValueError(f"モードは {MODES} のどれかにしてください: {mode}")
+    number = NUMBERS[mode]
+    ops = OPERATORS[mode]
+    functions = FUNCTIONS[mode]
+
+    # (引数の数, 値か関数) の列
+    program = []
+    for kind, value in to_rpn(tokenize(text)):
+        if kind == "num":
+            program.append((0, number(value)))
+        elif kind == "ans":
+            program.append((ANS_ARITY, None))
+        elif kind == "binary":
+            program.append((2, ops[value]))
+        elif kind == "unary":
+            program.append((1, ops[value]))
+        else:
+            if value not in functions:
+                raise ExpressionError(f"知らない関数です: {value}")
+            program.append((1, functions[value]))
+
+    def run(ans=None):
+        stack = []
+        push, pop = stack.append, stack.pop
+        for arity, item in program:
+            if arity == 2:
+                right = pop()
+                push(item(pop(), right))
+            elif arity == 1:
+                push(item(pop()))
+            elif arity == 0:
+                push(item)
+            else:
+                if ans is None:
+                    raise ExpressionError(f"{ANS} の値がありません")
+                push(convert(ans, mode))
+        return stack[0]
+
+    return run
+
+
+def evaluate(text, mode=DEFAULT_MODE, ans=None):
+    """式を計算して Decimal / Fraction / float を返す（式の中の ans は ans の値）
+
+    書き方の誤りは ExpressionError、0 での割り算などは ArithmeticError（float では ValueError も）を送出する。
+    """
+    return compile_expr(text, mode)(ans)
+
+
+def to_text(value):
+    """値を式に書ける文字列にする（履歴に残す ans 用。分数が大きければ小数で近似する）"""
+    if isinstance(value, Fraction):
+        if value.numerator.bit_length() + value.denominator.bit_length() > MAX_TEXT_BITS:
+            value = _to_decimal(value)
+        elif value.denominator == 1:
+            text = str(value.numerator)
+            return f"({text})" if value < 0 else text
+        else:
+            return f"({value})"
+    text = repr(value) if isinstance(value, float) else str(value)
+    return f"({text})" if text.startswith("-") else text
+
+
+def format_value(value, digits=DISPLAY_DIGITS):
+    """画面に出す文字列にする（有効桁数で丸め、大きすぎ・小さすぎる数は指数表記）"""
+    if isinstance(value, Fraction):
+        if value.denominator == 1:
+            return format_int(value.numerator, digits)
+        # 分数で収まるならそのまま、長すぎれば小数で近似する（長い分数は str() にしない）
+        if value.numerator.bit_length() + value.denominator.bit_length() <= 4 * digits:
+            text = str(value)
+            if len(text) <= digits + 1:
+                return text
+        value = _to_decimal(value)
+    elif isinstance(value, float):
+        if value.is_integer() and abs(value) < 10 ** digits:
+            return str(int(value))
+        return f"{value:.{digits}g}"
+
+    if not value.is_finite():
+        raise InvalidOperation(f"計算結果が数ではありません: {value}")
+    rounded = Context(prec=digits, Emax=MAX_EMAX, Emin=MIN_EMIN).plus(value).normalize()
+    if rounded.is_zero():
+        return "0"
+    if -7 <= rounded.adjusted() < digits:
+        return format(rounded, "f")
+    return format(rounded, "E")
+
+
+# 末尾の数（'12+3.5' の '3.5'）
+LAST_NUMBER_RE = re.compile(r"(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+)$")
+
+
+def split_last_number(text):
+    """式を (前の部分, 末尾の数) に分ける（末尾が数でなければ数は ''）"""
+    m = LAST_NUMBER_RE.search(text)
+    if m is None:
+        return text, ""
+    return text[:m.start()], m.group()
@@ -0,0 +1,141 @@
+"""電卓の計算履歴（追記だけの SQLite）
+
+    python history.py export history.csv      # 全件を CSV に書き出す（少しずつ読むので何百万件でもメモリを使わない）
+    python history.py stats                   # 件数とファイルの大きさ
+    python history.py fill 1000000            # 動作確認用に履歴を増やす
+
+id は追記した順の連番で、消したり書き換えたりしない。そのため件数は max(id) で、
+n 件目からのページは id の範囲で、どちらも索引をたどるだけで読める。
+"""
+import csv
+import operator
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+HISTORY_DB = "calc_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,      -- 追記順の連番
+    created_at TEXT NOT NULL,    -- 'YYYY-MM-DDTHH:MM:SS'
+    mode TEXT NOT NULL,          -- 'decimal' / 'fraction' / 'float'
+    expression TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+"""
+APPEND_SQL = "INSERT INTO history (created_at, mode, expression, result) VALUES (?, ?, ?, ?)"
+COUNT_SQL = "SELECT COALESCE(MAX(id), 0) FROM history"
+# id の大きい(新しい)方から、first_id 以下を limit 件
+PAGE_SQL = "SELECT id, expression, result FROM history WHERE id <= ? ORDER BY id DESC LIMIT ?"
+EXPORT_SQL = "SELECT id, created_at, mode, expression, result FROM history ORDER BY id"
+EXPORT_COLUMNS = ["id", "created_at", "mode", "expression", "result"]
+# 書き出しで1回に読む行数
+EXPORT_CHUNK = 5000
+
+
+class HistoryStore:
+    """計算履歴の保存と読み出し（接続は1本を使い回し、裏のスレッドからの追記とはロックで順番にする）"""
+
+    def __init__(self, db_name=HISTORY_DB):
+        self.db_name = db_name
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        # 追記のたびに fsync しない（電源断では直前の数件を失うことがある）
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def append(self, mode, expression, result):
+        """1件追記して id を返す"""
+        created_at = datetime.now().isoformat(timespec="seconds")
+        with self.lock, self.conn:
+            return self.conn.execute(APPEND_SQL, (created_at, mode, expression, result)).lastrowid
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute(COUNT_SQL).fetchone()[0]
+
+    def page(self, first_id, limit):
+        """first_id から古い方へ limit 件の (id, 式, 結果)"""
+        with self.lock:
+            return self.conn.execute(PAGE_SQL, (first_id, limit)).fetchall()
+
+    def export_csv(self, f):
+        """全件を CSV で f に書き出し、件数を返す
+
+        別の接続で読むので、書き出している間も追記は止まらない（WAL のため読み始めた時点までの内容になる）。
+        """
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        count = 0
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.execute(EXPORT_SQL)
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                count += len(rows)
+        finally:
+            conn.close()
+        return count
+
+    def close(self):
+        self.conn.close()
+
+
+FILL_OPERATORS = {"+": operator.add, "-": operator.sub, "*": operator.mul}
+
+
+def fill(store, count, seed=0):
+    """動作確認用に、それらしい式と結果を count 件まとめて追記する"""
+    rng = random.Random(seed)
+    created_at = datetime.now().isoformat(timespec="seconds")
+    batch = []
+    with store.conn:
+        for _ in range(count):
+            a, b = rng.randint(1, 9999), rng.randint(1, 999)
+            op = rng.choice("+-*")
+            batch.append((created_at, "decimal", f"{a}{op}{b}", str(FILL_OPERATORS[op](a, b))))
+            if len(batch) == EXPORT_CHUNK:
+                store.conn.executemany(APPEND_SQL, batch)
+                batch.clear()
+        store.conn.executemany(APPEND_SQL, batch)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("export", "stats", "fill"):
+        print(__doc__)
+        return 1
+    command = sys.argv[1]
+    db_name = os.environ.get("CALC_HISTORY_DB", HISTORY_DB)
+
+    start = time.perf_counter()
+    store = HistoryStore(db_name)
+    if command == "export":
+        out = sys.argv[2] if len(sys.argv) > 2 else "-"
+        if out == "-":
+            count = store.export_csv(sys.stdout)
+        else:
+            with open(out, "w", encoding="utf-8", newline="") as f:
+                count = store.export_csv(f)
+        print(f"{count}件を書き出しました ({time.perf_counter() - start:.2f}秒)", file=sys.stderr)
+    elif command == "stats":
+        size = os.path.getsize(db_name)
+        print(f"{db_name}: {store.count()}件 {size / 1024 / 1024:.1f} MB")
+    else:
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        fill(store, count)
+        print(f"{count}件を追加しました ({time.perf_counter() - start:.2f}秒) 合計 {store.count()}件")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
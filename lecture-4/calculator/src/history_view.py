@@ -0,0 +1,81 @@
+import math
+
+import flet as ft
+
+# 履歴1行の高さ
+ROW_HEIGHT = 28
+# 画面外の上下に余分に用意しておく行の数（スクロール時のちらつき防止）
+OVERSCAN = 3
+
+
+class HistoryRow(ft.Container):
+    """履歴1件分の行。作り直さずに中身だけ差し替えて使い回す"""
+
+    def __init__(self, on_select):
+        super().__init__()
+        self.height = ROW_HEIGHT
+        self.padding = ft.padding.symmetric(horizontal=8)
+        self.on_click = lambda e: on_select(self.expression) if self.expression else None
+        self.expression = None
+        self.values = None  # 表示中の (式, 結果)
+        self.expression_text = ft.Text("", size=12, color=ft.Colors.WHITE70, no_wrap=True, expand=True)
+        self.result_text = ft.Text("", size=14, color=ft.Colors.WHITE, no_wrap=True)
+        self.content = ft.Row(controls=[self.expression_text, self.result_text], spacing=8)
+
+    def set_data(self, expression, result):
+        # 同じ式でもモードが違えば結果が違うので、式と結果の組で比べる
+        if (expression, result) == self.values:
+            return
+        self.values = (expression, result)
+        self.expression = expression
+        self.expression_text.value = expression
+        self.result_text.value = "= " + result
+
+
+class HistoryPanel(ft.Column):
+    """計算履歴の仮想化リスト（新しい順）
+
+    画面に見えている範囲の行だけを用意し、スクロールに合わせて HistoryStore から
+    その範囲だけを読み込む。上下の空白で全体の高さを保つので、何百万件でも起動は速い。
+    """
+
+    def __init__(self, store, on_select, height=200):
+        super().__init__()
+        self.store = store
+        self.height = height
+        self.spacing = 0
+        self.scroll = ft.ScrollMode.AUTO
+        self.on_scroll = self.handle_scroll
+        self.on_scroll_interval = 30
+
+        self.count = 0  # 履歴の件数（= 最新の id）
+        self.first = 0  # 先頭に表示している行の番号（0 が最新）
+        self.visible_count = math.ceil(height / ROW_HEIGHT) + 2 * OVERSCAN
+        self.pool = [HistoryRow(on_select) for _ in range(self.visible_count)]
+        self.top_spacer = ft.Container(height=0)
+        self.bottom_spacer = ft.Container(height=0)
+        self.refresh()
+
+    def refresh(self):
+        """件数を読み直して表示する（追記のあとに呼ぶ）"""
+        self.count = self.store.count()
+        self.render()
+
+    def render(self):
+        count = min(len(self.pool), self.count)
+        first = self.first = max(0, min(self.first, self.count - count))
+        # 新しい順の first 番目は id = count - first
+        rows = self.store.page(self.count - first, count) if count else []
+        for row, (_, expression, result) in zip(self.pool, rows):
+            row.set_data(expression, result)
+        shown = len(rows)
+        self.top_spacer.height = first * ROW_HEIGHT
+        self.bottom_spacer.height = (self.count - first - shown) * ROW_HEIGHT
+        self.controls = [self.top_spacer, *self.pool[:shown], self.bottom_spacer]
+
+    def handle_scroll(self, e):
+        first = max(0, int(e.pixels // ROW_HEIGHT) - OVERSCAN)
+        if first != self.first:
+            self.first = first
+            self.render()
+            self.update()
@@ -1,6 +1,13 @@
 import flet as ft
-#logはモジュールを使わなければ計算できないため、mathモジュールをインポートする
-import math
+#計算の状態とキーごとの処理は calc_core.py にあり、ここでは表示だけを行う
+from calc_core import CalcCore
+#階乗は大きな数になるので、桁の多い計算は裏のスレッドで行う
+from bigmath import BackgroundCalc
+#計算の履歴は calc_history.db に追記し、見えている分だけ読み込んで表示する
+from history import HistoryStore
+from history_view import HistoryPanel
+
+MODE_LABELS = {"decimal": "DEC", "fraction": "FRAC"}
 #クラスを継承することでボタンごとの色設定ができるようになる
 
 
@@ -35,16 +42,25 @@ class ExtraActionButton(CalcButton):
 class CalculatorApp(ft.Container):
     def __init__(self):
         super().__init__()
-        self.reset()
+        self.history = HistoryStore()
+        self.core = CalcCore(background=BackgroundCalc(), on_update=self.show_display, history=self.history)
 
         self.result = ft.Text(value="0", color=ft.Colors.WHITE, size=20)
+        self.mode_button = ft.TextButton(text=MODE_LABELS[self.core.mode], on_click=self.toggle_mode)
+        #履歴の行を押すと、その式をもう一度計算して表示する
+        self.history_panel = HistoryPanel(self.history, on_select=self.recall, height=150)
+        self.history_panel.visible = False
+        self.history_button = ft.IconButton(
+            icon=ft.Icons.HISTORY, icon_color=ft.Colors.WHITE, tooltip="履歴", on_click=self.toggle_history
+        )
         self.width = 350
         self.bgcolor = ft.Colors.BLACK
         self.border_radius = ft.border_radius.all(20)
         self.padding = 20
         self.content = ft.Column(
             controls=[
-                ft.Row(controls=[self.result], alignment="end"),
+                self.history_panel,
+                ft.Row(controls=[self.mode_button, self.history_button, ft.Container(expand=True), self.result]),
                 ft.Row(
                     controls=[
                         ActionButton(text="x!", button_clicked=self.button_clicked),
@@ -96,125 +112,34 @@ class CalculatorApp(ft.Container):
     def button_clicked(self, e):
         data = e.control.data
         print(f"Butron clicked with data = {data}")
-        if self.result.value == "Error" or data == "AC":
-                self.result.value = "0"
-                #self.reset()をすることで計算状態をリセットし、新しい計算を始められるようにする
-                self.reset()
-
-        elif data in ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "."):
-                if self.result.value == "0" or self.new_operand == True:
-                    self.result.value = data
-                    self.new_operand = False
-                else:
-                    self.result.value = self.result.value + data
-
-        elif data in ("+", "-", "*", "/"):
-                self.result.value = self.calculate(
-                    self.operand1, float(self.result.value), self.operator
-                )
-                self.operator = data
-                if self.result.value == "Error":
-                    self.operand1 = "0"
-                else:
-                    self.operand1 = float(self.result.value)
-                self.new_operand = True
-
-        elif data in ("="):
-                self.result.value = self.calculate(
-                    self.operand1, float(self.result.value), self.operator
-                )
-                self.reset()
-
-        elif data in ("%"):
-                self.result.value = float(self.result.value) / 100
-                self.reset()
-
-        elif data in ("+/-"):
-                if float(self.result.value) > 0:
-                    #strを使って文字列にするのは、マイナス記号がついても表示できるようにするため
-                    self.result.value = "-" + str(self.result.value)
-
-                elif float(self.result.value) < 0:
-                    self.result.value = str(
-                        self.format_number(abs(float(self.result.value)))
-                    )
-        
-        elif data in ("x!"):
-                try:
-                    n = int(float(self.result.value))
-                    fact = 1
-                    for i in range(1, n + 1):
-                        fact *= i
-                    self.result.value = str(fact)
-                except:
-                    self.result.value = "Error"
-                self.reset()
-        elif data in ("x²"):
-                try:
-                    n = float(self.result.value)
-                    self.result.value = str(self.format_number(n*n))
-                except:
-                    self.result.value = "Error"
-                self.reset()
-        elif data in ("√"):
-                try:
-                    n= float(self.result.value)
-                    if n<0:
-                         self.result.value ="Error"
-                    else:
-                        self.result.value = str(self.format_number(n**0.5))
-                except:
-                    self.result.value = "Error"
-                self.reset()
-        elif data in ("10ˣ"):
-                try:
-                     n = float(self.result.value)
-                     self.result.value = str(self.format_number(10**n))
-                except:
-                    self.result.value = "Error"
-                self.reset()
-        elif data in ("log"):
-                    n = float(self.result.value)
-                    if n <= 0:
-                        self.result.value = "Error"
-                         
-                    else:
-                        self.result.value = str(self.format_number(math.log10(n)))
-                    self.reset()
-
+        self.core.press(data)
+        self.show_display()
+
+    def show_display(self):
+        #裏で計算した結果もここから表示する
+        self.result.value = self.core.display
+        if self.history_panel.visible:
+            self.history_panel.refresh()
         self.update()
 
-    def format_number(self, num):
-        if num % 1 == 0:
-            return int(num)
-        else:
-            return num
-
-    def calculate(self, operand1, operand2, operator):
-
-        if operator == "+":
-            return self.format_number(operand1 + operand2)
+    def toggle_history(self, e):
+        self.history_panel.visible = not self.history_panel.visible
+        self.show_display()
 
-        elif operator == "-":
-            return self.format_number(operand1 - operand2)
+    def recall(self, expression):
+        self.core.recall(expression)
+        self.show_display()
 
-        elif operator == "*":
-            return self.format_number(operand1 * operand2)
-
-        elif operator == "/":
-            if operand2 == 0:
-                return "Error"
-            else:
-                return self.format_number(operand1 / operand2)
-        
-
-    def reset(self):
-        self.operator = "+"
-        self.operand1 = 0
-        self.new_operand = True
+    def toggle_mode(self, e):
+        #小数(DEC)と分数(FRAC)の表示を切り替え、表示中の結果も計算し直す
+        self.core.toggle_mode()
+        self.mode_button.text = MODE_LABELS[self.core.mode]
+        self.show_display()
 
 def main(page: ft.Page):
     page.title = "Simple Calculator"
     calc = CalculatorApp()
     page.add(calc)
-ft.app(main)
\ No newline at end of file
+
+if __name__ == "__main__":
+    ft.app(main)
@@ -0,0 +1,139 @@
+"""共有カウンター(counter_service.py)の負荷テスト
+
+    python bench_counter.py                           # 300ページが20回ずつ同時に押す（保存しない）
+    python bench_counter.py --db bench_counter.db     # SQLite に保存しながら
+    python bench_counter.py --interval 0              # まとめずに、押すたびに保存・通知する
+
+Flet と同じように PubSubHub をイベントループとスレッドプールで動かし、ページの代わりに
+pubsub の受け手をページ数だけ登録する。押した時刻から各ページに新しい値が届くまでの時間と、
+保存・通知の回数を測る。
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flet.core.pubsub.pubsub_hub import PubSubHub
+
+from counter_service import FLUSH_INTERVAL, CounterService, MemoryCounterStore, SqliteCounterStore
+
+TOPIC = "counter"
+
+
+class Session:
+    """1ページ分の受け手（最後に受け取った値と、届くまでの時間を覚えておく）"""
+
+    def __init__(self, session_id, hub, results):
+        self.session_id = session_id
+        self.results = results
+        self.last_value = None
+        self.last_changed_at = None
+        self.lock = threading.Lock()
+        hub.subscribe_topic(session_id, TOPIC, self.on_counter)
+
+    def on_counter(self, topic, message):
+        received = time.perf_counter()
+        value, changed_at = message
+        self.results.record(changed_at, received)
+        # main.py と同じく、後から届いた古い通知では値を戻さない
+        with self.lock:
+            if self.last_changed_at is None or changed_at > self.last_changed_at:
+                self.last_changed_at = changed_at
+                self.last_value = value
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.spread = {}  # 通知ごと(最初の変更の時刻) -> [最初に届いた時刻, 最後に届いた時刻]
+
+    def record(self, changed_at, received):
+        with self.lock:
+            self.latencies.append(received - changed_at)
+            first_last = self.spread.setdefault(changed_at, [received, received])
+            first_last[0] = min(first_last[0], received)
+            first_last[1] = max(first_last[1], received)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共有カウンターを多数のページから同時に押す")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--clicks", type=int, default=20, help="1ページあたりの押す回数")
+    parser.add_argument("--interval", type=float, default=FLUSH_INTERVAL, help="まとめて通知するまでの秒数")
+    parser.add_argument("--db", help="保存する SQLite のファイル（なければ保存しない）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Flet のアプリと同じく、pubsub はイベントループからスレッドプールで受け手を呼ぶ
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4))
+    hub = PubSubHub(loop, executor)
+
+    store = SqliteCounterStore(args.db) if args.db else MemoryCounterStore()
+    service = CounterService(store, interval=args.interval)
+    service.subscribe(lambda value, changed_at: hub.send_all_on_topic(TOPIC, (value, changed_at)))
+    initial = service.value
+
+    results = Results()
+    sessions = [Session(f"session-{i}", hub, results) for i in range(args.sessions)]
+    total = args.sessions * args.clicks
+    barrier = threading.Barrier(args.sessions + 1)
+
+    def click(seed):
+        # 人が連打するくらいの間隔（0〜5ミリ秒）で押す
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(args.clicks):
+            service.add(1)
+            time.sleep(rng.random() * 0.005)
+
+    threads = [threading.Thread(target=click, args=(args.seed + i,)) for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    clicked = time.perf_counter() - start
+
+    # 最後の通知が全部のページに届くまで待つ
+    service.flush()
+    expected = initial + total
+    deadline = time.monotonic() + 10
+    while any(s.last_value != expected for s in sessions) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    executor.shutdown(wait=True)
+    loop.call_soon_threadsafe(loop.stop)
+    service.close()
+
+    stale = sum(1 for s in sessions if s.last_value != expected)
+    latencies = [t * 1000 for t in results.latencies]
+    spreads = [(last - first) * 1000 for first, last in results.spread.values()]
+    print(f"{args.sessions}ページ × {args.clicks}回 = {total}回  押し終わるまで {clicked:.2f}秒 "
+          f"({total / clicked:.0f} 回/秒)  全ページに届くまで {elapsed:.2f}秒")
+    print(f"最後の値 {service.value}（期待 {expected}）  古い値のままのページ {stale}")
+    print(f"保存・通知 {service.flushes}回（{total / max(service.flushes, 1):.1f}回分ずつ）  "
+          f"ページへの送信 {len(latencies)}回")
+    if latencies:
+        print(f"押してから届くまで[ms]  p50 {statistics.median(latencies):.1f}  "
+              f"p99 {percentile(latencies, 0.99):.1f}  最大 {max(latencies):.1f}")
+        print(f"1回の通知が全ページに行き渡るまで[ms]  p50 {statistics.median(spreads):.1f}  "
+              f"最大 {max(spreads):.1f}")
+    return 0 if service.value == expected and not stale else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""全部のページで共有するカウンター
+
+    service = CounterService(SqliteCounterStore("counter.db"))
+    service.subscribe(lambda value, changed_at: print(value))
+    service.add(1)
+
+増減はロックの中で数えるだけで、保存と通知は interval 秒ごとにまとめて1回行う。
+連打されても、書き込みと各ページへの送信は interval 秒に1回で済む。
+SQLite に保存すると再起動しても続きから数え、別のプロセスが同じファイルに足した分も
+次の保存のときに取り込む（足し算は SQL の中で行うので、同時に足しても数え漏れはない）。
+"""
+import sqlite3
+import threading
+import time
+
+COUNTER_DB = "counter.db"
+# 変更をまとめて保存・通知するまでの秒数
+FLUSH_INTERVAL = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+ADD_SQL = """
+INSERT INTO counters (name, value) VALUES (?, ?)
+ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+"""
+LOAD_SQL = "SELECT value FROM counters WHERE name = ?"
+
+
+class MemoryCounterStore:
+    """保存しない（プロセスを止めると 0 に戻る）"""
+
+    def __init__(self):
+        self.values = {}
+
+    def load(self, name):
+        return self.values.get(name, 0)
+
+    def add(self, name, delta):
+        self.values[name] = self.values.get(name, 0) + delta
+        return self.values[name]
+
+    def close(self):
+        pass
+
+
+class SqliteCounterStore:
+    """SQLite に保存する（足し算と読み直しを1つのトランザクションで行う）"""
+
+    def __init__(self, db_name=COUNTER_DB):
+        self.conn = sqlite3.connect(db_name, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def load(self, name):
+        row = self.conn.execute(LOAD_SQL, (name,)).fetchone()
+        return row[0] if row else 0
+
+    def add(self, name, delta):
+        """delta を足して、足したあとの値（ほかのプロセスの分も含む）を返す"""
+        with self.conn:
+            self.conn.execute(ADD_SQL, (name, delta))
+            return self.conn.execute(LOAD_SQL, (name,)).fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class CounterService:
+    """カウンターの値と、値が変わったときの通知先
+
+    subscribe した関数は、まとめて保存したあとに (値, 最初の変更の時刻) で呼ばれる。
+    時刻は time.perf_counter() の値で、押してから届くまでの時間を測るのに使う。
+    """
+
+    def __init__(self, store=None, name="counter", interval=FLUSH_INTERVAL):
+        self.store = store if store is not None else MemoryCounterStore()
+        self.name = name
+        self.interval = interval
+        self.lock = threading.Lock()        # value と pending を守る
+        self.flush_lock = threading.Lock()  # 保存と通知を1つずつ順に行う
+        self.listeners = []
+        self.value = self.store.load(name)
+        self.pending = 0         # まだ保存していない増減
+        self.changed_at = None   # まだ通知していない最初の変更の時刻
+        self.flushes = 0         # 保存・通知した回数
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def add(self, delta=1):
+        """delta を足して、このプロセスから見た値を返す（保存と通知は少しあとにまとめて行う）"""
+        with self.lock:
+            self.value += delta
+            self.pending += delta
+            if self.changed_at is None:
+                self.changed_at = time.perf_counter()
+                timer = threading.Timer(self.interval, self.flush)
+                timer.daemon = True
+                timer.start()
+            return self.value
+
+    def flush(self):
+        """たまっている増減を保存して、通知先に新しい値を送る"""
+        with self.flush_lock:
+            with self.lock:
+                delta, self.pending = self.pending, 0
+                changed_at, self.changed_at = self.changed_at, None
+            if changed_at is None:
+                return
+            saved = self.store.add(self.name, delta)
+            with self.lock:
+                # 保存している間に押された分は、次の flush で送る
+                value = self.value = saved + self.pending
+            self.flushes += 1
+            for listener in list(self.listeners):
+                listener(value, changed_at)
+
+    def close(self):
+        self.flush()
+        self.store.close()
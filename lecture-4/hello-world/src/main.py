@@ -1,21 +1,56 @@
+import os
+import threading
+
 import flet as ft
+#カウンターの値は counter_service.py で全部のページ(ブラウザのタブ)と共有し、counter.db に保存する
+from counter_service import COUNTER_DB, CounterService, MemoryCounterStore, SqliteCounterStore
+
+#COUNTER_DB= (空) で起動すると保存しない
+db_name = os.environ.get("COUNTER_DB", COUNTER_DB)
+service = CounterService(SqliteCounterStore(db_name) if db_name else MemoryCounterStore())
+#新しい値を全部のページに知らせるときの pubsub の話題
+TOPIC = "counter"
+connect_lock = threading.Lock()
+
+
+def connect_pubsub(pubsub):
+    #service の通知を Flet の pubsub に流す（pubsub はアプリ全体で1つなので、最初のページのものを使えばよい）
+    with connect_lock:
+        if not service.listeners:
+            service.subscribe(lambda value, changed_at: pubsub.send_all_on_topic(TOPIC, (value, changed_at)))
 
 
 def main(page: ft.Page):
 
     #カウンター表示のテキスト
-    counter = ft.Text("0", size=50, data=0)
+    counter = ft.Text(str(service.value), size=50)
+
+    #どのページでボタンが押されても、まとめて保存したあとにここで新しい値を受け取る
+    #受け取りは別々のスレッドで行われ、続けて送られた通知の順番が入れ替わることがあるので、
+    #最後に表示した通知より古いもの(changed_at が小さいもの)は表示しない
+    last_changed_at = None
+    shown_lock = threading.Lock()
+
+    def on_counter(topic, message):
+        nonlocal last_changed_at
+        value, changed_at = message
+        with shown_lock:
+            if last_changed_at is not None and changed_at <= last_changed_at:
+                return
+            last_changed_at = changed_at
+            counter.value = str(value)
+            counter.update()
+
+    page.pubsub.subscribe_topic(TOPIC, on_counter)
+    connect_pubsub(page.pubsub)
 
     #ボタンが押された時に呼び出される関数
+    #連打されても、保存と各ページへの送信は少しあとにまとめて1回だけ行う
     def increment_click(e):
-        counter.data += 1
-        counter.value = str(counter.data)
-        counter.update()
+        service.add(1)
 
     def decrement_click(e):
-        counter.data -= 1
-        counter.value = str(counter.data)
-        counter.update()
+        service.add(-1)
 
     #カウンターを増やすボタン
     page.floating_action_button = ft.FloatingActionButton(
@@ -40,4 +75,5 @@ def main(page: ft.Page):
     )
 
 
-ft.app(main)
+if __name__ == "__main__":
+    ft.app(main)
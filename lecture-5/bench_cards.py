@@ -0,0 +1,79 @@
+"""カードを毎回作り直す方式と、ForecastStrip（使い回し＋仮想化）の比較ベンチマーク
+
+    python bench_cards.py
+"""
+import time
+import tracemalloc
+
+import flet as ft
+
+from cards import ICON_URL, ForecastStrip
+
+SIZES = [7, 168, 1000]  # 1週間・1週間の1時間ごと・長期の履歴
+SELECTIONS = 20  # 地域を選び直す回数
+
+
+def create_daily_card(date_text, weather_code, pop, t_min, t_max):
+    """以前の create_daily_card と同じ、毎回コントロールを組み立てる方式"""
+    return ft.Container(
+        width=100,
+        padding=10,
+        bgcolor=ft.Colors.WHITE,
+        border_radius=10,
+        shadow=ft.BoxShadow(spread_radius=1, blur_radius=5, color=ft.Colors.BLUE_GREY_100),
+        content=ft.Column(
+            controls=[
+                ft.Text(date_text, weight=ft.FontWeight.BOLD, size=14, text_align=ft.TextAlign.CENTER),
+                ft.Divider(height=5),
+                ft.Image(src=ICON_URL.format(weather_code), width=50, height=50, fit=ft.ImageFit.CONTAIN),
+                ft.Text(f"降水 {pop}", size=12, color=ft.Colors.BLUE),
+                ft.Divider(height=5),
+                ft.Row(
+                    controls=[
+                        ft.Text(f"{t_max}℃", color=ft.Colors.RED, size=12),
+                        ft.Text("/", size=12),
+                        ft.Text(f"{t_min}℃", color=ft.Colors.BLUE, size=12),
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER
+                )
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        )
+    )
+
+
+def make_items(n, seed):
+    return [(f"{i // 24 + 1}日 {i % 24}時", 100 + (i + seed) % 4 * 100, f"{(i * 10 + seed) % 100}%",
+             str(i % 10), str(i % 10 + 8)) for i in range(n)]
+
+
+def rebuild(row, items):
+    row.controls.clear()
+    for item in items:
+        row.controls.append(create_daily_card(*item))
+
+
+def recycle(strip, items):
+    strip.set_items(items)
+
+
+def run(name, target, func, n):
+    datasets = [make_items(n, seed) for seed in range(SELECTIONS)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    for items in datasets:
+        func(target, items)
+    elapsed = (time.perf_counter() - start) / SELECTIONS * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{n:>5}枚 {name:<10} {elapsed:9.3f} ms/選択  ピークメモリ {peak / 1024:9.1f} KB  表示中のカード {len(target.controls)}")
+
+
+def main():
+    for n in SIZES:
+        run("作り直し", ft.Row(), rebuild, n)
+        run("使い回し", ForecastStrip(), recycle, n)
+
+
+if __name__ == "__main__":
+    main()
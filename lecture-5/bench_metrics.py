@@ -0,0 +1,69 @@
+"""計測(metrics.py)そのものにかかる時間を測る
+
+    python bench_metrics.py              # 計測しないとき・するときの span と count の1回あたりの時間
+    python bench_metrics.py --export     # 続けて JSON Lines と Prometheus 形式の出力例を表示する
+"""
+import argparse
+import io
+import sys
+import time
+
+from metrics import Metrics
+
+
+def per_call_ns(func, n):
+    start = time.perf_counter()
+    func(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="計測のオーバーヘッドを測る")
+    parser.add_argument("-n", type=int, default=1_000_000)
+    parser.add_argument("--export", action="store_true", help="書き出しの例を表示する")
+    args = parser.parse_args()
+
+    def bare(n):
+        for _ in range(n):
+            pass
+
+    def make_span_loop(metrics):
+        def loop(n):
+            span = metrics.span
+            for _ in range(n):
+                with span("card_build"):
+                    pass
+        return loop
+
+    def make_count_loop(metrics):
+        def loop(n):
+            count = metrics.count
+            for _ in range(n):
+                count("cache_hits")
+        return loop
+
+    base = per_call_ns(bare, args.n)
+    print(f"空のループ                 {base:7.1f} ns/回")
+    for label, metrics in (("計測しない", Metrics(enabled=False)), ("計測する", Metrics(enabled=True))):
+        span_ns = per_call_ns(make_span_loop(metrics), args.n) - base
+        count_ns = per_call_ns(make_count_loop(metrics), args.n) - base
+        print(f"{label:<8} span {span_ns:7.1f} ns/回   count {count_ns:7.1f} ns/回")
+
+    if args.export:
+        log = io.StringIO()
+        metrics = Metrics(enabled=True)
+        metrics.log = log
+        for ms in (0.4, 3, 12, 80):
+            metrics.observe("network", ms / 1000)
+        metrics.count("cache_hits", 3)
+        metrics.count("bytes_downloaded", 52_431)
+        metrics.error("更新エラー", ConnectionError("タイムアウト"), "130000")
+        print("\n--- JSON Lines ---")
+        print(log.getvalue(), end="")
+        print("--- Prometheus ---")
+        print(metrics.prometheus_text(), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""予報JSONの解析を、1要素ずつのループと ForecastTable(列ごとの array) で比べるベンチマーク
+
+    python bench_parse.py --repeat 200
+
+全国分の予報JSON(lecture-6/fixtures)を repeat 回解析する時間と、結果の大きさを表示する。
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from forecast_parse import ForecastTable, to_int
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-6", "fixtures", "forecast")
+WEEKDAYS = ["月", "火", "水", "木", "金", "土", "日"]
+
+
+def load_payloads():
+    payloads = []
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+            payloads.append((name[:-5], json.load(f)))
+    return payloads
+
+
+def loop_ui(area_code, data):
+    """これまでの WeatherApp.fetch_and_display_weather の解析ループ（areas[0] のみ）"""
+    weekly_data = data[1] if len(data) > 1 else data[0]
+    time_series_weather = weekly_data["timeSeries"][0]
+    dates = time_series_weather["timeDefines"]
+    area_weather = time_series_weather["areas"][0]
+    weather_codes = area_weather["weatherCodes"]
+    pops = area_weather.get("pops", [])
+    temps_min = []
+    temps_max = []
+    if len(weekly_data["timeSeries"]) > 1:
+        area_temp = weekly_data["timeSeries"][1]["areas"][0]
+        temps_min = area_temp.get("tempsMin", [])
+        temps_max = area_temp.get("tempsMax", [])
+
+    items = []
+    for i in range(len(weather_codes)):
+        dt = datetime.fromisoformat(dates[i])
+        date_str = f"{dt.month}/{dt.day} ({WEEKDAYS[dt.weekday()]})"
+        code = weather_codes[i]
+        pop = pops[i] + "%" if i < len(pops) and pops[i] else "-"
+        t_min = temps_min[i] if i < len(temps_min) and temps_min[i] else "-"
+        t_max = temps_max[i] if i < len(temps_max) and temps_max[i] else "-"
+        items.append((date_str, code, pop, t_min, t_max))
+    return items
+
+
+def loop_ingest(area_code, data):
+    """これまでの parse_weekly + normalize（1日ごとに辞書を作ってから整数に直す）"""
+    weekly_data = data[1] if len(data) > 1 else data[0]
+    time_series = weekly_data["timeSeries"]
+    dates = time_series[0]["timeDefines"]
+    area_weather = time_series[0]["areas"][0]
+    weather_codes = area_weather["weatherCodes"]
+    pops = area_weather.get("pops", [])
+    temps_min = []
+    temps_max = []
+    if len(time_series) > 1:
+        area_temp = time_series[1]["areas"][0]
+        temps_min = area_temp.get("tempsMin", [])
+        temps_max = area_temp.get("tempsMax", [])
+    issued_at = weekly_data.get("reportDatetime", "")
+
+    rows = []
+    for i, date in enumerate(dates[:len(weather_codes)]):
+        r = {
+            "area_code": area_code,
+            "issued_at": issued_at,
+            "date": date,
+            "weather_code": weather_codes[i],
+            "pop": pops[i] if i < len(pops) else None,
+            "temp_min": temps_min[i] if i < len(temps_min) else None,
+            "temp_max": temps_max[i] if i < len(temps_max) else None,
+        }
+        rows.append((r["area_code"], r["date"][:10], int(r["weather_code"]), to_int(r["temp_max"]),
+                     to_int(r["temp_min"]), to_int(r["pop"]), r["issued_at"]))
+    return rows
+
+
+def run(name, func, repeat):
+    """repeat 回実行し、全国分1回あたりの中央値と最小値を表示する"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    print(f"{name:<28} 中央値 {statistics.median(times):7.3f} ms  最小 {min(times):7.3f} ms")
+    return result
+
+
+def allocated(func):
+    """func の結果が使っているメモリ(バイト)"""
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予報JSONの解析方法を比べる")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = load_payloads()
+    print(f"{len(payloads)}地域 x {args.repeat}回")
+
+    run("ループ (UI)", lambda: [loop_ui(c, d) for c, d in payloads], args.repeat)
+    ingest_rows = run("ループ (取り込み)", lambda: [row for c, d in payloads for row in loop_ingest(c, d)], args.repeat)
+    table = run("ForecastTable 作成", lambda: ForecastTable.from_payloads(payloads), args.repeat)
+    run("ForecastTable 作成+行の取り出し", lambda: list(ForecastTable.from_payloads(payloads).rows()), args.repeat)
+
+    # 取り込み用の行が、これまでの解析と同じになっているか確かめる
+    rows = [(code, date, w, hi, lo, pop, issued) for code, _, date, w, hi, lo, pop, issued in table.rows()]
+    if rows != ingest_rows:
+        print("NG: ForecastTable の結果がループの結果と一致しない")
+        return 1
+
+    loop_size = allocated(lambda: [row for c, d in payloads for row in loop_ingest(c, d)])
+    table_size = allocated(lambda: ForecastTable.from_payloads(payloads))
+    print(f"{len(table)}行  メモリ: ループ(タプルのリスト) {loop_size} バイト / ForecastTable {table_size} バイト")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from metrics import metrics
+
+# 気象庁の予報は毎日 5時・11時・17時(日本時間)に発表される
+JST = timezone(timedelta(hours=9))
+PUBLISH_HOURS = (5, 11, 17)
+# 発表直後はまだ反映されていないことがあるので少し余裕を持たせる
+PUBLISH_MARGIN = timedelta(minutes=10)
+
+# 取得先のサーバー（環境変数 JMA_BASE_URL でローカルのスタブ jma_stub.py に向けられる）
+JMA_BASE = os.environ.get("JMA_BASE_URL", "https://www.jma.go.jp").rstrip("/")
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "forecast_cache")
+# stats の項目 -> 計測(metrics.py)でのカウンター名
+METRIC_NAMES = {
+    "hits": "cache_hits",
+    "misses": "cache_misses",
+    "revalidations": "cache_revalidations",
+    "bytes_downloaded": "bytes_downloaded",
+    "bytes_saved": "bytes_saved",
+}
+
+
+def seconds_until_next_publish(now=None):
+    """次の予報発表時刻(+余裕)までの秒数を返す"""
+    now = now or datetime.now(JST)
+    for hour in PUBLISH_HOURS:
+        publish = now.replace(hour=hour, minute=0, second=0, microsecond=0) + PUBLISH_MARGIN
+        if publish > now:
+            return (publish - now).total_seconds()
+    tomorrow = now + timedelta(days=1)
+    publish = tomorrow.replace(hour=PUBLISH_HOURS[0], minute=0, second=0, microsecond=0) + PUBLISH_MARGIN
+    return (publish - now).total_seconds()
+
+
+class ForecastCache:
+    """メモリ(LRU+TTL)とディスクの2段キャッシュ。期限切れは条件付きGETで再検証する"""
+
+    def __init__(self, session=None, cache_dir=CACHE_DIR, max_entries=128):
+        self.session = session or requests.Session()
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory = OrderedDict()  # URL -> エントリ(dict)
+        self.lock = threading.Lock()
+        self.stats = {
+            "hits": 0,  # 期限内でネットワークに出なかった回数
+            "misses": 0,  # 本体をダウンロードした回数
+            "revalidations": 0,  # 304 Not Modified で済んだ回数
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,  # 304 やヒットで転送せずに済んだバイト数
+        }
+
+    # --- メモリ(LRU) ---
+    def _remember(self, url, entry):
+        with self.lock:
+            self.memory[url] = entry
+            self.memory.move_to_end(url)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _lookup(self, url):
+        with self.lock:
+            entry = self.memory.get(url)
+            if entry is not None:
+                self.memory.move_to_end(url)
+                return entry
+        # メモリになければディスクから読み込む
+        entry = self._load(url)
+        if entry is not None:
+            self._remember(url, entry)
+        return entry
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+        metrics.count(METRIC_NAMES[key], amount)
+
+    # --- ディスク ---
+    def _path(self, url):
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, name + ".json")
+
+    def _load(self, url):
+        if not self.cache_dir:
+            return None
+        try:
+            with metrics.span("disk_read"), open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, url, entry):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(url)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            # 書き込み途中のファイルを読まれないように置き換える
+            os.replace(tmp, path)
+        except OSError as e:
+            metrics.error("キャッシュ保存エラー", e)
+
+    # --- 公開API ---
+    def peek(self, url):
+        """期限内のデータがあればネットワークに出ずに返す（なければ None）"""
+        entry = self._lookup(url)
+        if entry is not None and entry["expires"] > time.time():
+            self._count("hits")
+            self._count("bytes_saved", entry["size"])
+            return entry["data"]
+        return None
+
+    def peek_stale(self, url):
+        """期限切れでも手元にあるデータを返す（起動直後の仮表示用）"""
+        entry = self._lookup(url)
+        return entry["data"] if entry is not None else None
+
+    def get_json(self, url, ttl=None, timeout=10):
+        """URLのJSONを返す。期限切れなら If-None-Match / If-Modified-Since で再検証する"""
+        data = self.peek(url)
+        if data is not None:
+            return data
+
+        entry = self._lookup(url)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with metrics.span("network"):
+            res = self.session.get(url, headers=headers, timeout=timeout)
+        expires = time.time() + (ttl if ttl is not None else seconds_until_next_publish())
+
+        if res.status_code == 304 and entry is not None:
+            # 内容は変わっていないので期限だけ延ばす
+            self._count("revalidations")
+            self._count("bytes_saved", entry["size"])
+            entry["expires"] = expires
+            self._remember(url, entry)
+            self._save(url, entry)
+            return entry["data"]
+
+        res.raise_for_status()
+        with metrics.span("json_parse"):
+            data = res.json()
+        entry = {
+            "data": data,
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+            "expires": expires,
+            "size": len(res.content),
+        }
+        self._count("misses")
+        self._count("bytes_downloaded", entry["size"])
+        self._remember(url, entry)
+        self._save(url, entry)
+        return data
+
+    def summary(self):
+        s = self.stats
+        return (
+            f"キャッシュ: ヒット {s['hits']} / 再検証 {s['revalidations']} / ダウンロード {s['misses']}"
+            f"（節約 {s['bytes_saved'] / 1024:.0f}KB）"
+        )
@@ -0,0 +1,150 @@
+import math
+
+import flet as ft
+
+from icons import ICON_URL, fallback_symbol, icon_store
+from metrics import metrics
+
+# カード1枚の幅と、カード同士の間隔
+CARD_WIDTH = 100
+CARD_GAP = 10
+ITEM_EXTENT = CARD_WIDTH + CARD_GAP
+# 画面外の左右に余分に用意しておくカードの枚数（スクロール時のちらつき防止）
+OVERSCAN = 2
+
+
+class ForecastCard(ft.Container):
+    """1日分の情報を表示するカード。作り直さずに中身だけ差し替えて使い回す"""
+
+    def __init__(self):
+        super().__init__()
+        self.width = CARD_WIDTH
+        self.padding = 10
+        self.margin = ft.margin.only(right=CARD_GAP)
+        self.bgcolor = ft.Colors.WHITE
+        self.border_radius = 10
+        self.shadow = ft.BoxShadow(
+            spread_radius=1,
+            blur_radius=5,
+            color=ft.Colors.BLUE_GREY_100,
+        )
+
+        self.date_text = ft.Text("", weight=ft.FontWeight.BOLD, size=14, text_align=ft.TextAlign.CENTER)
+        # アイコンが読み込めないとき(オフラインなど)は記号で代用する
+        self.icon_fallback = ft.Text("", size=32)
+        self.icon = ft.Image(
+            src=ICON_URL.format(100), width=50, height=50, fit=ft.ImageFit.CONTAIN,
+            error_content=self.icon_fallback
+        )
+        self.pop_text = ft.Text("", size=12, color=ft.Colors.BLUE)
+        self.max_text = ft.Text("", color=ft.Colors.RED, size=12)
+        self.min_text = ft.Text("", color=ft.Colors.BLUE, size=12)
+        self.values = None
+
+        self.content = ft.Column(
+            controls=[
+                self.date_text,
+                ft.Divider(height=5),
+                self.icon,
+                self.pop_text,
+                ft.Divider(height=5),
+                ft.Row(
+                    controls=[self.max_text, ft.Text("/", size=12), self.min_text],
+                    alignment=ft.MainAxisAlignment.CENTER
+                )
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            alignment=ft.MainAxisAlignment.START
+        )
+
+    def set_data(self, date_text, weather_code, pop, t_min, t_max):
+        """値が変わった項目だけ書き換える"""
+        values = (date_text, weather_code, pop, t_min, t_max)
+        if values == self.values:
+            return
+        old = self.values or (None,) * 5
+        self.values = values
+
+        if date_text != old[0]:
+            self.date_text.value = date_text
+        if weather_code != old[1]:
+            self.set_icon(weather_code)
+        if pop != old[2]:
+            # 降水確率に % が付いていない場合は付ける
+            pop_display = f"{pop}%" if "%" not in str(pop) and pop != "-" else pop
+            self.pop_text.value = f"降水 {pop_display}"
+        if t_max != old[4]:
+            self.max_text.value = f"{t_max}℃"
+        if t_min != old[3]:
+            self.min_text.value = f"{t_min}℃"
+
+    def set_icon(self, weather_code):
+        """保存済みのアイコンがあれば埋め込み(base64)で、なければ気象庁のURLで表示する"""
+        self.icon_fallback.value = fallback_symbol(weather_code)
+        # 天気コードが欠けている日はアイコンを出さず、代わりの文字だけにする
+        data = icon_store.get_base64(weather_code) if weather_code is not None else None
+        if data is not None:
+            self.icon.src_base64 = data
+        else:
+            self.icon.src_base64 = None
+            self.icon.src = ICON_URL.format(weather_code) if weather_code is not None else None
+
+
+class ForecastStrip(ft.Row):
+    """予報カードを横に並べる仮想化リスト
+
+    画面に見えている範囲のカードだけを用意し、スクロールに合わせて
+    同じカードに別の日のデータを割り当て直す。左右の空白で全体の幅を保つ。
+    """
+
+    def __init__(self, viewport_width=740):
+        super().__init__()
+        self.spacing = 0
+        self.scroll = ft.ScrollMode.AUTO  # 横スクロールを有効化
+        self.on_scroll = self.handle_scroll
+        self.on_scroll_interval = 30
+
+        self.items = []  # (日付, 天気コード, 降水確率, 最低, 最高) のリスト
+        self.first = 0  # 先頭に表示しているカードの番号
+        self.pool = []  # 使い回すカード
+        self.left_spacer = ft.Container(width=0)
+        self.right_spacer = ft.Container(width=0)
+        self.set_viewport(viewport_width)
+
+    def set_viewport(self, width):
+        """表示幅から、同時に必要なカードの枚数を決める"""
+        self.visible_count = math.ceil(width / ITEM_EXTENT) + 2 * OVERSCAN
+        while len(self.pool) < self.visible_count:
+            self.pool.append(ForecastCard())
+
+    def show_message(self, control):
+        """読み込み中やエラーのときは、カードの代わりに1つのコントロールを表示する"""
+        self.items = []
+        self.controls = [control]
+
+    def set_items(self, items):
+        self.items = list(items)
+        self.first = 0
+        # 前の地域でスクロールした位置も先頭に戻す（ページに載る前はまだスクロールしていない）
+        if self.page is not None:
+            self.scroll_to(offset=0, duration=0)
+        self.render()
+
+    def render(self):
+        count = min(len(self.pool), len(self.items))
+        first = self.first = max(0, min(self.first, len(self.items) - count))
+        with metrics.span("card_build"):
+            for i, card in enumerate(self.pool[:count]):
+                card.set_data(*self.items[first + i])
+        self.left_spacer.width = first * ITEM_EXTENT
+        self.right_spacer.width = (len(self.items) - first - count) * ITEM_EXTENT
+        self.controls = [self.left_spacer, *self.pool[:count], self.right_spacer]
+
+    def handle_scroll(self, e):
+        if e.viewport_dimension:
+            self.set_viewport(e.viewport_dimension)
+        first = max(0, int(e.pixels // ITEM_EXTENT) - OVERSCAN)
+        if first != self.first:
+            self.first = first
+            self.render()
+            self.update()
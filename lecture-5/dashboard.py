@@ -0,0 +1,123 @@
+import time
+from datetime import date
+
+import flet as ft
+
+WEEKDAYS = ["月", "火", "水", "木", "金", "土", "日"]
+
+# 色分けする項目: 表示名, 行タプル内の位置, 最小値, 最大値, 最小の色, 最大の色
+METRICS = {
+    "temp_max": ("最高気温", 4, -10, 35, (66, 133, 244), (234, 67, 53)),
+    "temp_min": ("最低気温", 5, -15, 30, (66, 133, 244), (234, 67, 53)),
+    "pop": ("降水確率", 6, 0, 100, (255, 255, 255), (25, 118, 210)),
+}
+
+NAME_WIDTH = 150
+CELL_WIDTH = 56
+CELL_HEIGHT = 24
+
+
+def heat_color(value, low, high, low_rgb, high_rgb):
+    """値を low〜high の範囲で2色の間の色に変換する"""
+    if value is None:
+        return ft.Colors.GREY_200
+    t = min(1.0, max(0.0, (value - low) / (high - low)))
+    r, g, b = (round(a + (b - a) * t) for a, b in zip(low_rgb, high_rgb))
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+class DashboardView(ft.Column):
+    """複数地域の予報を「地域 x 日付」のヒートマップで並べて表示するビュー
+
+    rows は (地域コード, 地域名, 'YYYY-MM-DD', 天気コード, 最高, 最低, 降水確率) のタプル。
+    地域コード・日付の順に並んでいる前提で、1回の走査で表を組み立てる。
+    """
+
+    def __init__(self, on_refresh=None):
+        super().__init__()
+        self.on_refresh = on_refresh
+        self.rows = []
+        self.fetch_ms = None
+        self.compare_codes = []  # 比較する地域（空なら全地域）
+        self.spacing = 6
+
+        self.metric_select = ft.Dropdown(
+            label="色分け",
+            width=150,
+            value="temp_max",
+            options=[ft.dropdown.Option(key=k, text=v[0]) for k, v in METRICS.items()],
+            on_change=lambda e: self.render(),
+        )
+        self.info_text = ft.Text("", size=12, color=ft.Colors.GREY_700)
+        self.compare_row = ft.Row(wrap=True, spacing=4)
+        self.grid = ft.Column(spacing=1, scroll=ft.ScrollMode.AUTO, height=330)
+
+        header = [self.metric_select, self.info_text]
+        if on_refresh:
+            header.insert(1, ft.IconButton(icon=ft.Icons.REFRESH, tooltip="更新", on_click=lambda e: on_refresh()))
+        self.controls = [ft.Row(header), self.compare_row, self.grid]
+
+    def add_compare(self, area_code):
+        if area_code and area_code not in self.compare_codes:
+            self.compare_codes.append(area_code)
+            self.render()
+
+    def remove_compare(self, area_code):
+        self.compare_codes.remove(area_code)
+        self.render()
+
+    def set_rows(self, rows, fetch_ms=None):
+        """表示するデータを差し替える（fetch_ms はデータ取得にかかった時間）"""
+        self.rows = rows
+        self.fetch_ms = fetch_ms
+        self.render()
+
+    def render(self):
+        start = time.perf_counter()
+        label, index, low, high, low_rgb, high_rgb = METRICS[self.metric_select.value]
+
+        # 地域ごとにまとめる（rows は地域コード・日付順）
+        areas = {}
+        dates = set()
+        for row in self.rows:
+            code, name, day = row[0], row[1], row[2]
+            if self.compare_codes and code not in self.compare_codes:
+                continue
+            areas.setdefault(code, (name, {}))[1][day] = row
+            dates.add(day)
+        dates = sorted(dates)
+
+        header = [ft.Container(width=NAME_WIDTH)]
+        for day in dates:
+            d = date.fromisoformat(day)
+            header.append(ft.Text(f"{d.month}/{d.day}({WEEKDAYS[d.weekday()]})", size=11, width=CELL_WIDTH,
+                                  text_align=ft.TextAlign.CENTER))
+        grid_rows = [ft.Row(header, spacing=1)]
+
+        for code, (name, by_date) in areas.items():
+            cells = [ft.Text(name, size=12, width=NAME_WIDTH, no_wrap=True)]
+            for day in dates:
+                row = by_date.get(day)
+                value = row[index] if row else None
+                cells.append(ft.Container(
+                    content=ft.Text("-" if value is None else str(value), size=11),
+                    width=CELL_WIDTH,
+                    height=CELL_HEIGHT,
+                    alignment=ft.alignment.center,
+                    bgcolor=heat_color(value, low, high, low_rgb, high_rgb),
+                    tooltip=f"{name} {day} {label} {'-' if value is None else value}",
+                ))
+            grid_rows.append(ft.Row(cells, spacing=1))
+        self.grid.controls = grid_rows
+
+        self.compare_row.controls = [
+            ft.Chip(label=ft.Text(areas[c][0] if c in areas else c), on_delete=lambda e, c=c: self.remove_compare(c))
+            for c in self.compare_codes
+        ]
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.info_text.value = f"{len(areas)}地域 x {len(dates)}日  組み立て {elapsed:.0f} ms"
+        if self.fetch_ms is not None:
+            self.info_text.value += f"（データ取得 {self.fetch_ms:.0f} ms）"
+        if self.page:
+            self.update()
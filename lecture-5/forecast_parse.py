@@ -0,0 +1,268 @@
+"""気象庁の予報JSON(timeSeries)を解析する関数（UIと取り込みスクリプトで共通）
+
+予報は列ごとの array に詰めた ForecastTable にまとめる。
+1要素ずつ辞書を作る代わりに、系列(リスト)単位で変換して array に追加していく。
+"""
+from array import array
+
+# 欠損値（空文字や '-'）を表す値。数値の列は array('h') なのでその最小値を使う
+MISSING = -32768
+
+
+def to_int(value):
+    """'12' -> 12、空文字や '-' は None"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if value in ("", "-"):
+        return None
+    return int(value)
+
+
+class IntTable(dict):
+    """'12' -> 12 の変換表。同じ文字列は2回目から辞書を引くだけで済む"""
+
+    def __missing__(self, key):
+        value = to_int(key)
+        value = MISSING if value is None else value
+        self[key] = value
+        return value
+
+
+INTS = IntTable()
+
+
+def extend_ints(column, values, length):
+    """文字列のリストを整数にして column の末尾に length 個追加する（足りない分は MISSING）"""
+    ints = list(map(INTS.__getitem__, values[:length]))
+    if len(ints) < length:
+        ints.extend([MISSING] * (length - len(ints)))
+    column.fromlist(ints)
+
+
+def value_or_none(value):
+    return None if value == MISSING else value
+
+
+class ForecastTable:
+    """複数地域の週間予報を列ごとの array で持つ表
+
+    文字列の列（地域コード・区域・日付・発表時刻）は一覧への番号で持ち、
+    数値の列（天気コード・気温・降水確率）は array('h') に欠損を MISSING として持つ。
+    1つのJSONに含まれる全区域を読み込み、rank は JSON 内での区域の順番（0 が代表の区域）。
+    """
+
+    COLUMNS = ("office", "area", "rank", "date", "issued_at", "weather_code", "temp_max", "temp_min", "pop")
+
+    def __init__(self):
+        # 番号 -> 文字列 の一覧と、その逆引き
+        self.offices = []
+        self.areas = []  # (区域コード, 区域名)
+        self.dates = []  # 'YYYY-MM-DD'
+        self.issued = []  # 発表時刻
+        self.lookup = {"offices": {}, "areas": {}, "dates": {}, "issued": {}}
+        self.date_runs = {}  # timeDefines(タプル) -> 日付の番号のリスト（全国でほぼ同じ並びになる）
+
+        self.office = array("H")
+        self.area = array("H")
+        self.rank = array("B")
+        self.date = array("H")
+        self.issued_at = array("H")
+        self.weather_code = array("h")
+        self.temp_max = array("h")
+        self.temp_min = array("h")
+        self.pop = array("h")
+
+        self.spans = {}  # 地域コード -> (開始行, 終了行)
+        self.errors = {}  # 地域コード -> 解析できなかった例外
+
+    @classmethod
+    def from_payloads(cls, payloads):
+        """(地域コード, 予報JSON) の並びからまとめて表を作る（解析できないものは errors に残す）"""
+        table = cls()
+        for office_code, data in payloads:
+            try:
+                table.add(office_code, data)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                table.errors[office_code] = e
+        return table
+
+    def __len__(self):
+        return len(self.weather_code)
+
+    def _number(self, name, value):
+        """文字列の一覧に value を登録してその番号を返す"""
+        index = self.lookup[name]
+        number = index.get(value)
+        if number is None:
+            values = getattr(self, name)
+            number = index[value] = len(values)
+            values.append(value)
+        return number
+
+    def add(self, office_code, data):
+        """1地域分の予報JSONの週間予報(data[1]、なければ data[0])を追加する"""
+        weekly_data = data[1] if len(data) > 1 else data[0]
+        time_series = weekly_data["timeSeries"]
+        # 日付は区域に関係なく系列で共通なので、同じ並びは1回だけ番号にする
+        defines = tuple(time_series[0]["timeDefines"])
+        dates = self.date_runs.get(defines)
+        if dates is None:
+            dates = self.date_runs[defines] = [self._number("dates", d[:10]) for d in defines]
+        temp_areas = time_series[1]["areas"] if len(time_series) > 1 else []
+        office = [self._number("offices", office_code)]
+        issued = [self._number("issued", weekly_data.get("reportDatetime", ""))]
+
+        start = len(self)
+        try:
+            for rank, area in enumerate(time_series[0]["areas"]):
+                codes = area["weatherCodes"]
+                n = min(len(dates), len(codes))
+                # 気温の区域は天気の区域と同じ順に並んでいる
+                temps = temp_areas[rank] if rank < len(temp_areas) else {}
+                info = area.get("area", {})
+                number = self._number("areas", (info.get("code", office_code), info.get("name", "")))
+
+                self.office.fromlist(office * n)
+                self.area.fromlist([number] * n)
+                self.rank.fromlist([min(rank, 255)] * n)
+                self.date.fromlist(dates[:n])
+                self.issued_at.fromlist(issued * n)
+                extend_ints(self.weather_code, codes, n)
+                extend_ints(self.temp_max, temps.get("tempsMax", []), n)
+                extend_ints(self.temp_min, temps.get("tempsMin", []), n)
+                extend_ints(self.pop, area.get("pops", []), n)
+        except Exception:
+            # 途中で失敗したら、この地域の分は表に残さない
+            for name in self.COLUMNS:
+                del getattr(self, name)[start:]
+            raise
+
+        # 同じ地域を追加し直したときは、新しい方を rows(office_code) で返す
+        self.spans[office_code] = (start, len(self))
+
+    def rows(self, office_code=None, all_areas=False):
+        """(地域コード, 区域コード, 'YYYY-MM-DD', 天気コード, 最高, 最低, 降水確率, 発表時刻) を返す
+
+        欠損は None。all_areas=False なら各地域の代表の区域だけを返す。
+        """
+        if office_code is None:
+            start, end = 0, len(self)
+        else:
+            start, end = self.spans.get(office_code, (0, 0))
+        offices, areas, dates, issued = self.offices, self.areas, self.dates, self.issued
+        for i in range(start, end):
+            if not all_areas and self.rank[i]:
+                continue
+            yield (
+                offices[self.office[i]],
+                areas[self.area[i]][0],
+                dates[self.date[i]],
+                value_or_none(self.weather_code[i]),
+                value_or_none(self.temp_max[i]),
+                value_or_none(self.temp_min[i]),
+                value_or_none(self.pop[i]),
+                issued[self.issued_at[i]],
+            )
+
+
+# RegionForecast の1日分の値の並び
+WEATHER_CODE, POP, TEMP_MIN, TEMP_MAX = range(4)
+
+
+class RegionForecast:
+    """1つの予報JSONに含まれる全区域・全観測点の日ごとの予報
+
+    data[0] の短期予報(3日分)と data[1] の週間予報のすべての timeSeries を読み、
+    区域(天気・降水確率)と観測点(気温)をそれぞれのコードで引けるようにする。
+    同じ日の値が両方にあるときは、より新しい短期予報の値を使う。
+    """
+
+    def __init__(self, office_code, data):
+        self.office_code = office_code
+        self.names = {}  # コード -> 名前
+        self.kinds = {}  # コード -> "region"(区域) / "station"(観測点)
+        self.days = {}  # コード -> {'YYYY-MM-DD': [天気コード, 降水確率, 最低, 最高]}
+        self.pairs = {}  # 区域 <-> 観測点 の組（気温は観測点、天気は区域から補う）
+        self.issued_at = ""
+        for report in data:
+            self.add_report(report)
+
+    def add_report(self, report):
+        self.issued_at = self.issued_at or report.get("reportDatetime", "")
+        values = {}  # この発表の分だけを集めてから、まだ値のない日に入れる
+        regions = []
+        stations = []
+
+        for series in report.get("timeSeries", []):
+            defines = series.get("timeDefines", [])
+            for area in series.get("areas", []):
+                info = area.get("area", {})
+                code = info.get("code")
+                if not code:
+                    continue
+                kind = "region" if "weatherCodes" in area or "pops" in area else "station"
+                self.names.setdefault(code, info.get("name", code))
+                self.kinds.setdefault(code, kind)
+                group = regions if kind == "region" else stations
+                if code not in group:
+                    group.append(code)
+                days = values.setdefault(code, {})
+
+                for t, value in zip(defines, area.get("weatherCodes", [])):
+                    self._put(days, t[:10], WEATHER_CODE, value)
+                for t, value in zip(defines, area.get("pops", [])):
+                    # 短期予報の降水確率は6時間ごとなので、その日の最大を使う
+                    self._put(days, t[:10], POP, value, max)
+                for t, value in zip(defines, area.get("tempsMin", [])):
+                    self._put(days, t[:10], TEMP_MIN, value)
+                for t, value in zip(defines, area.get("tempsMax", [])):
+                    self._put(days, t[:10], TEMP_MAX, value)
+                for t, value in zip(defines, area.get("temps", [])):
+                    # 短期予報の気温は 0時が朝の最低、9時が日中の最高
+                    self._put(days, t[:10], TEMP_MIN if t[11:13] == "00" else TEMP_MAX, value)
+
+        for code, days in values.items():
+            merged = self.days.setdefault(code, {})
+            for day, row in days.items():
+                old = merged.setdefault(day, [None] * 4)
+                for i, value in enumerate(row):
+                    if old[i] is None:
+                        old[i] = value
+
+        # 区域と観測点は同じ順に並んでいるので、順番で組にする（数が違うときは端に寄せる）
+        if regions and stations:
+            for i in range(max(len(regions), len(stations))):
+                region = regions[min(i, len(regions) - 1)]
+                station = stations[min(i, len(stations) - 1)]
+                self.pairs.setdefault(region, station)
+                self.pairs.setdefault(station, region)
+
+    @staticmethod
+    def _put(days, day, index, value, combine=None):
+        value = INTS[value] if value is not None else MISSING
+        if value == MISSING:
+            return
+        row = days.setdefault(day, [None] * 4)
+        if row[index] is None or combine is None:
+            row[index] = value
+        else:
+            row[index] = combine(row[index], value)
+
+    def points(self):
+        """選択肢にする (コード, 名前, 種類) のリスト（区域が先、観測点が後）"""
+        return sorted(((code, self.names[code], kind) for code, kind in self.kinds.items()),
+                      key=lambda p: p[2] != "region")
+
+    def daily(self, code):
+        """(日付, 天気コード, 降水確率, 最低, 最高) を日付順に返す（天気のない日は除く）"""
+        own = self.days.get(code, {})
+        other = self.days.get(self.pairs.get(code), {})
+        rows = []
+        for day in sorted(set(own) | set(other)):
+            a = own.get(day) or [None] * 4
+            b = other.get(day) or [None] * 4
+            merged = [x if x is not None else y for x, y in zip(a, b)]
+            if merged[WEATHER_CODE] is not None:
+                rows.append((day, *merged))
+        return rows
@@ -0,0 +1,115 @@
+"""天気アイコン(SVG)をローカルに保存して使い回すモジュール
+
+    python icons.py   # 全天気コードのアイコンを icons/ にまとめてダウンロードする
+"""
+import base64
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from cache import JMA_BASE
+from metrics import metrics
+
+ICON_URL = JMA_BASE + "/bosai/forecast/img/{}.svg"
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons")
+
+# 気象庁の天気コード一覧
+WEATHER_CODES = [
+    100, 101, 102, 103, 104, 105, 106, 107, 108, 110, 111, 112, 113, 114, 115, 116, 117, 118, 119,
+    120, 121, 122, 123, 124, 125, 126, 127, 128, 130, 131, 132, 140, 160, 170, 181,
+    200, 201, 202, 203, 204, 205, 206, 207, 208, 209, 210, 211, 212, 213, 214, 215, 216, 217, 218, 219,
+    220, 221, 222, 223, 224, 225, 226, 228, 229, 230, 231, 240, 250, 260, 270, 281,
+    300, 301, 302, 303, 304, 306, 308, 309, 311, 313, 314, 315, 316, 317, 320, 321, 322, 323, 324,
+    325, 326, 327, 328, 329, 340, 350, 361, 371,
+    400, 401, 402, 403, 405, 406, 407, 409, 411, 413, 414, 420, 421, 422, 423, 425, 426, 427, 450,
+]
+
+# アイコンが手元になく、取得もできないときの代わりの文字（百の位で大まかに分類）
+FALLBACK_SYMBOLS = {1: "☀", 2: "☁", 3: "☂", 4: "❄"}
+
+
+def fallback_symbol(code):
+    if code is None:
+        return "?"
+    return FALLBACK_SYMBOLS.get(int(code) // 100, "?")
+
+
+class IconStore:
+    """天気アイコンを icons/ フォルダに保存し、base64文字列としてメモリに持っておくクラス"""
+
+    def __init__(self, icon_dir=ICON_DIR, session=None, timeout=5.0):
+        self.icon_dir = icon_dir
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.encoded = {}  # 天気コード -> base64文字列
+        self.failed = set()  # 取得に失敗したコード（何度も取りに行かない）
+        self.lock = threading.Lock()
+
+    def path(self, code):
+        return os.path.join(self.icon_dir, f"{code}.svg")
+
+    def get_base64(self, code):
+        """保存済みならbase64文字列を返す（ネットワークには出ない。なければ None）"""
+        code = str(code)
+        with self.lock:
+            if code in self.encoded:
+                return self.encoded[code]
+        try:
+            with open(self.path(code), "rb") as f:
+                data = base64.b64encode(f.read()).decode("ascii")
+        except OSError:
+            return None
+        with self.lock:
+            self.encoded[code] = data
+        return data
+
+    def fetch(self, code):
+        """アイコンがまだ保存されていなければダウンロードして保存する"""
+        code = str(code)
+        if os.path.exists(self.path(code)) or code in self.failed:
+            return self.get_base64(code)
+        try:
+            with metrics.span("icon_network"):
+                res = self.session.get(ICON_URL.format(code), timeout=self.timeout)
+            res.raise_for_status()
+            metrics.count("icon_bytes_downloaded", len(res.content))
+            os.makedirs(self.icon_dir, exist_ok=True)
+            tmp = self.path(code) + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(res.content)
+            os.replace(tmp, self.path(code))
+        except (requests.RequestException, OSError) as e:
+            metrics.error("アイコン取得エラー", e, code)
+            with self.lock:
+                self.failed.add(code)
+            return None
+        return self.get_base64(code)
+
+    def preload(self, codes, workers=8):
+        """指定したコードのアイコンを並列に用意し、メモリに読み込んでおく"""
+        codes = sorted({str(c) for c in codes})
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self.fetch, codes))
+        return sum(1 for c in codes if self.get_base64(c) is not None)
+
+    def preload_async(self, codes, on_done=None):
+        """preload をバックグラウンドで実行する"""
+        def worker():
+            count = self.preload(codes)
+            if on_done:
+                on_done(count)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+
+# アプリ全体で共有するアイコン置き場
+icon_store = IconStore()
+
+
+if __name__ == "__main__":
+    count = icon_store.preload(WEATHER_CODES)
+    print(f"{len(WEATHER_CODES)}種類中 {count}種類のアイコンを {ICON_DIR} に保存しました")
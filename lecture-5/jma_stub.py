@@ -0,0 +1,199 @@
+"""気象庁API(jma.go.jp)の代わりに、保存済みのデータを返すローカルサーバー
+
+    python jma_stub.py --port 8080 --latency 80 --jitter 40 --error-rate 0.05
+    JMA_BASE_URL=http://127.0.0.1:8080 python 課題.py   # アプリをスタブに向ける
+
+返すもの:
+    /bosai/common/const/area.json               -> fixtures/area.json
+    /bosai/forecast/data/forecast/<code>.json   -> fixtures/forecast/<code>.json
+    /bosai/forecast/img/<code>.svg              -> icons/<code>.svg（なければ簡単なSVGを作る）
+"""
+import argparse
+import hashlib
+import http.server
+import os
+import random
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "..", "lecture-6", "fixtures")
+ICON_DIR = os.path.join(HERE, "icons")
+
+AREA_PATH = "/bosai/common/const/area.json"
+FORECAST_PREFIX = "/bosai/forecast/data/forecast/"
+ICON_PREFIX = "/bosai/forecast/img/"
+
+# アイコンが保存されていないときに返すSVG（天気コードの百の位で色を変える）
+ICON_COLORS = {"1": "#f4b400", "2": "#9e9e9e", "3": "#4285f4", "4": "#b3e5fc"}
+ICON_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="80" height="60" viewBox="0 0 80 60">'
+    '<circle cx="40" cy="30" r="22" fill="{color}"/>'
+    '<text x="40" y="36" font-size="14" text-anchor="middle">{code}</text></svg>'
+)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive で接続を使い回せるようにする
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count("requests")
+
+        # 遅延（latency ± jitter ミリ秒）
+        delay = stub.latency + random.uniform(-stub.jitter, stub.jitter)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        # エラーの注入
+        if stub.error_rate and random.random() < stub.error_rate:
+            stub.count("errors")
+            self.send_error(random.choice(stub.error_statuses))
+            return
+
+        body, content_type = stub.load(self.path.split("?")[0])
+        if body is None:
+            stub.count("not_found")
+            self.send_error(404)
+            return
+
+        # 条件付きGET（ForecastCache の再検証）に 304 で応える
+        etag = stub.etag(body)
+        if self.headers.get("If-None-Match") == etag:
+            stub.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        stub.count("ok")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class JMAStub:
+    """気象庁APIのスタブサーバー
+
+    latency/jitter はミリ秒、error_rate は 0〜1 の割合、pad_bytes はJSONの末尾に足す空白のバイト数
+    （大きな応答のときの転送・解析時間を測るため。空白なのでJSONとしては同じ内容になる）。
+    """
+
+    def __init__(self, fixture_dir=FIXTURE_DIR, icon_dir=ICON_DIR, host="127.0.0.1", port=0,
+                 latency=0, jitter=0, error_rate=0.0, error_statuses=(500, 503), pad_bytes=0):
+        self.fixture_dir = fixture_dir
+        self.icon_dir = icon_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.pad_bytes = pad_bytes
+
+        self.files = {}  # パス -> (本体, Content-Type)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "not_modified": 0, "errors": 0, "not_found": 0}
+
+        self.server = http.server.ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def etag(self, body):
+        return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def load(self, path):
+        """パスに対応する (本体, Content-Type) を返す。一度読んだものはメモリに置いておく"""
+        with self.lock:
+            if path in self.files:
+                return self.files[path]
+
+        name = os.path.basename(path)
+        if path == AREA_PATH:
+            result = self._read_json(os.path.join(self.fixture_dir, "area.json"))
+        elif path.startswith(FORECAST_PREFIX) and name.endswith(".json"):
+            result = self._read_json(os.path.join(self.fixture_dir, "forecast", name))
+        elif path.startswith(ICON_PREFIX) and name.endswith(".svg"):
+            result = self._read_icon(name[:-4])
+        else:
+            result = (None, None)
+
+        if result[0] is not None:
+            with self.lock:
+                self.files[path] = result
+        return result
+
+    def _read_json(self, path):
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+        except OSError:
+            return None, None
+        return body + b" " * self.pad_bytes, "application/json"
+
+    def _read_icon(self, code):
+        if not code.isdigit():
+            return None, None
+        try:
+            with open(os.path.join(self.icon_dir, f"{code}.svg"), "rb") as f:
+                body = f.read()
+        except OSError:
+            body = ICON_SVG.format(color=ICON_COLORS.get(code[0], "#cccccc"), code=code).encode()
+        return body, "image/svg+xml"
+
+    def start(self):
+        """別スレッドで待ち受けを始める"""
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="気象庁APIのスタブサーバー")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fixtures", default=FIXTURE_DIR)
+    parser.add_argument("--latency", type=float, default=0, help="応答までの遅延(ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="遅延のばらつき(±ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500/503 を返す割合(0〜1)")
+    parser.add_argument("--pad-bytes", type=int, default=0, help="JSONの応答に足すバイト数")
+    args = parser.parse_args()
+
+    stub = JMAStub(args.fixtures, port=args.port, latency=args.latency, jitter=args.jitter,
+                   error_rate=args.error_rate, pad_bytes=args.pad_bytes)
+    print(f"{stub.base_url} で待ち受け中（JMA_BASE_URL={stub.base_url} でアプリを向けられる）")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server.server_close()
+        print(stub.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""天気アプリの計測（処理ごとの時間・回数・エラー）
+
+    WEATHER_METRICS=1 python 課題.py                  # 計測して、終了時に集計を1行のJSONで出す
+    WEATHER_METRICS=metrics.jsonl python 課題.py      # 1回ごとの記録も JSON Lines でファイルに書き足す
+    WEATHER_METRICS_PORT=9100 python 課題.py          # http://127.0.0.1:9100/metrics で Prometheus 形式の集計を返す
+    WEATHER_PROFILE=cpu python 課題.py                # cProfile で記録して終了時に weather_profile.prof と上位を出す
+    WEATHER_PROFILE=memory python 課題.py             # tracemalloc で記録して終了時にメモリを多く使った行を出す
+
+    with metrics.span("network"):
+        res = session.get(url)
+    metrics.count("cache_hits")
+    metrics.error("更新エラー", ex, area_code)
+
+計測しないとき(既定)の span() は何もしない共通のオブジェクトを返すだけで、count() もすぐに戻る。
+"""
+import atexit
+import cProfile
+import http.server
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+METRICS_ENV = "WEATHER_METRICS"
+PORT_ENV = "WEATHER_METRICS_PORT"
+PROFILE_ENV = "WEATHER_PROFILE"
+PROFILE_FILE = "weather_profile.prof"
+# 時間の分布を数える区切り（秒）。Prometheus のヒストグラムの le になる
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+PREFIX = "weather_"
+
+
+class NullSpan:
+    """計測しないときの span（何もしない）"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """with で囲んだ処理の時間を Metrics に記録する（例外で抜けたらエラーとして数える）"""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+
+class SpanStats:
+    """1種類の span の集計"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.failed = 0
+        self.buckets = [0] * len(BUCKETS)  # 区切りごと（その区切り以下で一番小さいところ）の回数
+
+    def add(self, seconds, failed):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.failed += failed
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max * 1000, 3),
+            "failed": self.failed,
+        }
+
+
+class Metrics:
+    """span の時間・カウンター・エラーを集計する（複数のスレッドから呼んでよい）"""
+
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.spans = {}     # 名前 -> SpanStats
+        self.counters = {}  # 名前 -> 値
+        self.errors = {}    # 場所 -> 回数
+        self.log = open(log_path, "a", encoding="utf-8", buffering=1) if log_path else None
+        self.server = None
+        self.profiler = None
+
+    @classmethod
+    def from_env(cls):
+        """環境変数の設定どおりに作る（計測・書き出し・Prometheus・プロファイル）"""
+        value = os.environ.get(METRICS_ENV, "")
+        port = os.environ.get(PORT_ENV, "")
+        enabled = value not in ("", "0") or bool(port)
+        metrics = cls(enabled=enabled, log_path=value if value not in ("", "0", "1") else None)
+        if port:
+            metrics.serve(int(port))
+        modes = os.environ.get(PROFILE_ENV, "")
+        if modes:
+            metrics.profiler = Profiler(modes.split(","))
+        if enabled or metrics.profiler:
+            atexit.register(metrics.report)
+        return metrics
+
+    # --- 記録 ---
+    def span(self, name):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds, failed=False):
+        with self.lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds, failed)
+            if self.log is not None:
+                self._write({"span": name, "ms": round(seconds * 1000, 3), "failed": failed})
+
+    def error(self, where, ex, detail=None):
+        """エラーを表示し、計測中なら場所ごとに数えて記録する"""
+        print(f"{where} {detail}: {ex}" if detail is not None else f"{where}: {ex}")
+        if not self.enabled:
+            return
+        with self.lock:
+            self.errors[where] = self.errors.get(where, 0) + 1
+            if self.log is not None:
+                self._write({"error": where, "detail": None if detail is None else str(detail),
+                             "type": type(ex).__name__, "message": str(ex)})
+
+    def _write(self, record):
+        # ロックの中で呼ぶ
+        record["ts"] = round(time.time(), 3)
+        self.log.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # --- 書き出し ---
+    def snapshot(self):
+        with self.lock:
+            return {
+                "spans": {name: stats.as_dict() for name, stats in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "errors": dict(sorted(self.errors.items())),
+            }
+
+    def prometheus_text(self):
+        """Prometheus のテキスト形式の集計"""
+        lines = []
+        with self.lock:
+            if self.spans:
+                lines.append(f"# TYPE {PREFIX}span_seconds histogram")
+            for name, stats in sorted(self.spans.items()):
+                label = f'span="{escape_label(name)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'{PREFIX}span_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{PREFIX}span_seconds_bucket{{{label},le="+Inf"}} {stats.count}')
+                lines.append(f"{PREFIX}span_seconds_sum{{{label}}} {stats.total:.6f}")
+                lines.append(f"{PREFIX}span_seconds_count{{{label}}} {stats.count}")
+            if self.spans:
+                lines.append(f"# TYPE {PREFIX}span_failed_total counter")
+            for name, stats in sorted(self.spans.items()):
+                lines.append(f'{PREFIX}span_failed_total{{span="{escape_label(name)}"}} {stats.failed}')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}{name}_total counter")
+                lines.append(f"{PREFIX}{name}_total {value}")
+            if self.errors:
+                lines.append(f"# TYPE {PREFIX}errors_total counter")
+            for where, value in sorted(self.errors.items()):
+                lines.append(f'{PREFIX}errors_total{{where="{escape_label(where)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """/metrics で prometheus_text() を返すサーバーを裏で動かす"""
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server
+
+    def report(self):
+        """集計を1行のJSONで出し、プロファイルを止めて結果を出す（終了時に呼ばれる）"""
+        if self.enabled:
+            snapshot = self.snapshot()
+            print(json.dumps({"metrics": snapshot}, ensure_ascii=False))
+            if self.log is not None:
+                with self.lock:
+                    self._write({"snapshot": snapshot})
+                    self.log.close()
+                    self.log = None
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+        return self.snapshot()
+
+
+class Profiler:
+    """WEATHER_PROFILE で選んだ cProfile(cpu) / tracemalloc(memory) の記録
+
+    Python 3.12 からの cProfile は sys.monitoring でプロセス全体を1つで記録する
+    （2つ目を enable() すると ValueError になる）。それより前はスレッドごとに記録するので、
+    読み込んだあとに始まったスレッドにも1つずつ付ける。
+    """
+
+    def __init__(self, modes, path=PROFILE_FILE, limit=20):
+        self.path = path
+        self.limit = limit
+        self.profiles = []
+        self.memory = "memory" in modes
+        if self.memory:
+            tracemalloc.start(10)
+        if "cpu" in modes:
+            self.lock = threading.Lock()
+            if sys.version_info < (3, 12):
+                threading.setprofile(self._start_thread)
+            self._start_thread()
+
+    def _start_thread(self, *args):
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def stop(self):
+        if self.profiles:
+            if sys.version_info < (3, 12):
+                threading.setprofile(None)
+            # 全部止めてから1つにまとめる（このあと始まるスレッドには付けない）
+            with self.lock:
+                profiles, self.profiles = self.profiles, []
+            for profile in profiles:
+                profile.disable()
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(self.path)
+            print(f"cProfile の結果を {self.path} に保存しました（{len(profiles)}個の記録）")
+            stats.sort_stats("cumulative").print_stats(self.limit)
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"tracemalloc: 現在 {current / 1024 / 1024:.1f} MB / 最大 {peak / 1024 / 1024:.1f} MB")
+            for stat in snapshot.statistics("lineno")[:self.limit]:
+                print(stat)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# アプリ全体で1つ使う
+metrics = Metrics.from_env()
@@ -0,0 +1,117 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+
+
+class RateLimiter:
+    """リクエストの間隔を一定以上あけるための簡易レートリミッタ"""
+
+    def __init__(self, rate_per_sec):
+        # rate_per_sec が 0 以下なら制限なし
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        # 次に送ってよい時刻を予約してから、ロックの外で待つ
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ForecastPrefetcher:
+    """全地域の予報JSONを並列に先読みしてメモリに保持するクラス"""
+
+    def __init__(self, url_template, area_codes, max_workers=8, rate_per_sec=20, timeout=5.0, session=None, cache=None):
+        self.url_template = url_template
+        self.area_codes = list(area_codes)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(rate_per_sec)
+
+        # キャッシュがあればそのセッションを共有し、取得もキャッシュ経由にする
+        self.cache = cache
+        if cache is not None:
+            session = cache.session
+
+        # keep-alive の接続をワーカー数ぶん使い回せるようにする
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.results = {}  # 地域コード -> 予報JSON
+        self.errors = {}  # 地域コード -> 例外
+        self.elapsed = None  # 全件取得にかかった秒数
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def get(self, area_code):
+        """先読み済みのデータを返す（まだなければ None）"""
+        with self.lock:
+            return self.results.get(area_code)
+
+    def fetch_one(self, area_code):
+        """1地域分を取得して結果を保存する"""
+        url = self.url_template.format(area_code)
+        if self.cache is not None:
+            data = self.cache.peek(url)
+            if data is None:
+                self.rate_limiter.wait()
+                data = self.cache.get_json(url, timeout=self.timeout)
+        else:
+            self.rate_limiter.wait()
+            with metrics.span("network"):
+                res = self.session.get(url, timeout=self.timeout)
+            res.raise_for_status()
+            metrics.count("bytes_downloaded", len(res.content))
+            with metrics.span("json_parse"):
+                data = res.json()
+        with self.lock:
+            self.results[area_code] = data
+            self.errors.pop(area_code, None)
+        return data
+
+    def run(self):
+        """全地域を並列に取得する（取得し終わるまで戻らない）"""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_one, code): code for code in self.area_codes}
+            for future in as_completed(futures):
+                code = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    # 1地域の失敗やタイムアウトで全体を止めない
+                    with self.lock:
+                        self.errors[code] = e
+        self.elapsed = time.perf_counter() - start
+        return self.elapsed
+
+    def start(self, on_done=None):
+        """バックグラウンドスレッドで先読みを始める"""
+        def worker():
+            self.run()
+            if on_done:
+                on_done(self)
+
+        self.thread = threading.Thread(target=worker, daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def summary(self):
+        """先読み結果の要約文字列"""
+        ok = len(self.results)
+        total = len(self.area_codes)
+        if self.elapsed is None:
+            return f"先読み中... ({ok}/{total})"
+        return f"{total}地域中{ok}地域を{self.elapsed:.2f}秒で先読みしました（失敗 {len(self.errors)}件）"
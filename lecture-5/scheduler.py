@@ -0,0 +1,111 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LoadScheduler:
+    """選択のたびに発生する読み込みをUIスレッドの外で実行し、最新の結果だけを反映するクラス
+
+    - 連続した選択は debounce 秒待ってから1回だけ読み込む
+    - 新しい選択が来たら、まだ始まっていない読み込みは取り消し、実行中のものは結果を捨てる
+    """
+
+    def __init__(self, debounce=0.15, max_workers=4):
+        self.debounce = debounce
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        # 結果の反映は1つずつ行い、古い結果が新しい結果を上書きしないようにする
+        self.deliver_lock = threading.Lock()
+        self.generation = 0  # 選択のたびに増える番号。これが変わった読み込みは古い
+        self.timer = None
+        self.future = None
+        self.stats = {"submitted": 0, "started": 0, "superseded": 0, "delivered": 0}
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def cancel(self):
+        """待機中・実行中の読み込みをすべて古いものとして扱う"""
+        with self.lock:
+            self.generation += 1
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.future is not None:
+                self.future.cancel()
+                self.future = None
+            return self.generation
+
+    def submit(self, load, on_result, on_error=None):
+        """load(is_stale) をバックグラウンドで実行し、最新のままなら on_result(結果) を呼ぶ
+
+        load には「もう古くなったか」を返す関数が渡されるので、重い処理の前に確認して途中でやめられる。
+        """
+        generation = self.cancel()
+        self._count("submitted")
+        timer = threading.Timer(self.debounce, self._start, args=(generation, load, on_result, on_error))
+        timer.daemon = True
+        with self.lock:
+            if generation != self.generation:
+                return generation
+            self.timer = timer
+        timer.start()
+        return generation
+
+    def run_now(self, load, on_result, on_error=None):
+        """load(is_stale) をこの場で実行して on_result(結果) を呼ぶ（手元にデータがあるとき用）
+
+        submit と同じく待機中・実行中の読み込みは古いものにし、反映は deliver_lock の中で行うので、
+        前の読み込みの結果が後から上書きすることはない。
+        """
+        generation = self.cancel()
+
+        def is_stale():
+            return generation != self.generation
+
+        with self.deliver_lock:
+            if is_stale():
+                self._count("superseded")
+                return generation
+            try:
+                result = load(is_stale)
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                return generation
+            on_result(result)
+            self._count("delivered")
+        return generation
+
+    def _start(self, generation, load, on_result, on_error):
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.timer = None
+            self.future = self.executor.submit(self._run, generation, load, on_result, on_error)
+
+    def _run(self, generation, load, on_result, on_error):
+        self._count("started")
+
+        def is_stale():
+            return generation != self.generation
+
+        try:
+            result = load(is_stale)
+        except Exception as e:
+            with self.deliver_lock:
+                if not is_stale() and on_error:
+                    on_error(e)
+            return
+
+        with self.deliver_lock:
+            if is_stale():
+                self._count("superseded")
+                return
+            on_result(result)
+            self._count("delivered")
+
+    def shutdown(self, wait=False):
+        """以降の読み込みを取り消す（wait=True なら実行中の読み込みが終わるまで待つ）"""
+        self.cancel()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,92 @@
+"""地域を素早く切り替えたときに、最後に選んだ地域だけが表示されるかを確かめるシミュレーション
+
+    python sim_rapid_select.py
+    SIM_DEBOUNCE=0 python sim_rapid_select.py   # 待たずに毎回読み込み、実行中の読み込みの破棄を確かめる
+
+手元の予報データ(lecture-6/fixtures)を、応答時間をばらつかせたスタブサーバー(jma_stub.py)から返し、
+WeatherApp で50回連続して地域を選び直す。古い結果が表示されたら終了コード1で終わる。
+"""
+import importlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from cache import ForecastCache
+from jma_stub import FORECAST_PREFIX, JMAStub
+
+SELECTIONS = 50
+
+
+def main():
+    stub = JMAStub(latency=100, jitter=100).start()
+
+    # アプリのモジュールを、ローカルサーバーとディスクを使わないキャッシュに向ける
+    app_module = importlib.import_module("課題")
+    app_module.FORECAST_URL = stub.base_url + FORECAST_PREFIX + "{}.json"
+    app_module.cache = ForecastCache(cache_dir=None)
+
+    app = app_module.WeatherApp()
+    app.scheduler.debounce = float(os.environ.get("SIM_DEBOUNCE", app.scheduler.debounce))
+    shown = []  # 表示された地域名（update が呼ばれた時点の status_text）
+    done = threading.Event()
+    app.update = lambda: shown.append(app.status_text.value)
+
+    stale = []  # 表示した時点で、もう選ばれていなかった地域
+    show_forecast = app.show_forecast
+    def record(result):
+        if result[0] != app.offices[app.area_select.value]["name"]:
+            stale.append(result[0])
+        show_forecast(result)
+        done.set()
+    app.show_forecast = record
+
+    codes = list(app.offices)
+    random.seed(1)
+    picks = [random.choice(codes) for _ in range(SELECTIONS)]
+
+    start = time.perf_counter()
+    longest = 0.0
+    for code in picks:
+        app.area_select.value = code
+        t = time.perf_counter()
+        app.fetch_and_display_weather(None)
+        longest = max(longest, time.perf_counter() - t)
+        time.sleep(random.uniform(0, 0.05))
+
+    done.wait(10)
+    time.sleep(0.5)  # 遅れて届く古い結果がないか少し待つ
+    elapsed = time.perf_counter() - start
+    stub.stop()
+    app.scheduler.shutdown()
+
+    last_name = app.offices[picks[-1]]["name"]
+    results = [s for s in shown if s.endswith("の週間天気")]
+    stats = app.scheduler.stats
+    print(json.dumps({
+        "selections": SELECTIONS,
+        "shown": results,
+        "stale": stale,
+        "scheduler": stats,
+        "longest_handler_ms": round(longest * 1000, 1),
+        "elapsed_s": round(elapsed, 2),
+    }, ensure_ascii=False))
+
+    ok = True
+    if not results or results[-1] != f"{last_name} の週間天気":
+        print(f"NG: 最後に表示されたのが {results[-1:] or 'なし'} で、{last_name} ではない")
+        ok = False
+    if stale:
+        print(f"NG: 選び直した後に古い地域が表示された {stale}")
+        ok = False
+    if longest > 0.05:
+        print(f"NG: 選択時の処理が {longest * 1000:.0f} ms かかっている（UIが止まる）")
+        ok = False
+    print("OK" if ok else "NG")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import json
+import os
+import time
+
+# 起動時間の計測を有効にする環境変数（例: WEATHER_STARTUP_PROFILE=1）
+PROFILE_ENV = "WEATHER_STARTUP_PROFILE"
+
+# モジュールを読み込んだ時点を起動の基準にする
+PROCESS_START = time.perf_counter()
+# この名前の時点がそろったら出力する
+REPORT_AFTER = ("first_frame", "interactive")
+
+
+class StartupTimer:
+    """最初の描画(TTFF)と操作可能になるまで(TTI)の時間を記録するクラス"""
+
+    def __init__(self, enabled=None, report_after=REPORT_AFTER):
+        if enabled is None:
+            enabled = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+        self.enabled = enabled
+        self.report_after = report_after
+        self.marks = {}
+        self.phases = {}  # 名前 -> かかった秒数（起動からではなく、その処理だけの時間）
+
+    def mark(self, name):
+        """最初の1回だけ、起動からの経過秒数を記録する"""
+        if not self.enabled or name in self.marks:
+            return
+        self.marks[name] = time.perf_counter() - PROCESS_START
+        # report_after の時点が全部そろったときに1回だけ出力する
+        if name in self.report_after and all(n in self.marks for n in self.report_after):
+            self.report()
+
+    def phase(self, name, seconds):
+        """起動中の1つの処理（ネットワークでの更新など）にかかった時間を記録する"""
+        if self.enabled:
+            self.phases.setdefault(name, seconds)
+
+    def report(self):
+        # 1行のJSONで出力しておけば、ログを集めて回帰を追いやすい
+        result = {name: round(sec * 1000, 1) for name, sec in self.marks.items()}
+        record = {"startup_ms": result}
+        if self.phases:
+            record["phase_ms"] = {name: round(sec * 1000, 1) for name, sec in self.phases.items()}
+        print(json.dumps(record, ensure_ascii=False))
+        return result
@@ -1,23 +1,88 @@
-import requests
+# 起動時間の基準(PROCESS_START)は startup を読み込んだ時点なので、flet などより先に読み込む
+from startup import StartupTimer
+import json
+import os
+import threading
+import time
 import flet as ft
 from datetime import datetime
+from cache import JMA_BASE, ForecastCache
+from cards import ForecastStrip
+from dashboard import DashboardView
+from forecast_parse import ForecastTable, RegionForecast
+from icons import icon_store
+from metrics import metrics
+from prefetch import ForecastPrefetcher
+from scheduler import LoadScheduler
 
 # 定数
-AREA_URL = "http://www.jma.go.jp/bosai/common/const/area.json"
-FORECAST_URL = "https://www.jma.go.jp/bosai/forecast/data/forecast/{}.json"
-ICON_URL = "https://www.jma.go.jp/bosai/forecast/img/{}.svg"
+AREA_URL = JMA_BASE + "/bosai/common/const/area.json"
+FORECAST_URL = JMA_BASE + "/bosai/forecast/data/forecast/{}.json"
 
 # 曜日変換用
 WEEKDAYS = ["月", "火", "水", "木", "金", "土", "日"]
+# 'YYYY-MM-DD' -> '1/7 (水)'（同じ日付は1回だけ変換する）
+DATE_LABELS = {}
 
-# エリアデータの取得
-try:
-    response = requests.get(AREA_URL)
-    raw_data = response.json()
-    offices_data = raw_data.get("offices", {})
-except Exception as e:
-    print(f"データ取得エラー: {e}")
-    offices_data = {}
+# 予報JSONのキャッシュ（再起動してもディスクから再利用される）
+cache = ForecastCache()
+# 地域一覧はほとんど変わらないので1日キャッシュする
+AREA_TTL = 24 * 60 * 60
+
+# 同梱している地域一覧のスナップショット（起動直後の仮表示用）
+AREA_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "area_snapshot.json")
+# 地域一覧の取得を再試行する回数
+AREA_RETRIES = 3
+
+# 地域一覧のネットワーク更新(areas_refreshed)も終わってから出力する
+startup_timer = StartupTimer(report_after=("first_frame", "interactive", "areas_refreshed"))
+
+
+def card_items(rows):
+    """(日付, 天気コード, 降水確率, 最低, 最高) の並びをカードに渡す形にする"""
+    items = []
+    for day, code, pop, t_min, t_max in rows:
+        # 日付のパース
+        date_str = DATE_LABELS.get(day)
+        if date_str is None:
+            dt = datetime.fromisoformat(day)
+            date_str = DATE_LABELS[day] = f"{dt.month}/{dt.day} ({WEEKDAYS[dt.weekday()]})"
+
+        # 欠損値は "-" で表示する
+        items.append((
+            date_str,
+            code,
+            "-" if pop is None else f"{pop}%",
+            "-" if t_min is None else t_min,
+            "-" if t_max is None else t_max,
+        ))
+    return items
+
+
+def load_area_snapshot():
+    """ネットワークを使わずに地域一覧を返す（キャッシュ優先、なければ同梱スナップショット）"""
+    raw_data = cache.peek_stale(AREA_URL)
+    if raw_data is None:
+        try:
+            with open(AREA_SNAPSHOT, encoding="utf-8") as f:
+                raw_data = json.load(f)
+        except (OSError, ValueError) as e:
+            metrics.error("スナップショット読み込みエラー", e)
+            raw_data = {}
+    return raw_data.get("offices", {})
+
+
+def fetch_area_data():
+    """地域一覧をネットワークから取得する（失敗したら間隔をあけて再試行）"""
+    for attempt in range(AREA_RETRIES):
+        try:
+            raw_data = cache.get_json(AREA_URL, ttl=AREA_TTL)
+            return raw_data.get("offices", {})
+        except Exception as e:
+            metrics.error("データ取得エラー", e, f"({attempt + 1}回目)")
+            if attempt + 1 < AREA_RETRIES:
+                time.sleep(2 ** attempt)
+    return None
 
 class WeatherApp(ft.Container):
     def __init__(self):
@@ -27,139 +92,235 @@ class WeatherApp(ft.Container):
         self.bgcolor = ft.Colors.LIGHT_BLUE_50
         self.border_radius = 15
         
-        # 週間予報を表示する横スクロールエリア
-        self.forecast_row = ft.Row(
-            spacing=10,
-            scroll=ft.ScrollMode.AUTO, # 横スクロールを有効化
-        )
+        # 週間予報を表示する横スクロールエリア（カードは使い回し、見えている分だけ描画）
+        self.forecast_row = ForecastStrip()
 
+        # まず手元のスナップショットで表示し、最新の一覧は裏で取得する
+        self.offices = load_area_snapshot()
         self.area_select = AreaSelect(
             on_area_changed=self.fetch_and_display_weather,
-            data_json=offices_data
+            data_json=self.offices
+        )
+
+        # 選んだ地域の予報JSONに含まれる区域・観測点（ダウンロードし直さずに切り替えられる）
+        self.regions = None
+        self.point_select = ft.Dropdown(
+            label="区域・観測点",
+            width=220,
+            visible=False,
+            on_change=self.display_point,
         )
 
         self.status_text = ft.Text("地域を選択してください", size=16, color=ft.Colors.GREY_700)
+        self.prefetch_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
+
+        # 全地域の予報を並列に先読みしておき、選択時はメモリから表示する
+        self.prefetcher = ForecastPrefetcher(FORECAST_URL, self.offices.keys(), cache=cache)
+        self.cache_text = ft.Text(cache.summary(), size=12, color=ft.Colors.GREY_600)
+
+        # 予報の読み込みはUIスレッドの外で行い、最後に選んだ地域の結果だけを表示する
+        self.scheduler = LoadScheduler()
+
+        # 先読みした全地域（または比較に追加した地域）を並べて見るビュー
+        self.dashboard = DashboardView(on_refresh=self.refresh_dashboard)
+
+        self.tabs = ft.Tabs(
+            selected_index=0,
+            height=420,
+            on_change=self.on_tab_changed,
+            tabs=[
+                ft.Tab(
+                    text="週間予報",
+                    content=ft.Column(
+                        controls=[
+                            self.status_text,
+                            ft.Container(
+                                content=self.forecast_row,
+                                padding=10,
+                                height=280, # カードの高さ確保
+                            )
+                        ],
+                        horizontal_alignment=ft.CrossAxisAlignment.CENTER
+                    ),
+                ),
+                ft.Tab(text="全国一覧", content=ft.Container(content=self.dashboard, padding=10)),
+            ],
+        )
 
         self.content = ft.Column(
             controls=[
                 ft.Text("週間天気予報アプリ", size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_GREY_800),
-                self.area_select,
+                ft.Row(
+                    controls=[
+                        self.area_select,
+                        self.point_select,
+                        ft.IconButton(
+                            icon=ft.Icons.ADD_CHART,
+                            tooltip="全国一覧で比較する",
+                            on_click=lambda e: self.dashboard.add_compare(self.area_select.value),
+                        ),
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER
+                ),
+                self.prefetch_text,
+                self.cache_text,
                 ft.Divider(),
-                self.status_text,
-                ft.Container(
-                    content=self.forecast_row,
-                    padding=10,
-                    height=280, # カードの高さ確保
-                )
+                self.tabs,
             ],
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
         )
 
+    def update(self):
+        # 画面への反映にかかる時間も計測する（WEATHER_METRICS=1 のとき）
+        with metrics.span("ui_update"):
+            super().update()
+
+    def did_mount(self):
+        # ページに追加されたら、地域一覧の更新と先読みを裏で始める
+        self.prefetch_text.value = "地域一覧を更新中..."
+        self.prefetch_text.update()
+        threading.Thread(target=self.refresh_areas, daemon=True).start()
+
+    def refresh_areas(self):
+        # 画面はスナップショットで操作できるので、ネットワークでの更新（再試行を含む）は別の段階として測る
+        start = time.perf_counter()
+        offices = fetch_area_data()
+        startup_timer.phase("area_refresh", time.perf_counter() - start)
+        startup_timer.mark("areas_refreshed")
+        if offices:
+            self.offices = offices
+            self.area_select.data_json = offices
+            self.area_select.options = self.area_select.get_area_options()
+            self.area_select.update()
+            self.prefetcher.area_codes = list(offices.keys())
+        elif not self.offices:
+            self.prefetch_text.value = "地域一覧を取得できませんでした（再起動して再試行してください）"
+            self.prefetch_text.update()
+            return
+        # スナップショットがなく、一覧がここで初めてそろったときは今が操作可能になった時点
+        startup_timer.mark("interactive")
+
+        self.prefetch_text.value = self.prefetcher.summary()
+        self.prefetch_text.update()
+        self.prefetcher.start(on_done=self.on_prefetch_done)
+
+    def on_prefetch_done(self, prefetcher):
+        self.prefetch_text.value = prefetcher.summary()
+        self.prefetch_text.update()
+
+        # 先読みした予報に出てくる天気コードのアイコンを保存しておく
+        codes = set()
+        for data in list(prefetcher.results.values()):
+            for weekly_data in data:
+                for series in weekly_data.get("timeSeries", []):
+                    for area in series.get("areas", []):
+                        codes.update(area.get("weatherCodes", []))
+        icon_store.preload_async(codes)
+
+        if self.tabs.selected_index == 1:
+            self.show_dashboard()
+
+    def on_tab_changed(self, e):
+        if self.tabs.selected_index == 1:
+            self.show_dashboard()
+
+    def refresh_dashboard(self):
+        """全地域を並列に取り直す（終わったら on_prefetch_done から再表示される）"""
+        if self.prefetcher.thread is None or not self.prefetcher.thread.is_alive():
+            self.prefetch_text.value = "全地域を再取得中..."
+            self.prefetch_text.update()
+            self.prefetcher.start(on_done=self.on_prefetch_done)
+
+    def show_dashboard(self):
+        """先読み済みの予報をダッシュボード用の行にまとめて渡す"""
+        table = ForecastTable.from_payloads(sorted(list(self.prefetcher.results.items())))
+        for code, ex in table.errors.items():
+            metrics.error("解析エラー", ex, code)
+        rows = [
+            (code, self.offices.get(code, {}).get("name", code), day, weather_code, t_max, t_min, pop)
+            for code, _, day, weather_code, t_max, t_min, pop, _ in table.rows()
+        ]
+        self.dashboard.set_rows(rows)
+
     def fetch_and_display_weather(self, e):
         area_code = self.area_select.value
         if not area_code:
             return
 
-        area_name = offices_data[area_code]["name"]
+        area_name = self.offices[area_code]["name"]
         
-        # リセット＆読み込み中表示
-        self.forecast_row.controls.clear()
+        # 先読み済み(キャッシュの期限内)ならネットワークを待たずにすぐ表示する
+        url = FORECAST_URL.format(area_code)
+        data = cache.peek(url)
+        if data is not None:
+            # スケジューラーを通して反映するので、前に選んだ地域の読み込みが後から届いても表示しない
+            self.scheduler.run_now(
+                lambda is_stale: (area_name, self.parse_forecast(area_code, data), RegionForecast(area_code, data)),
+                on_result=self.show_forecast,
+                on_error=self.show_error,
+            )
+            return
+
+        # 読み込み中表示
         self.status_text.value = f"{area_name} のデータを取得中..."
-        self.forecast_row.controls.append(ft.ProgressRing())
+        self.forecast_row.show_message(ft.ProgressRing())
+        self.set_regions(None)
         self.update()
 
-        try:
-            url = FORECAST_URL.format(area_code)
-            res = requests.get(url)
-            data = res.json()
-            
-            # data[1] が週間予報のデータを持っていることが多い
-            # （地域やタイミングによってはdata[0]しかない場合もあるので簡易チェック）
-            if len(data) > 1:
-                weekly_data = data[1]
-            else:
-                weekly_data = data[0]
-
-            # --- データの抽出 ---
-            # 1. 天気コードと日付
-            time_series_weather = weekly_data["timeSeries"][0]
-            dates = time_series_weather["timeDefines"]
-            area_weather = time_series_weather["areas"][0]
-            weather_codes = area_weather["weatherCodes"]
-            pops = area_weather.get("pops", []) # 降水確率
-
-            # 2. 気温（最低・最高）
-            temps_min = []
-            temps_max = []
-            if len(weekly_data["timeSeries"]) > 1:
-                time_series_temp = weekly_data["timeSeries"][1]
-                area_temp = time_series_temp["areas"][0]
-                temps_min = area_temp.get("tempsMin", [])
-                temps_max = area_temp.get("tempsMax", [])
-
-            # ローディング消去
-            self.forecast_row.controls.clear()
-            self.status_text.value = f"{area_name} の週間天気"
-
-            # --- カードの作成ループ ---
-            for i in range(len(weather_codes)):
-                # 日付のパース
-                dt = datetime.fromisoformat(dates[i])
-                date_str = f"{dt.month}/{dt.day} ({WEEKDAYS[dt.weekday()]})"
-                
-                code = weather_codes[i]
-                pop = pops[i] + "%" if i < len(pops) and pops[i] else "-"
-                
-                # 気温（データ数が合わないことがあるため安全に取得）
-                t_min = temps_min[i] if i < len(temps_min) and temps_min[i] else "-"
-                t_max = temps_max[i] if i < len(temps_max) and temps_max[i] else "-"
-                
-                # カードを作成して追加
-                card = self.create_daily_card(date_str, code, pop, t_min, t_max)
-                self.forecast_row.controls.append(card)
-
-        except Exception as ex:
-            self.status_text.value = "情報の取得に失敗しました"
-            self.forecast_row.controls.append(ft.Text(f"エラー詳細: {ex}", color=ft.Colors.RED))
-        
+        def load(is_stale):
+            data = cache.get_json(url)
+            if is_stale():
+                # もう別の地域が選ばれているので解析しない
+                return None
+            return area_name, self.parse_forecast(area_code, data), RegionForecast(area_code, data)
+
+        self.scheduler.submit(load, on_result=self.show_forecast, on_error=self.show_error)
+
+    def parse_forecast(self, area_code, data):
+        """予報JSONからカードに渡すデータのリストを作る"""
+        with metrics.span("forecast_parse"):
+            table = ForecastTable()
+            table.add(area_code, data)
+            return card_items((day, code, pop, t_min, t_max)
+                              for _, _, day, code, t_max, t_min, pop, _ in table.rows(area_code))
+
+    def show_forecast(self, result):
+        """読み込み結果をカードに反映する（最新の選択の結果だけが渡される）"""
+        area_name, items, regions = result
+        self.status_text.value = f"{area_name} の週間天気"
+        # 既存のカードに中身を割り当てる（ローディング表示もここで消える）
+        self.forecast_row.set_items(items)
+        self.set_regions(regions)
+        self.cache_text.value = cache.summary()
         self.update()
 
-    def create_daily_card(self, date_text, weather_code, pop, t_min, t_max):
-        """1日分の情報を表示するカードUIを作成する関数"""
-        return ft.Container(
-            width=100,
-            padding=10,
-            bgcolor=ft.Colors.WHITE,
-            border_radius=10,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=5,
-                color=ft.Colors.BLUE_GREY_100,
-            ),
-            content=ft.Column(
-                controls=[
-                    ft.Text(date_text, weight=ft.FontWeight.BOLD, size=14, text_align=ft.TextAlign.CENTER),
-                    ft.Divider(height=5),
-                    ft.Image(
-                        src=ICON_URL.format(weather_code),
-                        width=50, height=50,
-                        fit=ft.ImageFit.CONTAIN
-                    ),
-                    ft.Text(f"降水 {pop}", size=12, color=ft.Colors.BLUE),
-                    ft.Divider(height=5),
-                    ft.Row(
-                        controls=[
-                            ft.Text(f"{t_max}℃", color=ft.Colors.RED, size=12),
-                            ft.Text("/", size=12),
-                            ft.Text(f"{t_min}℃", color=ft.Colors.BLUE, size=12),
-                        ],
-                        alignment=ft.MainAxisAlignment.CENTER
-                    )
-                ],
-                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                alignment=ft.MainAxisAlignment.START
-            )
-        )
+    def set_regions(self, regions):
+        """区域・観測点の選択肢を作り直す（1つしかなければ隠す）"""
+        self.regions = regions
+        points = regions.points() if regions else []
+        self.point_select.options = [
+            ft.dropdown.Option(key=code, text=f"{name}（{'区域' if kind == 'region' else '観測点'}）")
+            for code, name, kind in points
+        ]
+        self.point_select.value = None
+        self.point_select.visible = len(points) > 1
+
+    def display_point(self, e):
+        """選んだ区域・観測点の予報を、手元の予報JSONから表示する（短期予報も含む）"""
+        code = self.point_select.value
+        if not code or self.regions is None:
+            return
+        self.status_text.value = f"{self.regions.names[code]} の天気"
+        self.forecast_row.set_items(card_items(self.regions.daily(code)))
+        self.update()
+
+    def show_error(self, ex):
+        metrics.error("予報の取得エラー", ex, self.area_select.value)
+        self.set_regions(None)
+        self.status_text.value = "情報の取得に失敗しました"
+        self.forecast_row.show_message(ft.Text(f"エラー詳細: {ex}", color=ft.Colors.RED))
+        self.cache_text.value = cache.summary()
+        self.update()
 
 class AreaSelect(ft.Dropdown):
     def __init__(self, on_area_changed, data_json):
@@ -184,6 +345,10 @@ def main(page: ft.Page):
     
     app = WeatherApp()
     page.add(app)
+    startup_timer.mark("first_frame")
+    # スナップショットの地域一覧で描画できていれば、もう地域を選べる
+    if app.offices:
+        startup_timer.mark("interactive")
 
 if __name__ == "__main__":
     ft.app(target=main)
\ No newline at end of file
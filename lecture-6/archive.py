@@ -0,0 +1,85 @@
+"""forecast_archive（発表ごとの予報履歴）を検索・集計する関数
+
+集計はすべてSQLiteの中で行い、Python側には結果の行だけを返す。
+"""
+from datetime import date, timedelta
+
+# 対象日ごとに最新の発表だけを残す
+# （SQLiteでは MAX() と一緒に選んだ列は、最大値を持つ行の値になる）
+LATEST_PER_DATE_SQL = """
+SELECT target_date, MAX(issued_at) AS issued_at, weather_code, temp_max, temp_min, pop,
+       COUNT(*) AS runs
+FROM forecast_archive
+WHERE area_code = ? AND target_date BETWEEN ? AND ?
+GROUP BY target_date
+ORDER BY target_date
+"""
+
+SUMMARY_SQL = f"""
+SELECT COUNT(*) AS days,
+       MIN(temp_min) AS min_temp,
+       MAX(temp_max) AS max_temp,
+       AVG(temp_max) AS avg_max,
+       AVG(temp_min) AS avg_min,
+       AVG(pop) AS avg_pop
+FROM ({LATEST_PER_DATE_SQL})
+"""
+
+# 降水確率の推移（週ごと・月ごとの平均）
+POP_TREND_SQL = {
+    "week": f"""
+        SELECT MIN(target_date) AS bucket, AVG(pop) AS avg_pop, COUNT(pop) AS days
+        FROM ({LATEST_PER_DATE_SQL})
+        GROUP BY strftime('%Y-%W', target_date)
+        ORDER BY bucket
+    """,
+    "month": f"""
+        SELECT strftime('%Y-%m', target_date) AS bucket, AVG(pop) AS avg_pop, COUNT(pop) AS days
+        FROM ({LATEST_PER_DATE_SQL})
+        GROUP BY bucket
+        ORDER BY bucket
+    """,
+}
+
+REVISIONS_SQL = """
+SELECT issued_at, weather_code, temp_max, temp_min, pop
+FROM forecast_archive
+WHERE area_code = ? AND target_date = ?
+ORDER BY issued_at
+"""
+
+LATEST_DATE_SQL = "SELECT MAX(target_date) FROM forecast_archive WHERE area_code = ?"
+
+
+def latest_target_date(conn, area_code):
+    """その地域で履歴がある一番新しい対象日（なければ None）"""
+    value = conn.execute(LATEST_DATE_SQL, (area_code,)).fetchone()[0]
+    return date.fromisoformat(value) if value else None
+
+
+def period(conn, area_code, days):
+    """最新の対象日から days 日さかのぼった (開始日, 終了日) を返す"""
+    end = latest_target_date(conn, area_code)
+    if end is None:
+        return None
+    return (end - timedelta(days=days - 1)).isoformat(), end.isoformat()
+
+
+def latest_forecasts(conn, area_code, start, end):
+    """期間内の対象日ごとに、最新の発表の予報と発表回数を返す"""
+    return conn.execute(LATEST_PER_DATE_SQL, (area_code, start, end)).fetchall()
+
+
+def summary(conn, area_code, start, end):
+    """期間内の最低・最高・平均気温と平均降水確率"""
+    return conn.execute(SUMMARY_SQL, (area_code, start, end)).fetchone()
+
+
+def pop_trend(conn, area_code, start, end, bucket="week"):
+    """降水確率の平均を週または月ごとにまとめて返す"""
+    return conn.execute(POP_TREND_SQL[bucket], (area_code, start, end)).fetchall()
+
+
+def revisions(conn, area_code, target_date):
+    """ある対象日の予報が発表ごとにどう変わったか"""
+    return conn.execute(REVISIONS_SQL, (area_code, target_date)).fetchall()
@@ -0,0 +1,112 @@
+import os
+import sys
+
+import flet as ft
+
+import archive
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+from metrics import metrics
+
+# 選べる期間（日数）
+PERIODS = [30, 90, 365]
+
+
+class ArchiveView(ft.Column):
+    """forecast_archive の履歴を地域ごとに集計して表示するビュー"""
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+        self.area_code = None
+        self.spacing = 8
+
+        self.period_select = ft.Dropdown(
+            label="期間",
+            width=150,
+            value=str(PERIODS[0]),
+            options=[ft.dropdown.Option(key=str(d), text=f"直近{d}日") for d in PERIODS],
+            on_change=lambda e: self.load(),
+        )
+        self.summary_text = ft.Text("地域を選択してください", size=14, color=ft.Colors.GREY_700)
+        # 降水確率の推移（週ごとの平均をバーで表示）
+        self.trend_column = ft.Column(spacing=2)
+        # 対象日ごとの最新予報。タップするとその日の予報の変遷を表示する
+        self.days_list = ft.ListView(height=150, spacing=2)
+        self.revision_text = ft.Text("", size=12, color=ft.Colors.BLUE_GREY_700)
+
+        self.controls = [
+            self.period_select,
+            self.summary_text,
+            ft.Text("降水確率の推移（週平均）", size=12, weight=ft.FontWeight.BOLD),
+            self.trend_column,
+            ft.Divider(height=5),
+            self.days_list,
+            self.revision_text,
+        ]
+
+    def show_area(self, area_code):
+        self.area_code = area_code
+        self.load()
+
+    def load(self):
+        if not self.area_code:
+            return
+        self.trend_column.controls.clear()
+        self.days_list.controls.clear()
+        self.revision_text.value = ""
+
+        try:
+            with self.db.reader() as conn:
+                days = int(self.period_select.value)
+                span = archive.period(conn, self.area_code, days)
+                if span is None:
+                    self.summary_text.value = "履歴データがありません（ingest.py で取り込んでください）"
+                else:
+                    start, end = span
+                    s = archive.summary(conn, self.area_code, start, end)
+                    self.summary_text.value = (
+                        f"{start} 〜 {end}（{s[0]}日分） 最高 {fmt(s[2])}℃ / 最低 {fmt(s[1])}℃  "
+                        f"平均 {fmt(s[3], 1)}℃ / {fmt(s[4], 1)}℃  降水確率平均 {fmt(s[5])}%"
+                    )
+                    for bucket, avg_pop, _ in archive.pop_trend(conn, self.area_code, start, end):
+                        self.trend_column.controls.append(self.create_trend_bar(bucket, avg_pop))
+                    for row in archive.latest_forecasts(conn, self.area_code, start, end):
+                        self.days_list.controls.append(self.create_day_row(row))
+        except Exception as ex:
+            self.summary_text.value = f"履歴の読み込みに失敗しました（{ex}）"
+            metrics.count("archive_errors")
+        self.update()
+
+    def show_revisions(self, target_date):
+        with self.db.reader() as conn:
+            rows = archive.revisions(conn, self.area_code, target_date)
+        lines = [
+            f"{issued_at[5:16].replace('T', ' ')} 発表: 天気 {code}  {fmt(t_max)}℃ / {fmt(t_min)}℃  降水 {fmt(pop)}%"
+            for issued_at, code, t_max, t_min, pop in rows
+        ]
+        self.revision_text.value = f"{target_date} の予報の変遷\n" + "\n".join(lines)
+        self.update()
+
+    def create_trend_bar(self, bucket, avg_pop):
+        return ft.Row(
+            controls=[
+                ft.Text(bucket, size=11, width=90),
+                ft.ProgressBar(value=(avg_pop or 0) / 100, width=300, color=ft.Colors.BLUE),
+                ft.Text(f"{fmt(avg_pop)}%", size=11),
+            ]
+        )
+
+    def create_day_row(self, row):
+        target_date, _, code, t_max, t_min, pop, runs = row
+        return ft.TextButton(
+            text=f"{target_date}  天気 {code}  {fmt(t_max)}℃ / {fmt(t_min)}℃  降水 {fmt(pop)}%  （発表 {runs}回）",
+            on_click=lambda e: self.show_revisions(target_date),
+        )
+
+
+def fmt(value, digits=0):
+    """NULL は '-'、数値は指定桁で丸めた文字列にする"""
+    if value is None:
+        return "-"
+    return f"{value:.{digits}f}"
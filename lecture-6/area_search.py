@@ -0,0 +1,222 @@
+"""地域名・よみ・コードから地域を探す検索索引（weather.db の area_index / area_grams）
+
+    python area_search.py weather.db 東京      # 索引を作って検索してみる
+
+索引は area.json(offices / class10s / class15s / class20s)から1回だけ作り、weather.db に保存する。
+検索は1文字・2文字の n-gram の転置索引で候補を絞り、部分一致を確かめてから並べ替える。
+一致するものがなければ、n-gram が多く重なるものを「あいまい一致」として返す。
+"""
+import hashlib
+import json
+import sys
+import time
+import unicodedata
+
+# area.json の階層（上から順に。予報は offices の単位で持っている）
+LEVELS = ["offices", "class10s", "class15s", "class20s"]
+LEVEL_NAMES = {"offices": "office", "class10s": "class10", "class15s": "class15", "class20s": "class20"}
+LEVEL_ORDER = {"office": 0, "class10": 1, "class15": 2, "class20": 3}
+LEVEL_LABELS = {"office": "府県", "class10": "地域", "class15": "地域", "class20": "市町村"}
+
+# area.json の offices には「よみ」がないので、府県予報区の名前によく出る語の読みを持っておく
+READINGS = {
+    "宗谷": "そうや", "上川": "かみかわ", "留萌": "るもい", "網走": "あばしり", "北見": "きたみ",
+    "紋別": "もんべつ", "十勝": "とかち", "釧路": "くしろ", "根室": "ねむろ", "胆振": "いぶり",
+    "日高": "ひだか", "石狩": "いしかり", "空知": "そらち", "後志": "しりべし", "渡島": "おしま",
+    "檜山": "ひやま", "青森": "あおもり", "岩手": "いわて", "宮城": "みやぎ", "秋田": "あきた",
+    "山形": "やまがた", "福島": "ふくしま", "茨城": "いばらき", "栃木": "とちぎ", "群馬": "ぐんま",
+    "埼玉": "さいたま", "千葉": "ちば", "東京": "とうきょう", "神奈川": "かながわ", "新潟": "にいがた",
+    "富山": "とやま", "石川": "いしかわ", "福井": "ふくい", "山梨": "やまなし", "長野": "ながの",
+    "岐阜": "ぎふ", "静岡": "しずおか", "愛知": "あいち", "三重": "みえ", "滋賀": "しが",
+    "京都": "きょうと", "大阪": "おおさか", "兵庫": "ひょうご", "奈良": "なら", "和歌山": "わかやま",
+    "鳥取": "とっとり", "島根": "しまね", "岡山": "おかやま", "広島": "ひろしま", "山口": "やまぐち",
+    "徳島": "とくしま", "香川": "かがわ", "愛媛": "えひめ", "高知": "こうち", "福岡": "ふくおか",
+    "佐賀": "さが", "長崎": "ながさき", "熊本": "くまもと", "大分": "おおいた", "宮崎": "みやざき",
+    "鹿児島": "かごしま", "奄美": "あまみ", "沖縄本島": "おきなわほんとう", "大東島": "だいとうじま",
+    "宮古島": "みやこじま", "八重山": "やえやま", "北海道": "ほっかいどう", "沖縄": "おきなわ",
+}
+
+
+def guess_kana(name):
+    """READINGS の語を見つけたところだけ読みに置き換える（'網走・北見地方' -> 'あばしり・きたみ'）"""
+    parts = []
+    i = 0
+    while i < len(name):
+        for length in (4, 3, 2):
+            reading = READINGS.get(name[i:i + length])
+            if reading:
+                parts.append(reading)
+                i += length
+                break
+        else:
+            # 読みの分からない文字は区切りとして残す
+            if not parts or parts[-1] != "・":
+                parts.append("・")
+            i += 1
+    return "".join(parts).strip("・")
+
+
+# 検索で無視する記号
+IGNORED = str.maketrans("", "", " ・･　-_()（）")
+# あいまい一致とみなす n-gram の重なりの割合
+FUZZY_RATIO = 0.6
+
+INSERT_INDEX_SQL = "INSERT INTO area_index (code, name, level, office_code, search_text) VALUES (?, ?, ?, ?, ?)"
+INSERT_GRAM_SQL = "INSERT OR IGNORE INTO area_grams (gram, code) VALUES (?, ?)"
+SOURCE_SQL = "SELECT value FROM search_meta WHERE key = 'source'"
+SAVE_SOURCE_SQL = "INSERT OR REPLACE INTO search_meta (key, value) VALUES ('source', ?)"
+
+# すべての n-gram を含む地域（HAVING の個数は呼び出し側で埋める）
+MATCH_SQL = """
+SELECT i.code, i.name, i.level, i.office_code, i.search_text, COUNT(*) AS hits
+FROM area_grams g JOIN area_index i ON i.code = g.code
+WHERE g.gram IN ({marks})
+GROUP BY g.code
+HAVING hits >= ?
+"""
+
+
+def normalize(text):
+    """全角半角・大文字小文字・カタカナひらがなの違いをなくす（'トウキョウ' -> 'とうきょう'）"""
+    text = unicodedata.normalize("NFKC", text or "").lower().translate(IGNORED)
+    # カタカナ(ァ〜ヶ)をひらがなにずらす
+    return "".join(chr(ord(c) - 0x60) if "ァ" <= c <= "ヶ" else c for c in text)
+
+
+def grams(text):
+    """1文字と2文字の n-gram の集合"""
+    result = set(text)
+    result.update(text[i:i + 2] for i in range(len(text) - 1))
+    return result
+
+
+def query_grams(query):
+    """検索語の n-gram（2文字以上なら2文字のものだけで十分に絞れる）"""
+    if len(query) < 2:
+        return set(query)
+    return {query[i:i + 2] for i in range(len(query) - 1)}
+
+
+def iter_areas(area_data):
+    """area.json から (コード, 名前, 階層, 府県予報区コード, 検索用の文字列) を返す
+
+    実際の area.json では同じコードが複数の階層に出てくる（011000 宗谷地方は offices にも class10s にもある）。
+    コードごとに1件だけ、上の階層（予報を持つ offices に近い方）のものを返す。
+    """
+    parents = {}
+    for level in LEVELS:
+        for code, info in area_data.get(level, {}).items():
+            parents.setdefault(code, (level, info.get("parent")))
+
+    def office_of(code):
+        # 親をたどって offices の階層まで上がる
+        for _ in range(len(LEVELS)):
+            level, parent = parents.get(code, (None, None))
+            if level == "offices" or parent is None:
+                return code
+            code = parent
+        return code
+
+    seen = set()
+    for level in LEVELS:
+        for code, info in area_data.get(level, {}).items():
+            if code in seen:
+                continue
+            seen.add(code)
+            name = info.get("name", code)
+            fields = [name, info.get("kana") or guess_kana(name), info.get("enName", ""), code]
+            search_text = "\n".join(normalize(f) for f in fields if f)
+            yield code, name, LEVEL_NAMES[level], office_of(code), search_text
+
+
+def source_hash(area_data):
+    return hashlib.sha1(json.dumps(area_data, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def build(conn, area_data, force=False):
+    """area.json から索引を作り直す（同じ内容から作成済みなら何もしない）。登録した地域数を返す"""
+    digest = source_hash(area_data)
+    row = conn.execute(SOURCE_SQL).fetchone()
+    if not force and row is not None and row[0] == digest:
+        return None
+
+    areas = list(iter_areas(area_data))
+    with conn:
+        conn.execute("DELETE FROM area_index")
+        conn.execute("DELETE FROM area_grams")
+        conn.executemany(INSERT_INDEX_SQL, areas)
+        # n-gram が欄をまたがないように、欄ごとに作る
+        conn.executemany(INSERT_GRAM_SQL, (
+            (gram, code)
+            for code, _, _, _, search_text in areas
+            for field in search_text.split("\n")
+            for gram in grams(field)
+        ))
+        conn.execute(SAVE_SOURCE_SQL, (digest,))
+    return len(areas)
+
+
+def rank(query, row):
+    """並び順: 名前が一致 > 前方一致 > 部分一致、その後に府県 > 地域 > 市町村、名前の短い順"""
+    code, name, level, _, search_text = row[:5]
+    fields = search_text.split("\n")
+    if query in (fields[0], code):
+        match = 0
+    elif any(f.startswith(query) for f in fields):
+        match = 1
+    else:
+        match = 2
+    return match, LEVEL_ORDER.get(level, 9), len(name), code
+
+
+def search(conn, query, limit=20):
+    """(コード, 名前, 階層, 府県予報区コード, あいまい一致か) のリストを返す"""
+    query = normalize(query)
+    if not query:
+        return []
+    wanted = query_grams(query)
+    sql = MATCH_SQL.format(marks=",".join("?" * len(wanted)))
+
+    # 1. すべての n-gram を含み、実際に部分一致するもの
+    rows = conn.execute(sql, (*wanted, len(wanted))).fetchall()
+    exact = sorted((r for r in rows if query in r[4]), key=lambda r: rank(query, r))
+    results = [(r[0], r[1], r[2], r[3], False) for r in exact[:limit]]
+
+    # 2. 足りなければ、n-gram が多く重なるものをあいまい一致として足す
+    #    （コードは "00" などの n-gram がほぼすべての地域に出てくるので、数字だけの検索では行わない）
+    if len(results) < limit and len(wanted) > 1 and not query.isdigit():
+        seen = {r[0] for r in results}
+        need = max(1, int(len(wanted) * FUZZY_RATIO))
+        rows = conn.execute(sql, (*wanted, need)).fetchall()
+        fuzzy = sorted((r for r in rows if r[0] not in seen), key=lambda r: (-r[5], rank(query, r)))
+        results += [(r[0], r[1], r[2], r[3], True) for r in fuzzy[:limit - len(results)]]
+    return results
+
+
+def main():
+    import schema
+
+    db_name = sys.argv[1] if len(sys.argv) > 1 else schema.DB_NAME
+    query = sys.argv[2] if len(sys.argv) > 2 else "東京"
+    conn = schema.connect(db_name)
+
+    # 索引のもとには weather.db の地域一覧を使う（area.json を指定されればそちら）
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], encoding="utf-8") as f:
+            area_data = json.load(f)
+    else:
+        area_data = {"offices": {code: {"name": name} for code, name in conn.execute("SELECT area_code, name FROM areas")}}
+    count = build(conn, area_data)
+    print("索引は作成済みです" if count is None else f"{count}地域の索引を作りました")
+
+    start = time.perf_counter()
+    results = search(conn, query)
+    elapsed = (time.perf_counter() - start) * 1000
+    for code, name, level, office_code, fuzzy in results:
+        print(f"  {code} {name} ({LEVEL_LABELS[level]}, 予報: {office_code}){' ※あいまい' if fuzzy else ''}")
+    print(f"{len(results)}件 {elapsed:.2f} ms")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
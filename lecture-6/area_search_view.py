@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+
+import flet as ft
+
+from area_search import LEVEL_LABELS
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+from metrics import metrics
+
+
+class AreaSearchBox(ft.Column):
+    """地域名・よみ・コードを入力すると候補を絞り込んで表示する検索ボックス
+
+    選んだ地域の予報を持つ府県予報区のコードが value に入る（ドロップダウンの代わりに使える）。
+    """
+
+    def __init__(self, search, on_select=None, width=300, limit=20):
+        super().__init__()
+        self.search = search  # (検索語, 件数) -> area_search.search の結果
+        self.on_select = on_select
+        self.limit = limit
+        self.value = None
+        self.width = width
+        self.spacing = 2
+
+        self.field = ft.TextField(
+            label="地域を検索（例: 東京 / よこはま / 130000）",
+            width=width,
+            dense=True,
+            prefix_icon=ft.Icons.SEARCH,
+            on_change=self.on_query_changed,
+            on_submit=self.on_submit,
+        )
+        self.info_text = ft.Text("", size=11, color=ft.Colors.GREY_600)
+        # 候補は入力中だけ表示する
+        self.result_list = ft.ListView(height=200, spacing=0, visible=False)
+        self.results = []
+
+        self.controls = [self.field, self.info_text, self.result_list]
+
+    def on_query_changed(self, e):
+        query = self.field.value.strip()
+        self.result_list.controls.clear()
+        if not query:
+            self.results = []
+            self.info_text.value = ""
+            self.result_list.visible = False
+            self.update()
+            return
+
+        try:
+            start = time.perf_counter()
+            self.results = self.search(query, self.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.info_text.value = f"{len(self.results)}件（{elapsed:.1f} ms）"
+        except Exception as ex:
+            self.results = []
+            self.info_text.value = f"検索に失敗しました（{ex}）"
+            metrics.count("search_errors")
+
+        for result in self.results:
+            self.result_list.controls.append(self.create_result_row(result))
+        self.result_list.visible = bool(self.results)
+        self.update()
+
+    def on_submit(self, e):
+        # Enter で先頭の候補を選ぶ
+        if self.results:
+            self.select(self.results[0])
+
+    def create_result_row(self, result):
+        code, name, level, office_code, fuzzy = result
+        label = LEVEL_LABELS.get(level, level)
+        return ft.ListTile(
+            dense=True,
+            title=ft.Text(name, size=14, italic=fuzzy),
+            subtitle=ft.Text(f"{label}・{code}" + ("・あいまい一致" if fuzzy else ""), size=11),
+            on_click=lambda e: self.select(result),
+        )
+
+    def select(self, result):
+        code, name, level, office_code, _ = result
+        self.value = office_code
+        self.field.value = name
+        self.info_text.value = "" if code == office_code else f"予報は府県予報区 {office_code} のものです"
+        self.result_list.controls.clear()
+        self.result_list.visible = False
+        self.results = []
+        self.update()
+        if self.on_select:
+            self.on_select(office_code)
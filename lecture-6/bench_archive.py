@@ -0,0 +1,73 @@
+"""forecast_archive の検索・集計が数百万行でも100ms未満に収まるかを確かめるベンチマーク
+
+    python bench_archive.py --areas 100 --days 730 --runs 14
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import archive
+import schema
+
+
+def generate_rows(n_areas, n_days, n_runs):
+    """対象日ごとに n_runs 回の発表（12時間おき）があったものとして履歴を作る"""
+    rnd = random.Random(0)
+    start = date(2024, 1, 1)
+    for a in range(n_areas):
+        code = f"{a:06d}"
+        for d in range(n_days):
+            target = start + timedelta(days=d)
+            base_min = rnd.randint(-10, 25)
+            for r in range(n_runs):
+                issued = datetime(target.year, target.month, target.day, 5) - timedelta(hours=12 * (n_runs - r))
+                t_min = base_min + rnd.randint(-2, 2)
+                yield (code, target.isoformat(), issued.isoformat() + "+09:00",
+                       rnd.choice((100, 101, 200, 201, 300, 400)),
+                       t_min + rnd.randint(3, 12), t_min, rnd.randrange(0, 101, 10))
+
+
+def timed(func, *args, repeat=20):
+    """平均実行時間(ミリ秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="forecast_archive のクエリ速度を計測する")
+    parser.add_argument("--areas", type=int, default=100)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--runs", type=int, default=14, help="対象日1日あたりの発表回数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = schema.connect(os.path.join(tmp, "archive.db"))
+        start = time.perf_counter()
+        with conn:
+            conn.executemany("INSERT INTO forecast_archive VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             generate_rows(args.areas, args.days, args.runs))
+        total = conn.execute("SELECT COUNT(*) FROM forecast_archive").fetchone()[0]
+        print(f"{total}行を作成: {time.perf_counter() - start:.1f}秒")
+
+        code = f"{args.areas // 2:06d}"
+        results = []
+        for days in (30, 365):
+            s, e = archive.period(conn, code, days)
+            results.append((f"最新予報の範囲読み({days}日)", timed(archive.latest_forecasts, conn, code, s, e)))
+            results.append((f"気温・降水確率の集計({days}日)", timed(archive.summary, conn, code, s, e)))
+            results.append((f"降水確率の週別推移({days}日)", timed(archive.pop_trend, conn, code, s, e)))
+        results.append(("ある対象日の発表履歴", timed(archive.revisions, conn, code, e)))
+        conn.close()
+
+    for name, ms in results:
+        mark = "OK" if ms < 100 else "遅い"
+        print(f"{name:<24} {ms:8.3f} ms  {mark}")
+
+
+if __name__ == "__main__":
+    main()
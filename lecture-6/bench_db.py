@@ -0,0 +1,64 @@
+"""地域を選ぶたびに接続し直す方式と、WeatherDB の接続プールを比べるベンチマーク
+
+    python bench_db.py --selections 2000        # 元にするDBは ../weather.db（--db で変えられる）
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from weather_db import FORECAST_SQL, WeatherDB
+
+# 取り込み済みのDBはリポジトリの直下にある（どこから実行しても見つかるようにする）
+SOURCE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "weather.db")
+
+
+def connect_per_call(db_name, area_code):
+    """これまでの display_weather_from_db と同じく、毎回 connect して閉じる"""
+    conn = sqlite3.connect(db_name)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(FORECAST_SQL, (area_code,)).fetchall()
+    conn.close()
+    return rows
+
+
+def measure(func, area_codes):
+    """1回の選択あたりの時間(マイクロ秒)のリスト"""
+    times = []
+    for code in area_codes:
+        start = time.perf_counter()
+        func(code)
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return times
+
+
+def report(name, times):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"{name:<16} 平均 {statistics.mean(times):8.1f} us  中央値 {statistics.median(times):8.1f} us  p95 {p95:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="選択1回あたりのDB読み込み時間を比べる")
+    parser.add_argument("--db", default=SOURCE_DB, help="元にするDB（コピーして使う）")
+    parser.add_argument("--selections", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "weather.db")
+        shutil.copy(args.db, db_name)
+
+        db = WeatherDB(db_name)
+        codes = [row["area_code"] for row in db.areas()]
+        selections = [codes[i % len(codes)] for i in range(args.selections)]
+
+        report("毎回connect", measure(lambda code: connect_per_call(db_name, code), selections))
+        report("接続プール", measure(db.forecast, selections))
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""旧スキーマ(TEXT・インデックスなし)と新スキーマで、1地域分の取得時間を比べるベンチマーク
+
+    python bench_schema.py --areas 10000 --days 730
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import schema
+
+LEGACY_SCHEMA = """
+CREATE TABLE weather (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    area_code TEXT,
+    city_name TEXT,
+    date TEXT,
+    weather_code TEXT,
+    temp_max TEXT,
+    temp_min TEXT,
+    pop TEXT
+);
+"""
+
+LEGACY_QUERY = "SELECT * FROM weather WHERE area_code = ? ORDER BY date ASC"
+TYPED_QUERY = (
+    "SELECT a.name AS city_name, w.* FROM weather w JOIN areas a USING (area_code) "
+    "WHERE w.area_code = ? ORDER BY w.date ASC"
+)
+
+
+def generate_rows(n_areas, n_days):
+    """(地域コード, 地域名, 日付, 天気コード, 最高, 最低, 降水確率) を日付順に生成する"""
+    rnd = random.Random(0)
+    start = date(2024, 1, 1)
+    for d in range(n_days):
+        day = (start + timedelta(days=d)).isoformat()
+        for a in range(n_areas):
+            t_min = rnd.randint(-10, 25)
+            yield (f"{a:06d}", f"地域{a}", day, rnd.choice((100, 101, 200, 201, 300, 400)),
+                   t_min + rnd.randint(3, 12), t_min, rnd.randrange(0, 101, 10))
+
+
+def build_legacy(path, n_areas, n_days):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    rows = ((code, name, day + "T00:00:00+09:00", str(w), str(hi), str(lo), str(pop))
+            for code, name, day, w, hi, lo, pop in generate_rows(n_areas, n_days))
+    with conn:
+        conn.executemany(
+            "INSERT INTO weather (area_code, city_name, date, weather_code, temp_max, temp_min, pop) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return conn
+
+
+def build_typed(path, n_areas, n_days):
+    conn = schema.connect(path)
+    with conn:
+        # 列は版ごとに増えるので、書き込む列を名前で指定する
+        conn.executemany("INSERT INTO areas (area_code, name) VALUES (?, ?)",
+                         ((f"{a:06d}", f"地域{a}") for a in range(n_areas)))
+        conn.executemany("INSERT INTO weather (area_code, date, weather_code, temp_max, temp_min, pop) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         ((code, day, w, hi, lo, pop) for code, _, day, w, hi, lo, pop in generate_rows(n_areas, n_days)))
+    return conn
+
+
+def measure(conn, query, area_codes):
+    """1地域あたりの平均取得時間(ミリ秒)"""
+    start = time.perf_counter()
+    for code in area_codes:
+        conn.execute(query, (code,)).fetchall()
+    return (time.perf_counter() - start) / len(area_codes) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="weather テーブルのスキーマ別ベンチマーク")
+    parser.add_argument("--areas", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--queries", type=int, default=20, help="計測する地域数")
+    args = parser.parse_args()
+
+    rnd = random.Random(1)
+    targets = [f"{rnd.randrange(args.areas):06d}" for _ in range(args.queries)]
+    print(f"{args.areas}地域 x {args.days}日 = {args.areas * args.days}行")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        legacy = build_legacy(os.path.join(tmp, "legacy.db"), args.areas, args.days)
+        print(f"旧スキーマ 作成: {time.perf_counter() - start:.1f}秒")
+        legacy_ms = measure(legacy, LEGACY_QUERY, targets)
+        legacy.close()
+
+        start = time.perf_counter()
+        typed = build_typed(os.path.join(tmp, "typed.db"), args.areas, args.days)
+        print(f"新スキーマ 作成: {time.perf_counter() - start:.1f}秒")
+        typed_ms = measure(typed, TYPED_QUERY, targets)
+        typed.close()
+
+    print(f"旧スキーマ: {legacy_ms:8.3f} ms/地域（全件走査+ソート）")
+    print(f"新スキーマ: {typed_ms:8.3f} ms/地域（主キー範囲読み）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""ネットワークなしで、アプリの主な処理の速さをまとめて測るベンチマーク
+
+    python bench_suite.py                                   # 全シナリオ
+    python bench_suite.py --latency 80 --jitter 40 --error-rate 0.05
+    python bench_suite.py --only parse render db_forecast --json result.json
+
+気象庁APIの代わりに lecture-5/jma_stub.py のスタブサーバーを立て、
+WeatherApp(lecture-5) の 取得・解析・描画 と、lecture-6 のDB読み書きを画面なしで実行する。
+シナリオごとに p50/p95/p99 (ms) と 1秒あたりの処理数 を表示する。
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import area_search
+import ingest
+import schema
+from weather_db import WeatherDB
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+import icons
+from cache import ForecastCache
+from jma_stub import FORECAST_PREFIX, ICON_PREFIX, JMAStub
+from prefetch import ForecastPrefetcher
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+LECTURE5_DIR = os.path.join(HERE, "..", "lecture-5")
+
+
+class Result:
+    """1シナリオ分の計測結果（1回ごとの時間と、全体の経過時間・処理数）"""
+
+    def __init__(self, name):
+        self.name = name
+        self.times = []  # ms
+        self.items = 0  # 処理した件数（地域数・行数など）
+        self.errors = 0
+        self.wall = 0.0  # 秒
+
+    def percentile(self, p):
+        if not self.times:
+            return None
+        if len(self.times) == 1:
+            return self.times[0]
+        return statistics.quantiles(self.times, n=100, method="inclusive")[p - 1]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "n": len(self.times),
+            "errors": self.errors,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "throughput_per_s": self.items / self.wall if self.wall else None,
+        }
+
+
+def measure(name, func, args_list, items_of=lambda ret: 1):
+    """args_list の各要素で func を呼び、1回ごとの時間を測る（例外は失敗として数える）"""
+    result = Result(name)
+    start = time.perf_counter()
+    for args in args_list:
+        t = time.perf_counter()
+        try:
+            ret = func(*args)
+        except Exception:
+            result.errors += 1
+            continue
+        result.times.append((time.perf_counter() - t) * 1000)
+        result.items += items_of(ret)
+    result.wall = time.perf_counter() - start
+    return result
+
+
+def load_module(name, path):
+    """lecture-5 と lecture-6 の 課題.py は同じ名前なので、別の名前を付けて読み込む"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- lecture-5 (WeatherApp) ---
+def load_app(stub):
+    """WeatherApp を画面なしで作り、取得先をスタブに向ける"""
+    app_module = load_module("weather_app", os.path.join(LECTURE5_DIR, "課題.py"))
+    app_module.FORECAST_URL = stub.base_url + FORECAST_PREFIX + "{}.json"
+    app_module.cache = ForecastCache(cache_dir=None)
+    app = app_module.WeatherApp()
+    app.update = lambda: None  # ページに載っていないので画面への反映はしない
+    app.scheduler.debounce = 0
+    return app_module, app
+
+
+def bench_fetch(stub, codes, rounds):
+    """キャッシュなしの取得（毎回ダウンロード）と、期限切れの再検証（304）"""
+    url = stub.base_url + FORECAST_PREFIX + "{}.json"
+    cold = measure("fetch", lambda code: ForecastCache(cache_dir=None).get_json(url.format(code)),
+                   [(code,) for _ in range(rounds) for code in codes])
+
+    warm = ForecastCache(cache_dir=None)
+    for code in codes:
+        try:
+            warm.get_json(url.format(code), ttl=0)
+        except Exception:
+            pass
+    revalidate = measure("fetch_304", lambda code: warm.get_json(url.format(code), ttl=0),
+                         [(code,) for _ in range(rounds) for code in codes])
+    return [cold, revalidate]
+
+
+def bench_prefetch(stub, codes, rounds):
+    """全地域の並列先読み（1回 = 全地域）"""
+    url = stub.base_url + FORECAST_PREFIX + "{}.json"
+
+    def run():
+        prefetcher = ForecastPrefetcher(url, codes, rate_per_sec=0, cache=ForecastCache(cache_dir=None))
+        prefetcher.run()
+        return len(prefetcher.results)
+
+    return [measure("prefetch_all", run, [()] * rounds, items_of=lambda n: n)]
+
+
+def bench_app(stub, codes, rounds):
+    """WeatherApp の 解析 / 描画 / 選択から表示まで"""
+    app_module, app = load_app(stub)
+    # 解析・描画はスタブの遅延やエラーに左右されないよう、保存済みJSONを直接使う
+    payloads = list(ingest.fetch_fixtures(codes, FIXTURE_DIR))
+    parsed = [app.parse_forecast(code, data) for code, data in payloads]
+
+    results = [
+        measure("parse", app.parse_forecast, [payload for _ in range(rounds) for payload in payloads]),
+        measure("render", app.forecast_row.set_items, [(items,) for _ in range(rounds) for items in parsed]),
+    ]
+
+    # 選択 → バックグラウンドで取得・解析 → カードに反映 までの時間（キャッシュなし）
+    delivered = threading.Event()
+    show_forecast = app.show_forecast
+    def record(result):
+        show_forecast(result)
+        delivered.set()
+    app.show_forecast = record
+    app.show_error = lambda ex: delivered.set()
+
+    def select(code):
+        app_module.cache = ForecastCache(cache_dir=None)
+        delivered.clear()
+        app.area_select.value = code
+        app.fetch_and_display_weather(None)
+        if not delivered.wait(30):
+            raise TimeoutError(code)
+        if not app.status_text.value.endswith("の週間天気"):
+            raise RuntimeError(app.status_text.value)
+
+    results.append(measure("select_e2e", select, [(code,) for _ in range(rounds) for code in codes]))
+    app.scheduler.shutdown()
+    return results
+
+
+# --- lecture-6 (DB) ---
+def bench_db(db_name, rounds):
+    db = WeatherDB(db_name)
+    codes = [row["area_code"] for row in db.areas()]
+    results = [
+        measure("db_forecast", db.forecast, [(code,) for _ in range(rounds) for code in codes],
+                items_of=len),
+        measure("db_all_forecasts", db.all_forecasts, [()] * rounds, items_of=len),
+    ]
+    db.close()
+
+    # WeatherAppDB の選択時の処理（DB読み込み + カード更新。ネットワークからの更新は裏で行われる）
+    app_module = load_module("weather_app_db", os.path.join(HERE, "課題.py"))
+    app_module.DB_NAME = db_name
+    app = app_module.WeatherAppDB()
+    app.update = lambda: None
+    app.repo.cache = ForecastCache(cache_dir=None)
+
+    def select(code):
+        app.area_select.value = code
+        app.display_weather_from_db(None)
+
+    results.append(measure("db_select", select, [(code,) for _ in range(rounds) for code in codes]))
+    app.scheduler.shutdown(wait=True)
+    app.db.close()
+    return results
+
+
+def bench_ingest(tmp, rounds):
+    """保存済みJSONからの取り込み（1回目は新規、2回目以降は変更なしの上書き）"""
+    offices = ingest.load_offices(FIXTURE_DIR)
+    codes = sorted(offices)
+    conn = ingest.connect(os.path.join(tmp, "ingest.db"))
+
+    def run():
+        return ingest.ingest(conn, codes, offices, FIXTURE_DIR)[0]
+
+    result = measure("ingest", run, [()] * rounds, items_of=lambda n: n)
+    conn.close()
+    return [result]
+
+
+def synthetic_areas(count=2000):
+    """fixtures の府県予報区に、市町村(class20s)相当の地域を count 件足した area.json
+
+    area_nested.json（実際の area.json と同じ形で、offices と class10s に同じコードがあるもの）の階層も足す。
+    """
+    with open(os.path.join(FIXTURE_DIR, "area.json"), encoding="utf-8") as f:
+        area_data = json.load(f)
+    with open(os.path.join(FIXTURE_DIR, "area_nested.json"), encoding="utf-8") as f:
+        nested = json.load(f)
+    for level in area_search.LEVELS:
+        area_data.setdefault(level, {}).update(nested.get(level, {}))
+    offices = sorted(area_data["offices"])
+    kana = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ"
+    class20s = area_data["class20s"]
+    for i in range(count):
+        office = offices[i % len(offices)]
+        name = area_data["offices"][office]["name"][:2] + kana[i % 41] + kana[i * 7 % 41] + "市町村"[i % 3]
+        class20s[f"{office[:2]}{i:05d}"] = {"name": name, "kana": kana[i % 41] + kana[i * 7 % 41], "parent": office}
+    area_data["class20s"] = class20s
+    return area_data
+
+
+def bench_search(tmp, rounds):
+    """地域検索（索引の作成と、入力1回ごとの検索）"""
+    conn = schema.connect(os.path.join(tmp, "search.db"))
+    area_data = synthetic_areas()
+    results = [measure("search_build", lambda: area_search.build(conn, area_data, force=True), [()],
+                       items_of=lambda n: n)]
+    # 同じコードが複数の階層にあっても1件だけになり、府県予報区として出てくるか
+    for query, code in (("宗谷", "011000"), ("大東島", "472000"), ("宮古島", "473000")):
+        found = [(r[0], r[2]) for r in area_search.search(conn, query)]
+        if (code, "office") not in found or [c for c, _ in found].count(code) != 1:
+            print(f"NG: {query} の結果に府県予報区 {code} が1件だけ含まれていない: {found}")
+            results[0].errors += 1
+    # 入力途中の文字列（1文字ずつ増える）・よみ・コード・打ち間違い
+    queries = ["東", "東京", "東京都", "おお", "おおさか", "かな", "ほっかいどう", "13", "130000", "北海通", "とうきよう"]
+    queries += [info["name"][:n] for info in list(area_data["class20s"].values())[::97] for n in (1, 2, 3)]
+    results.append(measure("area_search", area_search.search, [(conn, q) for _ in range(rounds) for q in queries],
+                           items_of=len))
+    conn.close()
+    return results
+
+
+SCENARIOS = ["fetch", "fetch_304", "prefetch_all", "parse", "render", "select_e2e",
+             "db_forecast", "db_all_forecasts", "db_select", "ingest", "search_build", "area_search"]
+
+
+def report(results):
+    print(f"{'シナリオ':<18}{'回数':>6}{'失敗':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'件/秒':>12}")
+    for r in results:
+        d = r.to_dict()
+        cells = [f"{d[k]:10.3f}" if d[k] is not None else f"{'-':>10}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        tput = f"{d['throughput_per_s']:12.0f}" if d["throughput_per_s"] else f"{'-':>12}"
+        print(f"{r.name:<18}{d['n']:>6}{d['errors']:>6}{''.join(cells)}{tput}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スタブサーバーを使ったオフラインのベンチマーク")
+    parser.add_argument("--db", default=os.path.join(HERE, "..", "weather.db"), help="元にするDB（コピーして使う）")
+    parser.add_argument("--rounds", type=int, default=5, help="各シナリオを全地域に対して繰り返す回数")
+    parser.add_argument("--latency", type=float, default=0, help="スタブの応答遅延(ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="遅延のばらつき(±ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="スタブが 500/503 を返す割合")
+    parser.add_argument("--pad-bytes", type=int, default=0, help="JSONの応答に足すバイト数")
+    parser.add_argument("--only", nargs="*", choices=SCENARIOS, help="実行するシナリオ")
+    parser.add_argument("--json", help="結果をJSONで保存するファイル")
+    args = parser.parse_args()
+    only = set(args.only or SCENARIOS)
+
+    offices = ingest.load_offices(FIXTURE_DIR)
+    codes = sorted(offices)
+    stub = JMAStub(FIXTURE_DIR, latency=args.latency, jitter=args.jitter,
+                   error_rate=args.error_rate, pad_bytes=args.pad_bytes).start()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # アプリが裏で読み込むアイコンもスタブから取り、保存は一時フォルダにする
+        icons.ICON_URL = stub.base_url + ICON_PREFIX + "{}.svg"
+        icons.icon_store.icon_dir = os.path.join(tmp, "icons")
+        # DB版アプリが裏で行う更新もスタブに向ける
+        ingest.FORECAST_URL = stub.base_url + FORECAST_PREFIX + "{}.json"
+        if only & {"fetch", "fetch_304"}:
+            results += bench_fetch(stub, codes, args.rounds)
+        if "prefetch_all" in only:
+            results += bench_prefetch(stub, codes, args.rounds)
+        if only & {"parse", "render", "select_e2e"}:
+            results += bench_app(stub, codes, args.rounds)
+        if only & {"db_forecast", "db_all_forecasts", "db_select"}:
+            db_name = os.path.join(tmp, "weather.db")
+            shutil.copy(args.db, db_name)
+            results += bench_db(db_name, args.rounds)
+        if "ingest" in only:
+            results += bench_ingest(tmp, args.rounds)
+        if only & {"search_build", "area_search"}:
+            results += bench_search(tmp, args.rounds)
+    stub.stop()
+
+    results = [r for r in results if r.name in only]
+    report(results)
+    print(f"スタブ: {stub.stats}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "settings": {k: v for k, v in vars(args).items() if k not in ("json", "only")},
+                "results": [r.to_dict() for r in results],
+                "stub": stub.stats,
+            }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""気象庁の予報JSONを取得して weather.db に書き込む取り込みスクリプト
+
+    python ingest.py                      # 全地域をネットワークから取り込む
+    python ingest.py --fixtures fixtures  # 保存済みJSONからオフラインで取り込む
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+
+import schema
+
+# lecture-5 のキャッシュ・先読み・解析モジュールを使い回す
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+from cache import JMA_BASE
+from forecast_parse import ForecastTable
+
+DB_NAME = 'weather.db'
+AREA_URL = JMA_BASE + "/bosai/common/const/area.json"
+FORECAST_URL = JMA_BASE + "/bosai/forecast/data/forecast/{}.json"
+BATCH_SIZE = 500
+# 1つの ForecastTable にまとめる地域の数（全地域を一度にメモリに載せない）
+PARSE_GROUP = 20
+
+# 値が変わった行だけを更新する（同じ内容なら何もしない）
+UPSERT_AREA_SQL = """
+INSERT INTO areas (area_code, name) VALUES (?, ?)
+ON CONFLICT(area_code) DO UPDATE SET name = excluded.name
+WHERE name IS NOT excluded.name
+"""
+
+UPSERT_SQL = """
+INSERT INTO weather (area_code, date, weather_code, temp_max, temp_min, pop)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(area_code, date) DO UPDATE SET
+    weather_code = excluded.weather_code,
+    temp_max = excluded.temp_max,
+    temp_min = excluded.temp_min,
+    pop = excluded.pop
+WHERE weather_code IS NOT excluded.weather_code
+   OR temp_max IS NOT excluded.temp_max
+   OR temp_min IS NOT excluded.temp_min
+   OR pop IS NOT excluded.pop
+"""
+
+# 履歴は追記のみ（同じ発表を取り込み直しても増えない）
+ARCHIVE_SQL = """
+INSERT OR IGNORE INTO forecast_archive
+    (area_code, target_date, issued_at, weather_code, temp_max, temp_min, pop)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# --- 1. 取得 ---
+def load_offices(fixtures=None):
+    """地域コード -> 地域名 の辞書を返す"""
+    if fixtures:
+        with open(os.path.join(fixtures, "area.json"), encoding="utf-8") as f:
+            raw_data = json.load(f)
+    else:
+        from cache import ForecastCache
+        raw_data = ForecastCache().get_json(AREA_URL, ttl=24 * 60 * 60)
+    return {code: info["name"] for code, info in raw_data.get("offices", {}).items()}
+
+
+def fetch_fixtures(area_codes, fixtures):
+    """保存済みのJSONファイルを地域ごとに読み込む"""
+    for code in area_codes:
+        path = os.path.join(fixtures, "forecast", f"{code}.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            yield code, json.load(f)
+
+
+def fetch_network(area_codes, workers=8):
+    """全地域を並列に取得し、届いた順に返す"""
+    from cache import ForecastCache
+    from prefetch import ForecastPrefetcher
+
+    prefetcher = ForecastPrefetcher(FORECAST_URL, area_codes, max_workers=workers, cache=ForecastCache())
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(prefetcher.fetch_one, code): code for code in area_codes}
+        for future in as_completed(futures):
+            code = futures[future]
+            try:
+                yield code, future.result()
+            except Exception as e:
+                print(f"取得エラー {code}: {e}", file=sys.stderr)
+
+
+# --- 2. 解析 ---
+def parse(payloads, group_size=PARSE_GROUP):
+    """予報JSONを group_size 地域ずつ lecture-5 の ForecastTable（列ごとの array）にまとめて返す"""
+    for group in batched(payloads, group_size):
+        table = ForecastTable.from_payloads(group)
+        for code, e in table.errors.items():
+            print(f"解析エラー {code}: {e}", file=sys.stderr)
+        yield table
+
+
+# --- 3. 正規化 ---
+def normalize(table):
+    """weather テーブルの列順 + 発表時刻のタプルに揃える（日付は 'YYYY-MM-DD'、数値は整数、欠損は None）
+
+    天気コードが欠けている日は書き込まない（weather_code は NOT NULL）。
+    """
+    for code, _, date, weather_code, temp_max, temp_min, pop, issued_at in table.rows():
+        if weather_code is None:
+            continue
+        yield code, date, weather_code, temp_max, temp_min, pop, issued_at
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- 4. 書き込み ---
+def connect(db_name=DB_NAME):
+    conn = schema.connect(db_name)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def upsert(conn, batches, archive=True, commit=True):
+    """1バッチ1トランザクションで書き込み、(処理行数, weather の変更行数, 履歴の追加行数) を返す
+
+    commit=False なら確定しない（呼び出し側のトランザクションで、ほかの書き込みとまとめて確定する）。
+    """
+    total = 0
+    changed = 0
+    archived = 0
+    for batch in batches:
+        if commit:
+            with conn:
+                counts = write_batch(conn, batch, archive)
+        else:
+            counts = write_batch(conn, batch, archive)
+        changed += counts[0]
+        archived += counts[1]
+        total += len(batch)
+    return total, changed, archived
+
+
+def write_batch(conn, batch, archive):
+    """1バッチを書き込み、(weather の変更行数, 履歴の追加行数) を返す"""
+    before = conn.total_changes
+    conn.executemany(UPSERT_SQL, (row[:6] for row in batch))
+    changed = conn.total_changes - before
+    if not archive:
+        return changed, 0
+    before = conn.total_changes
+    conn.executemany(ARCHIVE_SQL, (
+        (code, date, issued_at, w, hi, lo, pop)
+        for code, date, w, hi, lo, pop, issued_at in batch
+        if issued_at
+    ))
+    return changed, conn.total_changes - before
+
+
+def ingest(conn, area_codes, offices, fixtures=None, batch_size=BATCH_SIZE, archive=True):
+    """取得 → 解析(列ごとの表) → 正規化 → 書き込み をつないで実行する
+
+    どの段も順に流すだけなので、メモリに載るのは解析中の PARSE_GROUP 地域分と書き込み中の1バッチだけ。
+    """
+    if fixtures:
+        payloads = fetch_fixtures(area_codes, fixtures)
+    else:
+        payloads = fetch_network(area_codes)
+    with conn:
+        conn.executemany(UPSERT_AREA_SQL, [(code, offices.get(code, code)) for code in area_codes])
+    rows = chain.from_iterable(map(normalize, parse(payloads)))
+    return upsert(conn, batched(rows, batch_size), archive)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="気象庁の予報を weather.db に取り込む")
+    parser.add_argument("--db", default=DB_NAME, help="書き込み先のDBファイル")
+    parser.add_argument("--fixtures", help="ネットワークの代わりに使う保存済みJSONのフォルダ")
+    parser.add_argument("--areas", nargs="*", help="取り込む地域コード（省略時は全地域）")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-archive", action="store_true", help="発表ごとの履歴(forecast_archive)に残さない")
+    args = parser.parse_args()
+
+    offices = load_offices(args.fixtures)
+    area_codes = args.areas or sorted(offices)
+
+    conn = connect(args.db)
+    start = time.perf_counter()
+    total, changed, archived = ingest(conn, area_codes, offices, args.fixtures, args.batch_size, not args.no_archive)
+    elapsed = time.perf_counter() - start
+    conn.close()
+
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"{len(area_codes)}地域 {total}行を処理（変更 {changed}行・履歴に追加 {archived}行） {elapsed:.2f}秒 {rate:.0f}行/秒")
+
+
+if __name__ == "__main__":
+    main()
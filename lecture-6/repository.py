@@ -0,0 +1,136 @@
+"""weather.db を先に読み、気象庁APIからの最新データで裏から書き足すリポジトリ層
+
+画面はいつも weather.db の内容をすぐに表示し、ネットワークからの取得は
+refresh() でバックグラウンドから行う。取得できたら weather.db に書き戻し、
+オフラインのときは weather.db に残っている最後のデータをそのまま使う。
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+import area_search
+import ingest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+from cache import JST, ForecastCache
+from forecast_parse import ForecastTable
+from metrics import metrics
+
+# 地域一覧はほとんど変わらないので1日キャッシュする
+AREA_TTL = 24 * 60 * 60
+# 取得に失敗したら、しばらくはネットワークに出ずにDBのデータだけで答える（秒）
+OFFLINE_RETRY = 30
+# 取り込んだときの時刻と発表時刻を記録する（新しさの表示用）
+UPDATE_FRESHNESS_SQL = "UPDATE areas SET fetched_at = ?, issued_at = ? WHERE area_code = ?"
+
+
+def now_text():
+    return datetime.now(JST).isoformat(timespec="seconds")
+
+
+def freshness_text(fetched_at, issued_at, now=None):
+    """'発表 1/7 17時・取得 5分前' のような表示用の文字列"""
+    if not fetched_at:
+        return "ネットワークから未取得（DBのデータ）"
+    now = now or datetime.now(JST)
+    minutes = int((now - datetime.fromisoformat(fetched_at)).total_seconds() // 60)
+    if minutes < 1:
+        ago = "たった今"
+    elif minutes < 60:
+        ago = f"{minutes}分前"
+    elif minutes < 48 * 60:
+        ago = f"{minutes // 60}時間前"
+    else:
+        ago = f"{minutes // (24 * 60)}日前"
+    text = f"取得 {ago}"
+    if issued_at:
+        issued = datetime.fromisoformat(issued_at)
+        text = f"発表 {issued.month}/{issued.day} {issued.hour}時・" + text
+    return text
+
+
+class ForecastRepository:
+    """WeatherDB(ローカル) と ForecastCache(ネットワーク) をまとめて扱うクラス"""
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache or ForecastCache()
+        self.offline_until = 0.0  # この時刻(time.monotonic)までは取得を試みない
+
+    # --- ローカル（すぐに返る） ---
+    def areas(self):
+        return self.db.areas()
+
+    def forecast(self, area_code):
+        return self.db.forecast(area_code)
+
+    def freshness(self, area_code):
+        return freshness_text(*self.db.freshness(area_code))
+
+    def search_areas(self, query, limit=20):
+        """地域名・よみ・コードで地域を探す（索引は build_search_index で作っておく）"""
+        with self.db.reader() as conn:
+            return area_search.search(conn, query, limit)
+
+    def build_search_index(self):
+        """地域検索の索引を作る。作り直した地域数を返す（作成済みなら None）
+
+        area.json を取得済みなら市町村まで、なければDBの府県予報区だけで作る。
+        """
+        area_data = self.cache.peek_stale(ingest.AREA_URL)
+        if area_data is None:
+            area_data = {"offices": {code: {"name": name} for code, name in self.areas()}}
+        with self.db.writer() as conn:
+            return area_search.build(conn, area_data)
+
+    # --- ネットワーク（バックグラウンドから呼ぶ） ---
+    def refresh_areas(self):
+        """地域一覧を取得して areas に書き足す。追加・変更した件数を返す"""
+        raw_data = self.cache.get_json(ingest.AREA_URL, ttl=AREA_TTL)
+        offices = [(code, info["name"]) for code, info in raw_data.get("offices", {}).items()]
+        with self.db.writer() as conn:
+            before = conn.total_changes
+            conn.executemany(ingest.UPSERT_AREA_SQL, sorted(offices))
+            changed = conn.total_changes - before
+        self.build_search_index()
+        return changed
+
+    def refresh(self, area_code, is_stale=lambda: False):
+        """1地域の予報を取得して weather.db に書き戻す
+
+        DBの内容が変わったら True、変わらなければ False、途中で古くなったら None を返す。
+        ネットワークのエラーはそのまま送出する（呼び出し側でオフライン表示にする）。
+        """
+        url = ingest.FORECAST_URL.format(area_code)
+        data = self.cache.peek(url)
+        from_network = data is None
+        if from_network:
+            wait = self.offline_until - time.monotonic()
+            if wait > 0:
+                raise ConnectionError(f"オフライン（{wait:.0f}秒後に再試行）")
+            try:
+                data = self.cache.get_json(url)
+            except Exception:
+                self.offline_until = time.monotonic() + OFFLINE_RETRY
+                raise
+        if is_stale():
+            return None
+
+        with metrics.span("forecast_parse"):
+            table = ForecastTable()
+            table.add(area_code, data)
+            rows = list(ingest.normalize(table))
+        issued_at = rows[0][-1] if rows else None
+
+        _, stored_issued_at = self.db.freshness(area_code)
+        if not from_network and issued_at == stored_issued_at:
+            # キャッシュの期限内で、同じ発表をすでに取り込み済み
+            return False
+
+        # 予報と取得時刻は1つのトランザクションで確定する（途中で失敗したらどちらも書かない）
+        with self.db.writer() as conn:
+            # 履歴(forecast_archive)に足しただけなら予報は変わっていないので、weather の変更だけを見る
+            _, changed, _ = ingest.upsert(conn, [rows], commit=False)
+            conn.execute(UPDATE_FRESHNESS_SQL, (now_text(), issued_at, area_code))
+        return changed > 0
@@ -0,0 +1,154 @@
+"""weather.db のスキーマ定義と移行ツール
+
+    python schema.py weather.db   # 古いDBをその場で最新のスキーマに変換する
+"""
+import sqlite3
+import sys
+
+DB_NAME = 'weather.db'
+
+# PRAGMA user_version で現在のスキーマの版を管理する
+# 0: 旧スキーマ（全列TEXT・インデックスなし）
+# 1: 型付き・(area_code, date) 主キー・areas テーブル分離
+# 2: 発表ごとの予報を残す forecast_archive テーブルを追加
+# 3: areas に取得時刻・発表時刻を追加（データの新しさの表示用）
+# 4: 地域検索用の索引テーブル area_index / area_grams を追加
+SCHEMA_VERSION = 4
+
+SCHEMA_V1 = """
+CREATE TABLE IF NOT EXISTS areas (
+    area_code TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS weather (
+    area_code TEXT NOT NULL REFERENCES areas(area_code),
+    date TEXT NOT NULL,          -- 'YYYY-MM-DD'
+    weather_code INTEGER NOT NULL,
+    temp_max INTEGER,            -- 欠損は NULL
+    temp_min INTEGER,
+    pop INTEGER,
+    PRIMARY KEY (area_code, date)
+) WITHOUT ROWID;
+"""
+
+# 発表ごとの予報を追記していく履歴テーブル
+# 主キーの順に (地域, 対象日) の範囲読みと、同じ対象日の発表履歴がそのまま引ける
+SCHEMA_V2 = """
+CREATE TABLE IF NOT EXISTS forecast_archive (
+    area_code TEXT NOT NULL,
+    target_date TEXT NOT NULL,   -- 'YYYY-MM-DD'
+    issued_at TEXT NOT NULL,     -- 発表時刻 (reportDatetime)
+    weather_code INTEGER NOT NULL,
+    temp_max INTEGER,
+    temp_min INTEGER,
+    pop INTEGER,
+    PRIMARY KEY (area_code, target_date, issued_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_archive_area_issued ON forecast_archive(area_code, issued_at);
+"""
+
+# ネットワークから最後に取り込んだ時刻と、そのときの発表時刻（どちらも未取得なら NULL）
+SCHEMA_V3 = """
+ALTER TABLE areas ADD COLUMN fetched_at TEXT;
+ALTER TABLE areas ADD COLUMN issued_at TEXT;
+"""
+
+# 地域検索の索引（area_search.py が作る）
+# area_grams は正規化した文字列の1文字・2文字ごとの転置索引で、主キーの順に gram から地域を引ける
+SCHEMA_V4 = """
+CREATE TABLE IF NOT EXISTS area_index (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    level TEXT NOT NULL,         -- 'office' / 'class10' / 'class15' / 'class20'
+    office_code TEXT NOT NULL,   -- 予報を持つ府県予報区のコード
+    search_text TEXT NOT NULL    -- 正規化した 名前・よみ・英語名・コード（改行区切り）
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS area_grams (
+    gram TEXT NOT NULL,
+    code TEXT NOT NULL,
+    PRIMARY KEY (gram, code)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+# 旧テーブルの空文字や '-' を NULL にしてから整数に変換する
+_TO_INT = "CAST(NULLIF(NULLIF(TRIM({0}), ''), '-') AS INTEGER)"
+
+MIGRATE_V0_TO_V1 = f"""
+ALTER TABLE weather RENAME TO weather_v0;
+{SCHEMA_V1}
+INSERT OR REPLACE INTO areas (area_code, name)
+    SELECT area_code, city_name FROM weather_v0 ORDER BY id;
+INSERT OR REPLACE INTO weather (area_code, date, weather_code, temp_max, temp_min, pop)
+    SELECT area_code, substr(date, 1, 10), CAST(weather_code AS INTEGER),
+           {_TO_INT.format('temp_max')}, {_TO_INT.format('temp_min')}, {_TO_INT.format('pop')}
+    FROM weather_v0 ORDER BY id;
+DROP TABLE weather_v0;
+"""
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def table_exists(conn, name):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def migrate(conn):
+    """DBを最新のスキーマにする（新規DBは作成、旧DBはその場で変換）。変換前の版を返す"""
+    version = get_version(conn)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    scripts = []
+    if version < 1:
+        if table_exists(conn, "weather"):
+            # 重複行は id の大きい(後から入った)方を残す
+            scripts.append(MIGRATE_V0_TO_V1)
+        else:
+            scripts.append(SCHEMA_V1)
+    if version < 2:
+        scripts.append(SCHEMA_V2)
+    if version < 3:
+        scripts.append(SCHEMA_V3)
+    if version < 4:
+        scripts.append(SCHEMA_V4)
+    script = "\n".join(scripts)
+
+    # executescript は自動でコミットするので、明示的にトランザクションで囲む
+    try:
+        conn.executescript(f"BEGIN; {script} PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;")
+    except sqlite3.Error:
+        # 途中で失敗したら元のDBのまま残す
+        conn.rollback()
+        raise
+    return version
+
+
+def connect(db_name=DB_NAME):
+    """最新スキーマに揃えた接続を返す"""
+    conn = sqlite3.connect(db_name)
+    migrate(conn)
+    return conn
+
+
+def main():
+    db_name = sys.argv[1] if len(sys.argv) > 1 else DB_NAME
+    conn = sqlite3.connect(db_name)
+    before = migrate(conn)
+    if before < SCHEMA_VERSION:
+        # 旧テーブルぶんの空き領域を詰める
+        conn.execute("VACUUM")
+        print(f"{db_name}: スキーマを v{before} から v{SCHEMA_VERSION} に移行しました")
+    else:
+        print(f"{db_name}: すでに最新のスキーマ(v{before})です")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
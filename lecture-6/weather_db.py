@@ -0,0 +1,109 @@
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import schema
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+from metrics import metrics
+
+# 接続ごとに設定するPRAGMA
+PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",  # 256MB までメモリマップで読む
+    "PRAGMA cache_size = -16000",  # ページキャッシュ 16MB
+    "PRAGMA temp_store = MEMORY",
+]
+
+# SQLは定数にしておき、接続ごとのステートメントキャッシュで使い回す
+AREAS_SQL = "SELECT area_code, name FROM areas ORDER BY area_code"
+WEATHER_CODES_SQL = "SELECT DISTINCT weather_code FROM weather"
+FORECAST_SQL = (
+    "SELECT a.name AS city_name, w.* FROM weather w JOIN areas a USING (area_code) "
+    "WHERE w.area_code = ? ORDER BY w.date ASC"
+)
+# ネットワークから最後に取り込んだ時刻と発表時刻
+FRESHNESS_SQL = "SELECT fetched_at, issued_at FROM areas WHERE area_code = ?"
+# 全地域の予報を1回のクエリでまとめて読む（ダッシュボード用）
+ALL_FORECASTS_SQL = (
+    "SELECT w.area_code, a.name, w.date, w.weather_code, w.temp_max, w.temp_min, w.pop "
+    "FROM weather w JOIN areas a USING (area_code) ORDER BY w.area_code, w.date"
+)
+
+
+class WeatherDB:
+    """weather.db への長寿命な接続をまとめるデータアクセス層
+
+    読み込みは複数の接続をプールして並行に、書き込みは1本の接続をロックで直列にする。
+    """
+
+    def __init__(self, db_name, readers=4):
+        self.db_name = db_name
+
+        # 書き込み用（スキーマの移行もここで済ませる）
+        self.write_conn = self._open()
+        schema.migrate(self.write_conn)
+        self.write_conn.execute("PRAGMA journal_mode = WAL")
+        self.write_lock = threading.Lock()
+
+        # 読み込み用の接続プール
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            conn = self._open()
+            conn.execute("PRAGMA query_only = ON")
+            self.readers.put(conn)
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row  # カラム名でアクセスできるようにする
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """プールから読み込み用の接続を借りる（使い終わったら返す）"""
+        conn = self.readers.get()
+        try:
+            with metrics.span("sql_read"):
+                yield conn
+        finally:
+            self.readers.put(conn)
+
+    @contextmanager
+    def writer(self):
+        """書き込み用の接続をロックして1トランザクションで使う"""
+        with self.write_lock:
+            with metrics.span("sql_write"), self.write_conn:
+                yield self.write_conn
+
+    def areas(self):
+        with self.reader() as conn:
+            return conn.execute(AREAS_SQL).fetchall()
+
+    def weather_codes(self):
+        """DBに出てくる天気コードの一覧"""
+        with self.reader() as conn:
+            return [row[0] for row in conn.execute(WEATHER_CODES_SQL)]
+
+    def forecast(self, area_code):
+        with self.reader() as conn:
+            return conn.execute(FORECAST_SQL, (area_code,)).fetchall()
+
+    def freshness(self, area_code):
+        """(取得時刻, 発表時刻) を返す（ネットワークから取り込んだことがなければ None）"""
+        with self.reader() as conn:
+            row = conn.execute(FRESHNESS_SQL, (area_code,)).fetchone()
+        return (row["fetched_at"], row["issued_at"]) if row else (None, None)
+
+    def all_forecasts(self):
+        with self.reader() as conn:
+            return conn.execute(ALL_FORECASTS_SQL).fetchall()
+
+    def close(self):
+        while not self.readers.empty():
+            self.readers.get().close()
+        self.write_conn.close()
@@ -1,10 +1,24 @@
-import sqlite3
+import os
+import sys
+import threading
+import time
 import flet as ft
 from datetime import datetime
+from archive_view import ArchiveView
+from area_search_view import AreaSearchBox
+from repository import ForecastRepository
+from weather_db import WeatherDB
+
+# lecture-5 と共通のカード描画・読み込みモジュールを使う
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lecture-5"))
+from cards import ForecastStrip
+from dashboard import DashboardView
+from icons import icon_store
+from metrics import metrics
+from scheduler import LoadScheduler
 
 # 定数
 DB_NAME = 'weather.db'
-ICON_URL = "https://www.jma.go.jp/bosai/forecast/img/{}.svg"
 WEEKDAYS = ["月", "火", "水", "木", "金", "土", "日"]
 
 class WeatherAppDB(ft.Container):
@@ -16,139 +30,190 @@ class WeatherAppDB(ft.Container):
         self.bgcolor = ft.Colors.LIGHT_BLUE_50
         self.border_radius = 15
         
-        # 週間予報を表示する横スクロールエリア
-        self.forecast_row = ft.Row(
-            spacing=10,
-            scroll=ft.ScrollMode.AUTO,
-        )
+        # 週間予報を表示する横スクロールエリア（カードは使い回し、見えている分だけ描画）
+        self.forecast_row = ForecastStrip()
+
+        # DBへの接続はアプリの間ずっと使い回す（旧スキーマのDBならここで変換される）
+        self.db = WeatherDB(DB_NAME)
+        # 表示はDBから、最新データの取得と書き戻しは裏で行う
+        self.repo = ForecastRepository(self.db)
+        self.scheduler = LoadScheduler()
 
-        # データベースから地域リストを取得してドロップダウンを作成
-        self.area_select = ft.Dropdown(
-            label="地域を選択",
-            width=300,
-            on_change=self.display_weather_from_db,
-            options=self.get_area_options_from_db()
+        # DBに出てくる天気のアイコンを裏で用意しておく（保存済みならオフラインでも表示できる）
+        icon_store.preload_async(self.db.weather_codes())
+
+        # 地域名・よみ・コードで絞り込む検索ボックス（索引は weather.db に保存してある）
+        self.area_select = AreaSearchBox(
+            search=self.repo.search_areas,
+            on_select=lambda area_code: self.display_weather_from_db(None),
         )
 
         self.status_text = ft.Text("地域を選択してください", size=16, color=ft.Colors.GREY_700)
+        # 表示中のデータがいつのものか
+        self.fresh_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
+
+        # 発表ごとの履歴を集計して見るビュー
+        self.archive_view = ArchiveView(self.db)
+        # 全地域（または比較に追加した地域）を並べて見るビュー
+        self.dashboard = DashboardView(on_refresh=self.load_dashboard)
+
+        # 「週間予報」と「履歴」をタブで切り替える
+        self.tabs = ft.Tabs(
+            selected_index=0,
+            height=480,
+            on_change=self.on_tab_changed,
+            tabs=[
+                ft.Tab(
+                    text="週間予報",
+                    content=ft.Column(
+                        controls=[
+                            self.status_text,
+                            ft.Container(
+                                content=self.forecast_row,
+                                padding=10,
+                                height=280,
+                            )
+                        ],
+                        horizontal_alignment=ft.CrossAxisAlignment.CENTER
+                    ),
+                ),
+                ft.Tab(text="履歴", content=ft.Container(content=self.archive_view, padding=10)),
+                ft.Tab(text="全国一覧", content=ft.Container(content=self.dashboard, padding=10)),
+            ],
+        )
 
         # 全体のレイアウト構成
         self.content = ft.Column(
             controls=[
-                ft.Text("週間天気予報アプリ (DB版)", size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_GREY_800),
-                self.area_select,
+                ft.Text("週間天気予報アプリ (オフライン対応版)", size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_GREY_800),
+                ft.Row(
+                    controls=[
+                        self.area_select,
+                        ft.IconButton(
+                            icon=ft.Icons.ADD_CHART,
+                            tooltip="全国一覧で比較する",
+                            on_click=lambda e: self.dashboard.add_compare(self.area_select.value),
+                        ),
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER
+                ),
+                self.fresh_text,
                 ft.Divider(),
-                self.status_text,
-                ft.Container(
-                    content=self.forecast_row,
-                    padding=10,
-                    height=280,
-                )
+                self.tabs,
             ],
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
         )
 
-    def get_area_options_from_db(self):
-        """DBから保存されている地域名とコードを取得してドロップダウンの選択肢にする"""
-        options = []
+    def update(self):
+        # 画面への反映にかかる時間も計測する（WEATHER_METRICS=1 のとき）
+        with metrics.span("ui_update"):
+            super().update()
+
+    def did_mount(self):
+        # DBに地域がまだない（初回起動）ときは、地域一覧を裏で取得する（検索の索引もそこで作る）
+        if not self.repo.areas():
+            self.fresh_text.value = "地域一覧を取得中..."
+            self.fresh_text.update()
+            threading.Thread(target=self.refresh_areas, daemon=True).start()
+        else:
+            # 索引が地域一覧と揃っていなければ裏で作り直す（揃っていればすぐ終わる）
+            threading.Thread(target=self.build_search_index, daemon=True).start()
+
+    def refresh_areas(self):
+        try:
+            self.repo.refresh_areas()
+            self.fresh_text.value = ""
+        except Exception as ex:
+            self.fresh_text.value = f"オフラインのため地域一覧を取得できませんでした（{ex}）"
+        self.update()
+
+    def build_search_index(self):
+        try:
+            self.repo.build_search_index()
+        except Exception as ex:
+            metrics.error("索引の作成エラー", ex)
+
+    def on_tab_changed(self, e):
+        # 履歴タブを開いたときに、選択中の地域の履歴を読み込む
+        if self.tabs.selected_index == 1:
+            self.archive_view.show_area(self.area_select.value)
+        elif self.tabs.selected_index == 2:
+            self.load_dashboard()
+
+    def load_dashboard(self):
+        """全地域の予報を1回のクエリで読み込んでダッシュボードに渡す"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            cur = conn.cursor()
-            cur.execute("SELECT DISTINCT area_code, city_name FROM weather ORDER BY area_code")
-            rows = cur.fetchall()
-            for code, name in rows:
-                options.append(ft.dropdown.Option(key=code, text=name))
-            conn.close()
-        except Exception as e:
-            print(f"DB読み込みエラー: {e}")
-        return options
+            start = time.perf_counter()
+            rows = self.db.all_forecasts()
+            self.dashboard.set_rows(rows, fetch_ms=(time.perf_counter() - start) * 1000)
+        except Exception as ex:
+            metrics.error("詳細エラー", ex)
 
     def display_weather_from_db(self, e):
-        """選択された地域のデータをDBから読み込んでカードを表示"""
+        """選択された地域をまずDBから表示し、裏でネットワークから最新のデータを取りに行く"""
         area_code = self.area_select.value
         if not area_code:
             return
 
-        # UIのリセット
-        self.forecast_row.controls.clear()
-        
+        self.show_from_db(area_code)
+        if self.tabs.selected_index == 1:
+            self.archive_view.show_area(area_code)
+
+        self.fresh_text.value = self.repo.freshness(area_code) + "・更新を確認中..."
+        self.update()
+        self.scheduler.submit(
+            lambda is_stale: self.repo.refresh(area_code, is_stale),
+            on_result=lambda changed: self.on_refreshed(area_code, changed),
+            on_error=lambda ex: self.on_refresh_failed(area_code, ex),
+        )
+
+    def on_refreshed(self, area_code, changed):
+        """ネットワークから取り込めたら、変わっていたときだけ表示し直す"""
+        if changed:
+            self.show_from_db(area_code)
+        self.fresh_text.value = self.repo.freshness(area_code)
+        self.update()
+
+    def on_refresh_failed(self, area_code, ex):
+        # オフラインなどで取得できなければ、DBのデータを表示したままにする
+        metrics.error("更新エラー", ex, area_code)
+        self.fresh_text.value = "オフライン: " + self.repo.freshness(area_code)
+        self.update()
+
+    def show_from_db(self, area_code):
+        """DBの予報をカードに反映する（画面への反映は呼び出し側で行う）"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            conn.row_factory = sqlite3.Row # カラム名でアクセスできるようにする
-            cur = conn.cursor()
-            
-            # SQLで対象地域のデータを取得
-            cur.execute("SELECT * FROM weather WHERE area_code = ? ORDER BY date ASC", (area_code,))
-            rows = cur.fetchall()
+            # SQLで対象地域のデータを取得（主キー(area_code, date)の順にそのまま読める）
+            rows = self.repo.forecast(area_code)
             
             if rows:
                 area_name = rows[0]["city_name"]
                 self.status_text.value = f"{area_name} の週間天気"
                 
+                items = []
                 for row in rows:
                     # 日付のフォーマット整形
-                    # DB内の '2026-01-07T...' から '1/7 (水)' の形式を作る
+                    # DB内の '2026-01-07' から '1/7 (水)' の形式を作る
                     dt = datetime.fromisoformat(row["date"])
                     date_str = f"{dt.month}/{dt.day} ({WEEKDAYS[dt.weekday()]})"
                     
-                    # カードを作成して追加（後に書かれたコードのUIを再現）
-                    card = self.create_daily_card(
-                        date_text=date_str,
-                        weather_code=row["weather_code"],
-                        pop=row["pop"],
-                        t_min=row["temp_min"],
-                        t_max=row["temp_max"]
-                    )
-                    self.forecast_row.controls.append(card)
+                    items.append((
+                        date_str,
+                        row["weather_code"],
+                        # 欠損値は NULL で保存されているので "-" に置き換える
+                        "-" if row["pop"] is None else row["pop"],
+                        "-" if row["temp_min"] is None else row["temp_min"],
+                        "-" if row["temp_max"] is None else row["temp_max"],
+                    ))
+                # 既存のカードに中身を割り当てる（後に書かれたコードのUIを再現）
+                self.forecast_row.set_items(items)
             else:
                 self.status_text.value = "データがDBに見つかりませんでした"
-            
-            conn.close()
+                self.forecast_row.set_items([])
         except Exception as ex:
             self.status_text.value = "DBデータの読み込みに失敗しました"
-            print(f"詳細エラー: {ex}")
-        
-        self.update()
-
-    def create_daily_card(self, date_text, weather_code, pop, t_min, t_max):
-        """後に書かれたコードと全く同じデザインのカードUI"""
-        # 降水確率の表示調整（DBが数値のみの場合を考慮）
-        pop_display = f"{pop}%" if "%" not in str(pop) and pop != "-" else pop
-
-        return ft.Container(
-            width=100,
-            padding=10,
-            bgcolor=ft.Colors.WHITE,
-            border_radius=10,
-            shadow=ft.BoxShadow(
-                spread_radius=1,
-                blur_radius=5,
-                color=ft.Colors.BLUE_GREY_100,
-            ),
-            content=ft.Column(
-                controls=[
-                    ft.Text(date_text, weight=ft.FontWeight.BOLD, size=14, text_align=ft.TextAlign.CENTER),
-                    ft.Divider(height=5),
-                    ft.Image(
-                        src=ICON_URL.format(weather_code),
-                        width=50, height=50,
-                        fit=ft.ImageFit.CONTAIN
-                    ),
-                    ft.Text(f"降水 {pop_display}", size=12, color=ft.Colors.BLUE),
-                    ft.Divider(height=5),
-                    ft.Row(
-                        controls=[
-                            ft.Text(f"{t_max}℃", color=ft.Colors.RED, size=12),
-                            ft.Text("/", size=12),
-                            ft.Text(f"{t_min}℃", color=ft.Colors.BLUE, size=12),
-                        ],
-                        alignment=ft.MainAxisAlignment.CENTER
-                    )
-                ],
-                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                alignment=ft.MainAxisAlignment.START
-            )
-        )
+            self.forecast_row.set_items([])
+            metrics.error("詳細エラー", ex)
 
 def main(page: ft.Page):
     page.title = "Weekly Weather App (DB-UI Integrated)"